@@ -0,0 +1,171 @@
+"""
+Request throughput of the server with one or more web workers.
+
+Starts ``python -m src.main`` for each worker count, fires concurrent
+ingest and read requests at it and prints requests per second. Every
+worker count, including 1, runs behind the store server, so the rows are
+comparable; an extra ``in-process`` row runs one worker without it.
+
+On Linux it also reports the CPU time per request spent in the store
+server and in the web workers. The store server is a single process, so
+``1 / server CPU per request`` bounds the throughput of any number of
+workers, and ``worker CPU / server CPU`` is about how many workers can
+be added before it becomes the bottleneck. Throughput only scales with
+workers when the machine has free cores for them.
+
+Usage:
+    python -m benchmarks.cluster_benchmark --workers 1 2 4 --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+import httpx
+from src.main import start_store_server
+
+PORT = 3901
+BASE_URL = f"http://127.0.0.1:{PORT}/api/v1"
+
+
+def start_server(workers: int, store_socket: Optional[str] = None) -> subprocess.Popen:
+    """Start the server with a number of web workers and wait until it answers."""
+    env = dict(os.environ, PORT=str(PORT), WEB_WORKERS=str(workers))
+    env.pop("STORE_SOCKET", None)
+    if store_socket is not None:
+        env["STORE_SOCKET"] = store_socket
+    process = subprocess.Popen([sys.executable, "-m", "src.main"], env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{BASE_URL}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+
+def process_tree(root: int) -> List[int]:
+    """Return a process and all of its descendants, read from /proc."""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            try:
+                with open(f"/proc/{name}/stat") as f:
+                    # The command name may contain spaces; fields resume after ")"
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(name))
+    pids, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+def cpu_seconds(pid: int) -> float:
+    """Return the user plus system CPU time of a process, or 0 if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return 0.0
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def is_store_server(pid: int) -> bool:
+    """Return True if a process is a store server."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"src.store_server" in f.read()
+    except OSError:
+        return False
+
+
+def cpu_split(roots: List[int]) -> Tuple[float, float]:
+    """Return the CPU seconds used so far by store servers and by web workers."""
+    store = workers = 0.0
+    for root in roots:
+        for pid in process_tree(root):
+            if is_store_server(pid):
+                store += cpu_seconds(pid)
+            else:
+                workers += cpu_seconds(pid)
+    return store, workers
+
+
+async def load(requests: int, concurrency: int) -> float:
+    """Send alternating ingest and read requests and return requests per second."""
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits) as client:
+        created = await client.post("/data", json={"data": {"value": 0}})
+        record_id = created.json()["data"]["id"]
+
+        async def worker(count: int) -> None:
+            for i in range(count):
+                if i % 2:
+                    await client.get(f"/data/{record_id}")
+                else:
+                    await client.post("/data", json={"data": {"value": i}})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+def run(label: str, workers: int, requests: int, concurrency: int, store: bool) -> None:
+    """Measure one configuration and print its row."""
+    store_process = socket_path = None
+    if store and workers == 1:
+        # src.main only starts a store server for several workers
+        socket_path = os.path.join(tempfile.mkdtemp(prefix="cluster-benchmark-"), "store.sock")
+        store_process = start_store_server(socket_path)
+    server = start_server(workers, socket_path)
+    roots = [server.pid] + ([store_process.pid] if store_process is not None else [])
+    try:
+        before = cpu_split(roots) if os.path.isdir("/proc") else None
+        rate = asyncio.run(load(requests, concurrency))
+        after = cpu_split(roots) if before is not None else None
+    finally:
+        server.terminate()
+        server.wait()
+        if store_process is not None:
+            store_process.terminate()
+            store_process.wait()
+
+    row = f"{label:>12}: {rate:>7,.0f} req/s"
+    if before is not None and after is not None:
+        store_us = (after[0] - before[0]) / requests * 1e6
+        worker_us = (after[1] - before[1]) / requests * 1e6
+        row += f"  |  CPU per request: workers {worker_us:,.0f} us, store {store_us:,.0f} us"
+        if store_us:
+            row += f"  |  store server limit {1e6 / store_us:,.0f} req/s"
+    print(row)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    # Inherited by the web workers and by store servers started here
+    os.environ.update(NODE_ENV="production", LOG_LEVEL="WARNING")
+    print(f"CPU cores: {os.cpu_count()}")
+    run("in-process", 1, args.requests, args.concurrency, store=False)
+    for workers in args.workers:
+        run(f"{workers} worker(s)", workers, args.requests, args.concurrency, store=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Endpoint benchmark and load-test suite with regression thresholds.
+
+Drives the API either in-process through the ASGI app or over HTTP against
+a local uvicorn server, and measures throughput and p50/p99 latency for
+ingest, get, process and delete, and for list at several store sizes.
+Results can be saved as a JSON baseline; a later run compared against it
+exits with status 1 when a scenario regresses beyond the threshold.
+
+The client asks for uncompressed responses unless ``--accept-encoding`` is
+given, so that runs stay comparable whichever codecs httpx can decode.
+
+Usage:
+    python -m benchmarks.endpoint_benchmark --save-baseline benchmarks/baseline.json
+    python -m benchmarks.endpoint_benchmark --baseline benchmarks/baseline.json
+    python -m benchmarks.endpoint_benchmark --target uvicorn --requests 5000
+    python -m benchmarks.endpoint_benchmark --accept-encoding zstd
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+import httpx
+from src.logger import logger
+
+PREFIX = "/api/v1/data"
+PAYLOAD = {"data": {"sensor": "temperature", "value": 25.5, "unit": "celsius"}}
+PORT = 3902
+# Accept-Encoding sent by default; httpx would otherwise offer every codec it has
+DEFAULT_ACCEPT_ENCODING = "identity"
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), math.ceil(fraction * len(ordered))))
+    return ordered[rank - 1]
+
+
+async def measure(
+    client: httpx.AsyncClient, request: Request, count: int, concurrency: int
+) -> Dict[str, float]:
+    """
+    Send requests from concurrent workers and summarize their latencies.
+
+    Args:
+        client: HTTP client bound to the target
+        request: Sends the i-th request of the scenario
+        count: Number of requests
+        concurrency: Number of requests in flight at once
+
+    Returns:
+        Requests, throughput in req/s, and p50/p99 latency in ms
+
+    Raises:
+        RuntimeError: If a request fails
+    """
+    latencies: List[float] = []
+    counter = iter(range(count))
+
+    async def worker() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            response = await request(client, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.url} returned {response.status_code}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": count,
+        "throughput": round(count / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+async def fill(client: httpx.AsyncClient, total: int, chunk: int = 5000) -> None:
+    """Top the store up to a number of records through the batch endpoint."""
+    stats = (await client.get(f"{PREFIX}/stats")).json()["data"]
+    missing = total - stats["total"]
+    while missing > 0:
+        size = min(chunk, missing)
+        body = "\n".join(json.dumps(PAYLOAD) for _ in range(size))
+        response = await client.post(
+            f"{PREFIX}/batch", content=body, headers={"content-type": "application/x-ndjson"}
+        )
+        response.raise_for_status()
+        missing -= size
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient, requests: int, concurrency: int, store_sizes: Sequence[int]
+) -> Dict[str, Dict[str, float]]:
+    """Run every scenario against a client and return the results by name."""
+    ids: List[str] = []
+
+    async def ingest(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        response = await client.post(PREFIX, json=PAYLOAD)
+        ids.append(response.json()["data"]["id"])
+        return response
+
+    results = {"ingest": await measure(client, ingest, requests, concurrency)}
+    results["get"] = await measure(
+        client, lambda c, i: c.get(f"{PREFIX}/{ids[i]}"), requests, concurrency
+    )
+    results["process"] = await measure(
+        client, lambda c, i: c.post(f"{PREFIX}/{ids[i]}/process"), requests, concurrency
+    )
+    results["delete"] = await measure(
+        client, lambda c, i: c.delete(f"{PREFIX}/{ids[i]}"), requests, concurrency
+    )
+    for size in sorted(store_sizes):
+        await fill(client, size)
+        results[f"list_{size}"] = await measure(
+            client, lambda c, i: c.get(PREFIX, params={"limit": 100}), requests, concurrency
+        )
+    return results
+
+
+async def run_asgi(
+    requests: int, concurrency: int, store_sizes: Sequence[int], accept_encoding: str
+) -> Dict[str, Dict[str, float]]:
+    """Run the scenarios in-process against a fresh ASGI app."""
+    from src.app import create_app
+    from src.data_service import data_service
+
+    transport = httpx.ASGITransport(app=create_app())
+    headers = {"Accept-Encoding": accept_encoding}
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=headers
+        ) as client:
+            return await run_scenarios(client, requests, concurrency, store_sizes)
+    finally:
+        await data_service.shutdown()
+
+
+async def run_uvicorn(
+    requests: int, concurrency: int, store_sizes: Sequence[int], accept_encoding: str
+) -> Dict[str, Dict[str, float]]:
+    """Run the scenarios over HTTP against a local uvicorn server."""
+    env = dict(os.environ, PORT=str(PORT), NODE_ENV="production", LOG_LEVEL="ERROR")
+    server = subprocess.Popen([sys.executable, "-m", "src.main"], env=env)
+    base_url = f"http://127.0.0.1:{PORT}"
+    try:
+        await wait_until_ready(base_url)
+        limits = httpx.Limits(max_connections=concurrency)
+        headers = {"Accept-Encoding": accept_encoding}
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers) as client:
+            return await run_scenarios(client, requests, concurrency, store_sizes)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    """Poll the health endpoint until the server answers."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/v1/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Scenario name -> measurements of this run
+        baseline: Scenario name -> measurements of the baseline run
+        threshold: Allowed relative regression, e.g. 0.2 for 20%
+
+    Returns:
+        A message for every throughput drop or p99 latency rise beyond the
+        threshold; scenarios missing from either side are skipped
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["throughput"] < previous["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput']:,.0f} req/s "
+                f"< baseline {previous['throughput']:,.0f} req/s"
+            )
+        if current["p99_ms"] > previous["p99_ms"] * (1 + threshold):
+            regressions.append(
+                f"{name}: p99 {current['p99_ms']:.2f} ms > baseline {previous['p99_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine, so baselines are only compared on like hardware."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the suite and return the process exit status."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--store-sizes", type=int, nargs="+", default=[1000, 10000, 100000], metavar="N"
+    )
+    parser.add_argument(
+        "--accept-encoding",
+        default=DEFAULT_ACCEPT_ENCODING,
+        help="Accept-Encoding header to send (default: identity)",
+    )
+    parser.add_argument("--baseline", help="baseline JSON file to compare against")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed regression (default: 0.2 = 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    logger.setLevel(logging.ERROR)
+    run = run_asgi if args.target == "asgi" else run_uvicorn
+    results = asyncio.run(
+        run(args.requests, args.concurrency, args.store_sizes, args.accept_encoding)
+    )
+
+    print(f"{'scenario':<14} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['throughput']:>10,.0f} "
+            f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+        )
+
+    if args.save_baseline:
+        document = {
+            "target": args.target,
+            "accept_encoding": args.accept_encoding,
+            "environment": environment(),
+            "results": results,
+        }
+        with open(args.save_baseline, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("target") != args.target:
+            print(f"Warning: baseline was recorded with --target {baseline.get('target')}")
+        recorded_encoding = baseline.get("accept_encoding", DEFAULT_ACCEPT_ENCODING)
+        if recorded_encoding != args.accept_encoding:
+            print(f"Warning: baseline was recorded with --accept-encoding {recorded_encoding}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Memory used per record by the in-memory store, before and after processing.
+
+Compares keeping full Pydantic models in a dict (the previous layout, where
+processing built a validated ProcessedData copy) with MemoryRecordStore's
+slotted compact records, which are processed in place. Payload dicts are
+built before measuring, so the figures show each layout's own overhead plus
+any payload copies it makes.
+
+Usage:
+    python -m benchmarks.memory_benchmark --records 100000
+"""
+
+import argparse
+import asyncio
+import gc
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+from src.storage import MemoryRecordStore
+from src.types import DataRecord, ProcessedData, ProcessingResult
+
+Payload = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def build_payloads(count: int) -> List[Payload]:
+    """Build (data, metadata) pairs shaped like typical sensor readings."""
+    return [
+        ({"sensor": "temperature", "value": 25.5 + i, "unit": "celsius"}, {"source": "bench"})
+        for i in range(count)
+    ]
+
+
+def model_layout(payloads: List[Payload]) -> Tuple[Callable[[], Any], Callable[[Any], None]]:
+    """Return (ingest, process) steps for the previous dict-of-models layout."""
+
+    def ingest() -> Dict[str, Any]:
+        records: Dict[str, Any] = {}
+        for data, metadata in payloads:
+            record = DataRecord(
+                id=str(uuid.uuid4()), timestamp=datetime.utcnow(), data=data, metadata=metadata
+            )
+            records[record.id] = record
+        return records
+
+    def process(records: Dict[str, Any]) -> None:
+        result = ProcessingResult(status="success", message="Data processed successfully")
+        for record_id, record in records.items():
+            records[record_id] = ProcessedData(
+                id=record.id,
+                timestamp=record.timestamp,
+                data=record.data,
+                processed=True,
+                metadata=record.metadata,
+                processingTimestamp=datetime.utcnow(),
+                processingResult=result,
+            )
+
+    return ingest, process
+
+
+def compact_layout(payloads: List[Payload]) -> Tuple[Callable[[], Any], Callable[[Any], None]]:
+    """Return (ingest, process) steps for MemoryRecordStore."""
+
+    def ingest() -> MemoryRecordStore:
+        store = MemoryRecordStore()
+        records = [
+            DataRecord.model_construct(
+                id=str(uuid.uuid4()),
+                timestamp=datetime.utcnow(),
+                data=data,
+                processed=False,
+                metadata=metadata,
+            )
+            for data, metadata in payloads
+        ]
+        asyncio.run(store.put_many(records))
+        return store
+
+    def process(store: MemoryRecordStore) -> None:
+        result = ProcessingResult(status="success", message="Data processed successfully")
+        results = dict.fromkeys(store.records, result)
+        asyncio.run(store.mark_processed(list(store.records), datetime.utcnow(), results))
+
+    return ingest, process
+
+
+def measure(steps: Tuple[Callable[[], Any], Callable[[Any], None]]) -> Tuple[int, int]:
+    """Return bytes retained after ingesting and after processing."""
+    ingest, process = steps
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = ingest()
+    gc.collect()
+    ingested = tracemalloc.get_traced_memory()[0] - baseline
+    process(store)
+    gc.collect()
+    processed = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del store
+    return ingested, processed
+
+
+def main() -> None:
+    """Run the memory benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for name, layout in (("pydantic models", model_layout), ("compact records", compact_layout)):
+        ingested, processed = measure(layout(build_payloads(args.records)))
+        print(
+            f"{name}: {ingested / args.records:,.0f} B/record ingested, "
+            f"{processed / args.records:,.0f} B/record processed"
+        )
+
+
+if __name__ == "__main__":
+    main()
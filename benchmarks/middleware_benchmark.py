@@ -0,0 +1,113 @@
+"""
+Per-request overhead of the logging and error handling middleware.
+
+Compares the ASGI middleware classes in ``src/middleware.py`` with the
+equivalent ``BaseHTTPMiddleware`` functions they replaced, by sending
+sequential requests to a trivial route through each stack in-process.
+
+Usage:
+    python -m benchmarks.middleware_benchmark --requests 2000 --repeats 5
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import Response
+from src.logger import sampled_logger
+from src.middleware import ErrorHandlerMiddleware, RequestLoggerMiddleware
+
+
+def build_app() -> FastAPI:
+    """Create an app with a single trivial route."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> Dict[str, Any]:
+        return {"ok": True}
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    """Create the app with the ASGI middleware classes."""
+    app = build_app()
+    app.add_middleware(RequestLoggerMiddleware)
+    app.add_middleware(ErrorHandlerMiddleware)
+    return app
+
+
+def base_http_app() -> FastAPI:
+    """Create the app with equivalent BaseHTTPMiddleware functions."""
+    app = build_app()
+
+    async def request_logger(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        sampled_logger.info(
+            f"{request.method} {request.url.path}",
+            extra={
+                "status_code": response.status_code,
+                "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            },
+        )
+        return response
+
+    async def error_handler(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        try:
+            return await call_next(request)
+        except Exception as err:
+            return ErrorHandlerMiddleware.error_response(request.scope, err)
+
+    app.middleware("http")(request_logger)
+    app.middleware("http")(error_handler)
+    return app
+
+
+async def requests_per_second(app: FastAPI, requests: int) -> float:
+    """Send sequential requests to an app and return the throughput."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/ping")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return requests / (time.perf_counter() - started)
+
+
+async def run(requests: int, repeats: int) -> Dict[str, float]:
+    """Return the best throughput of each middleware stack over interleaved repeats."""
+    apps = {"BaseHTTPMiddleware": base_http_app(), "ASGI": asgi_app()}
+    best = dict.fromkeys(apps, 0.0)
+    for _ in range(repeats):
+        for name, app in apps.items():
+            best[name] = max(best[name], await requests_per_second(app, requests))
+    return best
+
+
+def main() -> None:
+    """Run the middleware benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # Measure the middleware, not log formatting and output
+    sampled_logger.disabled = True
+    try:
+        best = asyncio.run(run(args.requests, args.repeats))
+    finally:
+        sampled_logger.disabled = False
+
+    for name, rate in best.items():
+        print(f"{name + ':':20} {rate:,.0f} req/s")
+    print(f"{'speedup:':20} {best['ASGI'] / best['BaseHTTPMiddleware']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Serialization cost of 1000-record list pages.
+
+Compares the previous response path (dump every record to a dict, validate
+the result against ``response_model=dict``, then encode with ``json.dumps``)
+with ``FastJSONResponse``, which encodes the models to bytes in one pass.
+
+Usage:
+    python -m benchmarks.serialization_benchmark --records 1000 --rounds 200
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from src.responses import FastJSONResponse
+from src.types import DataRecord, ProcessedData, ProcessingResult
+
+_dict_adapter = TypeAdapter(dict)
+
+
+def build_records(count: int) -> List[DataRecord]:
+    """Build a page of records, half of them processed."""
+    records: List[DataRecord] = []
+    for i in range(count):
+        record = DataRecord(
+            id=str(uuid.uuid4()),
+            timestamp=datetime.utcnow(),
+            data={"sensor": "temperature", "value": 25.5 + i, "unit": "celsius"},
+            metadata={"source": f"sensor-{i % 10:03d}"},
+        )
+        if i % 2:
+            record = ProcessedData(
+                **record.model_dump(exclude={"processed"}),
+                processingTimestamp=datetime.utcnow(),
+                processingResult=ProcessingResult(status="success", message="ok"),
+            )
+        records.append(record)
+    return records
+
+
+def previous_path(records: List[DataRecord], stats: Dict[str, int]) -> bytes:
+    """Render a page the way the routes did with response_model=dict."""
+    content = {
+        "success": True,
+        "data": [record.model_dump(mode="json") for record in records],
+        "pagination": {"limit": len(records), "offset": 0, "total": stats["total"]},
+        "stats": stats,
+    }
+    validated = _dict_adapter.validate_python(content)
+    return JSONResponse(_dict_adapter.dump_python(validated, mode="json")).body
+
+
+def fast_path(records: List[DataRecord], stats: Dict[str, int]) -> bytes:
+    """Render a page with FastJSONResponse."""
+    content = {
+        "success": True,
+        "data": records,
+        "pagination": {"limit": len(records), "offset": 0, "total": stats["total"]},
+        "stats": stats,
+    }
+    return FastJSONResponse(content).body
+
+
+def measure(render: Callable[..., bytes], rounds: int, *args: Any) -> float:
+    """Return the mean milliseconds per call."""
+    render(*args)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        render(*args)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main() -> None:
+    """Run the serialization benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    records = build_records(args.records)
+    stats = {"total": args.records, "processed": args.records // 2, "unprocessed": 0}
+
+    previous = measure(previous_path, args.rounds, records, stats)
+    fast = measure(fast_path, args.rounds, records, stats)
+    print(f"previous path: {previous:.2f} ms/page")
+    print(f"fast path:     {fast:.2f} ms/page")
+    print(f"speedup:       {previous / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
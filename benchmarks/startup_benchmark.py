@@ -0,0 +1,170 @@
+"""
+Cold start time of the application.
+
+Each run starts a fresh interpreter that imports ``src.main``, builds the
+app and serves its first request (GET /api/v1/health) through the ASGI
+interface, and reports the time spent in each phase. The run fails when
+the median import plus first response exceeds the budget, or when a
+module that should only load on demand was imported.
+
+Usage:
+    python -m benchmarks.startup_benchmark --runs 5
+    python -m benchmarks.startup_benchmark --importtime 15
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Import plus first response, in milliseconds
+STARTUP_BUDGET_MS = 3000.0
+
+# Modules the app only loads when a feature that needs them is used
+DEFERRED_MODULES = (
+    "numpy",
+    "multiprocessing",
+    "cProfile",
+    "pstats",
+    "httpx",
+    "brotli",
+    "zstandard",
+)
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+app = src.main.app
+created = time.perf_counter()
+
+async def first_response():
+    messages = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/v1/health", "raw_path": b"",
+        "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+import asyncio
+status = asyncio.run(first_response())
+responded = time.perf_counter()
+print(json.dumps({
+    "status": status,
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_response_ms": (responded - created) * 1000,
+    "total_ms": (responded - started) * 1000,
+    "deferred_loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (
+    DEFERRED_MODULES,
+)
+
+
+def probe_env() -> Dict[str, str]:
+    """Environment for a probe: production settings, no store server, quiet logs."""
+    env = dict(os.environ, NODE_ENV="production", LOG_LEVEL="ERROR")
+    env.pop("STORE_SOCKET", None)
+    # pytest-cov would trace the probe too, skewing its timings and imports
+    for name in [name for name in env if name.startswith("COV_CORE_")]:
+        del env[name]
+    return env
+
+
+def measure_startup() -> Dict[str, float]:
+    """
+    Start a fresh interpreter and time the app's cold start.
+
+    Returns:
+        Milliseconds spent importing src.main, creating the app, serving the
+        first request and in total (excluding interpreter boot), the
+        status of the first response, the whole process's wall time, and
+        the deferred modules that were loaded anyway
+
+    Raises:
+        RuntimeError: If the probe process fails
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], env=probe_env(), capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_ms"] = elapsed
+    return timings
+
+
+def slowest_imports(count: int) -> List[Tuple[str, int]]:
+    """Return the modules with the highest cumulative import time, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main; src.main.app"],
+        env=probe_env(),
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            rows.append((name.strip(), int(cumulative)))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:count]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmark and return the process exit status."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget", type=float, default=STARTUP_BUDGET_MS, help="median total budget in ms"
+    )
+    parser.add_argument(
+        "--importtime", type=int, default=0, metavar="N", help="also list the N slowest imports"
+    )
+    args = parser.parse_args(argv)
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    phases = ("import_ms", "create_app_ms", "first_response_ms", "total_ms", "process_ms")
+    for phase in phases:
+        print(f"{phase:<18} {statistics.median(run[phase] for run in runs):>9.1f}")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative ms):")
+        for name, micros in slowest_imports(args.importtime):
+            print(f"  {micros / 1000:>8.1f}  {name}")
+
+    failed = False
+    total = statistics.median(run["total_ms"] for run in runs)
+    if total > args.budget:
+        print(f"Startup took {total:.0f} ms, over the {args.budget:.0f} ms budget")
+        failed = True
+    loaded = sorted({name for run in runs for name in run["deferred_loaded"]})
+    if loaded:
+        print(f"Deferred modules loaded at startup: {', '.join(loaded)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Write throughput and recovery time of the write-ahead log storage.
+
+Usage:
+    python -m benchmarks.storage_benchmark --records 1000000
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from src.data_service import DataService
+from src.logger import logger
+from src.wal import WriteAheadLog
+
+
+async def write_records(directory: str, records: int, chunk: int, concurrency: int) -> float:
+    """Ingest records through the WAL and return records per second."""
+    service = DataService(WriteAheadLog(directory, snapshot_every=records * 2))
+    items = [({"sensor": "temperature", "value": 25.5, "unit": "celsius"}, {"source": "bench"})]
+
+    started = time.perf_counter()
+    if chunk > 1:
+        for _ in range(records // chunk):
+            await service.ingest_batch(items * chunk)
+    else:
+        for _ in range(records // concurrency):
+            await asyncio.gather(*(service.ingest_data(*items[0]) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    await service.shutdown()
+    return records / elapsed
+
+
+def recover(directory: str) -> float:
+    """Rebuild a service from disk and return the elapsed seconds."""
+    started = time.perf_counter()
+    service = DataService(WriteAheadLog(directory))
+    elapsed = time.perf_counter() - started
+    service.wal.close()
+    return elapsed
+
+
+async def snapshot(directory: str) -> float:
+    """Write a snapshot of the recovered store and return the elapsed seconds."""
+    service = DataService(WriteAheadLog(directory))
+    started = time.perf_counter()
+    service.wal.snapshot_every = 0
+    await service._commit()
+    service.wal._snapshot_thread.join()
+    elapsed = time.perf_counter() - started
+    service.wal.close()
+    return elapsed
+
+
+def main() -> None:
+    """Run the storage benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=1000, help="batch size (1 = POST /data)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        rate = asyncio.run(write_records(directory, args.records, args.chunk, args.concurrency))
+        print(f"write throughput:     {rate:,.0f} records/s")
+        print(f"replay from log:      {recover(directory):.2f} s")
+        print(f"snapshot:             {asyncio.run(snapshot(directory)):.2f} s")
+        print(f"replay from snapshot: {recover(directory):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
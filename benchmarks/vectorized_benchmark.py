@@ -0,0 +1,59 @@
+"""
+Vectorized versus per-record summaries of numeric payloads.
+
+Usage:
+    python -m benchmarks.vectorized_benchmark --records 100000 --readings 16
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+from src import vectorized
+from src.types import DataRecord
+
+
+def make_records(count: int, readings: int) -> list:
+    """Build sensor records with a value and an array of readings."""
+    now = datetime.utcnow()
+    return [
+        DataRecord.model_construct(
+            id=str(i),
+            timestamp=now,
+            data={
+                "sensor": "temperature",
+                "value": random.uniform(-10, 40),
+                "readings": [random.uniform(-10, 40) for _ in range(readings)],
+            },
+            processed=False,
+            metadata=None,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(records: list, use_numpy: bool) -> float:
+    """Return records summarized per second."""
+    vectorized.HAS_NUMPY = use_numpy
+    started = time.perf_counter()
+    vectorized.summarize_numeric(records)
+    return len(records) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--readings", type=int, default=16)
+    args = parser.parse_args()
+
+    records = make_records(args.records, args.readings)
+    print(f"pure Python: {measure(records, False):,.0f} records/s")
+    if not vectorized.HAS_NUMPY:
+        print("numpy is not installed; install it to compare the vectorized path")
+        return
+    print(f"numpy:       {measure(records, True):,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
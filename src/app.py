@@ -6,9 +6,17 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.config import config
-from src.middleware import error_handler, request_logger
+from src.middleware import (
+    CompressionMiddleware,
+    ErrorHandlerMiddleware,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    RequestLoggerMiddleware,
+)
 from src.health_routes import router as health_router
 from src.data_routes import router as data_router
+from src.metrics_routes import router as metrics_router
+from src.data_service import data_service
 
 
 def create_app() -> FastAPI:
@@ -18,13 +26,20 @@ def create_app() -> FastAPI:
     Returns:
         Configured FastAPI application
     """
+    docs_enabled = config.docs_enabled
+    if docs_enabled is None:
+        docs_enabled = config.node_env != "production"
+    docs_prefix = f"{config.api_prefix}/{config.api_version}" if docs_enabled else None
+
+    # FastAPI builds the OpenAPI schema on the first request for it, so the
+    # docs add nothing to startup; without a prefix they are not routed at all
     app = FastAPI(
         title="DO Practice API",
         description="Production-ready REST API service for data ingestion and processing",
         version="1.0.0",
-        docs_url=f"{config.api_prefix}/{config.api_version}/docs",
-        redoc_url=f"{config.api_prefix}/{config.api_version}/redoc",
-        openapi_url=f"{config.api_prefix}/{config.api_version}/openapi.json",
+        docs_url=docs_prefix and f"{docs_prefix}/docs",
+        redoc_url=docs_prefix and f"{docs_prefix}/redoc",
+        openapi_url=docs_prefix and f"{docs_prefix}/openapi.json",
     )
 
     # CORS middleware
@@ -37,18 +52,46 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Custom middleware
-    app.middleware("http")(request_logger)
-    app.middleware("http")(error_handler)
+    # Custom middleware (the last one added runs first). The profiler wraps
+    # error handling so failed requests still get a report, and is only
+    # installed when enabled, so it costs nothing otherwise. Compression
+    # runs inside the metrics middleware so its time counts toward latency.
+    app.add_middleware(RequestLoggerMiddleware)
+    app.add_middleware(ErrorHandlerMiddleware)
+    if config.profile_enabled:
+        app.add_middleware(
+            ProfilerMiddleware,
+            directory=config.profile_dir,
+            sample_rate=config.profile_sample_rate,
+        )
+    if config.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            encodings=[
+                encoding.strip()
+                for encoding in config.compression_encodings.split(",")
+                if encoding.strip()
+            ],
+            min_bytes=config.compression_min_bytes,
+            thread_min_bytes=config.compression_thread_min_bytes,
+            max_request_bytes=config.compression_max_request_bytes,
+        )
+    app.add_middleware(MetricsMiddleware)
 
     # Register routes
     app.include_router(
         health_router, prefix=f"{config.api_prefix}/{config.api_version}", tags=["health"]
     )
+    app.include_router(metrics_router, tags=["metrics"])
     app.include_router(
         data_router, prefix=f"{config.api_prefix}/{config.api_version}/data", tags=["data"]
     )
 
+    # Index records already in the store on startup; stop background
+    # workers and flush durable storage on shutdown
+    app.add_event_handler("startup", data_service.start)
+    app.add_event_handler("shutdown", data_service.shutdown)
+
     # 404 handler
     @app.exception_handler(404)
     async def not_found_handler(request: Request, exc):
@@ -0,0 +1,153 @@
+"""
+Incremental parsing of bulk ingestion request bodies.
+"""
+
+import codecs
+import json
+from typing import Any, AsyncIterator, Optional, Tuple
+
+# A parsed batch item: (1-based position in the batch, value, error message)
+BatchItem = Tuple[int, Any, Optional[str]]
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_item_bytes: int
+) -> AsyncIterator[BatchItem]:
+    """
+    Parse a newline-delimited JSON body as it streams in.
+
+    Malformed and oversized lines are reported and skipped; parsing
+    continues with the next line. The rest of an oversized line is
+    discarded as it arrives instead of being buffered.
+
+    Args:
+        chunks: Raw body chunks
+        max_item_bytes: Maximum size of a single line
+
+    Yields:
+        Batch items, one per non-empty line
+    """
+    too_long = f"Line exceeds {max_item_bytes} bytes"
+    buffer = b""
+    line_no = 0
+    # Set while discarding the rest of a line already reported as too long
+    skipping = False
+
+    async for chunk in chunks:
+        if skipping:
+            end = chunk.find(b"\n")
+            if end < 0:
+                continue
+            chunk = chunk[end + 1 :]
+            skipping = False
+
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if len(line) > max_item_bytes:
+                yield line_no, None, too_long
+            elif line.strip():
+                yield _parse_line(line_no, line)
+
+        if len(buffer) > max_item_bytes:
+            line_no += 1
+            yield line_no, None, too_long
+            buffer = b""
+            skipping = True
+
+    if buffer.strip():
+        yield _parse_line(line_no + 1, buffer)
+
+
+async def iter_json_array(
+    chunks: AsyncIterator[bytes], max_item_bytes: int
+) -> AsyncIterator[BatchItem]:
+    """
+    Parse a JSON array body element by element as it streams in.
+
+    A syntax error makes the rest of the array unreadable, so it is
+    reported once and parsing stops.
+
+    Args:
+        chunks: Raw body chunks
+        max_item_bytes: Maximum size of a single array element
+
+    Yields:
+        Batch items, one per array element
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    iterator = chunks.__aiter__()
+    buffer = ""
+    pos = 0
+    eof = False
+    item_no = 0
+    state = "start"  # start -> value -> separator -> value ... -> done
+
+    async def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            eof = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    while state != "done":
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos >= len(buffer):
+            if not await fill():
+                yield item_no + 1, None, "Unexpected end of JSON array"
+                return
+            continue
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                yield 1, None, "Expected a JSON array"
+                return
+            pos += 1
+            state = "first"
+        elif state == "first" and char == "]":
+            state = "done"
+        elif state in ("first", "value"):
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as err:
+                if not eof and len(buffer) - pos <= max_item_bytes:
+                    await fill()
+                    continue
+                yield item_no + 1, None, f"Invalid JSON: {err.msg}"
+                return
+            if end == len(buffer) and not eof:
+                # The value may continue in the next chunk (e.g. a number)
+                await fill()
+                continue
+            item_no += 1
+            pos = end
+            state = "separator"
+            yield item_no, value, None
+        else:
+            if char == ",":
+                state = "value"
+            elif char == "]":
+                state = "done"
+            else:
+                yield item_no + 1, None, "Expected ',' or ']' in JSON array"
+                return
+            pos += 1
+
+
+def _parse_line(line_no: int, line: bytes) -> BatchItem:
+    """Parse a single NDJSON line."""
+    try:
+        return line_no, json.loads(line), None
+    except ValueError as err:
+        return line_no, None, f"Invalid JSON: {err}"
@@ -0,0 +1,267 @@
+"""
+Content codings for compressed responses and request bodies.
+
+gzip is always available. br and zstd need the optional brotli and
+zstandard packages; they are detected without being imported, and only
+loaded when a body is first encoded or decoded with them.
+"""
+
+import importlib
+import importlib.util
+import zlib
+from typing import Dict, Iterable, List, Optional, Protocol
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+# Input fed to the zstd decoder per step when output is limited. A zstd
+# block needs at least 4 bytes and decodes to at most 128 KiB, so a step
+# overshoots the limit by at most 1 MiB.
+ZSTD_DECODE_STEP = 32
+
+# Coding -> optional package it needs
+_PACKAGES: Dict[str, Optional[str]] = {"gzip": None, "br": "brotli", "zstd": "zstandard"}
+
+
+class Compressor(Protocol):
+    """Incremental encoder for one body."""
+
+    def compress(self, data: bytes) -> bytes:
+        """Encode a chunk, returning whatever output is ready."""
+
+    def flush(self) -> bytes:
+        """Finish the body and return the remaining output."""
+
+
+class Decompressor(Protocol):
+    """
+    Incremental decoder for one body.
+
+    Follows ``bz2.BZ2Decompressor``: output can be limited per call, and
+    input that would exceed the limit is kept until it is asked for by
+    later calls with empty data.
+    """
+
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        """Decode a chunk, returning about max_length bytes at most (-1 = no limit)."""
+
+    @property
+    def needs_input(self) -> bool:
+        """Whether all output of the data given so far has been returned."""
+
+    @property
+    def eof(self) -> bool:
+        """Whether the end of the encoded body was reached."""
+
+
+def is_available(encoding: str) -> bool:
+    """Return True if a content coding is known and its package is installed."""
+    if encoding not in _PACKAGES:
+        return False
+    package = _PACKAGES[encoding]
+    return package is None or importlib.util.find_spec(package) is not None
+
+
+def available_encodings(preferred: Iterable[str]) -> List[str]:
+    """
+    Filter a preference list down to the codings that can be used.
+
+    Args:
+        preferred: Content codings in order of preference
+
+    Returns:
+        The available codings, in the same order
+    """
+    return [encoding for encoding in preferred if is_available(encoding)]
+
+
+def negotiate(accept_encoding: str, encodings: Iterable[str]) -> Optional[str]:
+    """
+    Pick a content coding for a response from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Value of the request's Accept-Encoding header
+        encodings: Codings the server offers, in order of preference
+
+    Returns:
+        The coding with the highest q-value, ties broken by the server's
+        preference, or None if the client accepts none of them
+    """
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressor(encoding: str, size: Optional[int] = None) -> Compressor:
+    """
+    Create an encoder for a body.
+
+    Args:
+        encoding: Available content coding
+        size: Length of the whole body when known up front, which lets
+            zstd size its window and tables to it
+
+    Returns:
+        Incremental encoder
+    """
+    if encoding == "gzip":
+        # wbits=31 selects the gzip container format
+        return zlib.compressobj(GZIP_LEVEL, wbits=31)
+    if encoding == "br":
+        return _BrotliCompressor()
+    zstandard = importlib.import_module("zstandard")
+    encoder: Compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj(
+        -1 if size is None else size
+    )
+    return encoder
+
+
+def decompressor(encoding: str) -> Decompressor:
+    """
+    Create a decoder for a body.
+
+    Args:
+        encoding: Available content coding
+
+    Returns:
+        Incremental decoder
+    """
+    if encoding == "gzip":
+        return _GzipDecompressor()
+    if encoding == "br":
+        return _BrotliDecompressor()
+    return _ZstdDecompressor()
+
+
+class _GzipDecompressor:
+    """gzip decoder keeping input beyond the output limit."""
+
+    def __init__(self):
+        """Start a new body."""
+        # wbits=31 selects the gzip container format
+        self._decompressor = zlib.decompressobj(wbits=31)
+
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        """Decode a chunk, returning at most max_length bytes (-1 = no limit)."""
+        tail = self._decompressor.unconsumed_tail
+        output: bytes = self._decompressor.decompress(
+            tail + data if tail else data, max(max_length, 0)
+        )
+        return output
+
+    @property
+    def needs_input(self) -> bool:
+        """Whether all output of the data given so far has been returned."""
+        return not self._decompressor.unconsumed_tail
+
+    @property
+    def eof(self) -> bool:
+        """Whether the end of the encoded body was reached."""
+        finished: bool = self._decompressor.eof
+        return finished
+
+
+class _BrotliCompressor:
+    """Brotli encoder with the zlib-style interface."""
+
+    def __init__(self):
+        """Start a new body."""
+        self._compressor = importlib.import_module("brotli").Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        """Encode a chunk, returning whatever output is ready."""
+        output: bytes = self._compressor.process(data)
+        return output
+
+    def flush(self) -> bytes:
+        """Finish the body and return the remaining output."""
+        output: bytes = self._compressor.finish()
+        return output
+
+
+class _BrotliDecompressor:
+    """Brotli decoder with the zlib-style interface."""
+
+    def __init__(self):
+        """Start a new body."""
+        self._decompressor = importlib.import_module("brotli").Decompressor()
+        self._pending = False
+
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        """Decode a chunk, returning about max_length bytes at most (-1 = no limit)."""
+        if max_length < 0:
+            output: bytes = self._decompressor.process(data)
+            return output
+        # The decoder keeps the input and stops once its output buffer
+        # reaches the limit; a full buffer means more output may be pending
+        output = self._decompressor.process(data, output_buffer_limit=max_length)
+        self._pending = len(output) >= max_length and not self.eof
+        return output
+
+    @property
+    def needs_input(self) -> bool:
+        """Whether all output of the data given so far has been returned."""
+        return not self._pending
+
+    @property
+    def eof(self) -> bool:
+        """Whether the end of the encoded body was reached."""
+        finished: bool = self._decompressor.is_finished()
+        return finished
+
+
+class _ZstdDecompressor:
+    """zstd decoder that can stop between small steps of input."""
+
+    def __init__(self):
+        """Start a new body."""
+        zstandard = importlib.import_module("zstandard")
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        self._tail = b""
+
+    def decompress(self, data: bytes, max_length: int = -1) -> bytes:
+        """Decode a chunk, returning about max_length bytes at most (-1 = no limit)."""
+        data = self._tail + data if self._tail else data
+        if max_length < 0:
+            self._tail = b""
+            output: bytes = self._decompressor.decompress(data)
+            return output
+
+        # The decoder has no output limit, so it is fed a few bytes at a time
+        parts: List[bytes] = []
+        size = pos = 0
+        while pos < len(data) and size < max_length and not self.eof:
+            part: bytes = self._decompressor.decompress(data[pos : pos + ZSTD_DECODE_STEP])
+            parts.append(part)
+            size += len(part)
+            pos += ZSTD_DECODE_STEP
+        # Like gzip, data after the end of the body is ignored
+        self._tail = b"" if self.eof else data[pos:]
+        return b"".join(parts)
+
+    @property
+    def needs_input(self) -> bool:
+        """Whether all output of the data given so far has been returned."""
+        return not self._tail
+
+    @property
+    def eof(self) -> bool:
+        """Whether the end of the encoded body was reached."""
+        finished: bool = self._decompressor.eof
+        return finished
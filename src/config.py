@@ -2,7 +2,7 @@
 Configuration management for the application.
 """
 
-from typing import Literal
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,13 +16,108 @@ class Settings(BaseSettings):
     # Server settings
     port: int = 3000
     node_env: str = "development"
+    # Number of web worker processes; above 1, records are kept by a
+    # separate store server process that the workers reach over store_socket
+    web_workers: int = 1
+    store_socket: Optional[str] = None
 
     # API settings
     api_version: str = "v1"
     api_prefix: str = "/api"
+    # Serve Swagger UI, ReDoc and openapi.json; unset means everywhere but
+    # production. The schema is generated on the first docs request.
+    docs_enabled: Optional[bool] = None
+
+    # Bulk ingestion settings
+    batch_chunk_size: int = 1000
+    batch_max_item_bytes: int = 1024 * 1024
+
+    # Records ingested with identical data or metadata share one stored
+    # copy of it (memory backend only). POST /data requests carrying an
+    # Idempotency-Key header are remembered for idempotency_key_ttl_seconds
+    # (0 = until evicted), up to idempotency_max_keys keys.
+    dedup_payloads: bool = False
+    idempotency_key_ttl_seconds: float = 24 * 3600
+    idempotency_max_keys: int = 100_000
+
+    # Compression of JSON, NDJSON and text responses of compression_min_bytes
+    # or more, negotiated through Accept-Encoding in compression_encodings
+    # order (zstd and br only when the zstandard and brotli packages are
+    # installed). Request bodies with a Content-Encoding are decoded, up to
+    # compression_max_request_bytes once decoded (0 = unlimited). Chunks of
+    # compression_thread_min_bytes or more are handled in a worker thread.
+    compression_enabled: bool = True
+    compression_encodings: str = "zstd,br,gzip"
+    compression_min_bytes: int = 1024
+    compression_thread_min_bytes: int = 64 * 1024
+    compression_max_request_bytes: int = 32 * 1024 * 1024
+
+    # Serialized bodies of GET /data and GET /data/{id} responses, reused
+    # while the record or store version is unchanged (0 entries = disabled)
+    response_cache_entries: int = 10_000
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Export settings
+    export_batch_size: int = 500
+
+    # Background processing settings
+    process_workers: int = 4
+    process_chunk_size: int = 100
+    process_job_retention: int = 1000
+
+    # Processors run for records whose processor_metadata_key field names a
+    # registered processor. Extra processors are comma-separated
+    # name=package.module:function entries. They run in a pool of
+    # processor_pool_size processes (0 = one per CPU core).
+    processor_metadata_key: str = "type"
+    processors: str = ""
+    processor_pool_size: int = 0
+
+    # Record store settings
+    storage_backend: Literal["memory", "sqlite"] = "memory"
+    sqlite_path: str = "data.db"
+    sqlite_pool_size: int = 4
+
+    # Memory limits for the memory backend (0 = unlimited). Least recently
+    # used records over the limits are spilled to spill_path, or dropped
+    # when it is unset.
+    memory_max_records: int = 0
+    memory_max_bytes: int = 0
+    record_ttl_seconds: float = 0.0
+    spill_path: Optional[str] = None
+    # Locked shards of the unlimited memory backend. Opt-in for sharing the
+    # store with worker threads; the default single dict is unlocked and
+    # confined to the event loop. Ignored when memory limits are set.
+    memory_shards: int = 1
+
+    # Comma-separated metadata keys to maintain hash indexes on
+    indexed_metadata_keys: str = ""
+
+    # Durable storage settings for the memory backend (disabled when storage_dir is unset)
+    storage_dir: Optional[str] = None
+    wal_fsync_interval_ms: float = 5.0
+    wal_sync_commits: bool = True
+    snapshot_every_ops: int = 100_000
 
     # Logging settings
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    # "auto" writes JSON when node_env is production and colored text otherwise
+    log_format: Literal["auto", "json", "console"] = "auto"
+    # Write logs from a background thread through a bounded queue
+    log_async: bool = True
+    log_queue_size: int = 10_000
+    # Per-request lines: comma-separated LEVEL=fraction sample rates (e.g.
+    # "INFO=0.1") and a cap on lines per second (0 = no limit)
+    log_sample_rates: str = ""
+    log_rate_limit_per_second: float = 0.0
+
+    # Request profiling, off unless profile_enabled. Requests with an
+    # X-Profile header, plus a profile_sample_rate fraction of all requests,
+    # run under cProfile and are written to profile_dir ("X-Profile: inline"
+    # returns the report in the response instead).
+    profile_enabled: bool = False
+    profile_sample_rate: float = 0.0
+    profile_dir: str = "profiles"
 
     # CORS settings
     cors_origin: str = "*"
@@ -2,34 +2,343 @@
 Data management endpoints.
 """
 
-from fastapi import APIRouter, Query, status
-from src.types import IngestDataRequest
+import zlib
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from pydantic import ValidationError
+from src.batch_parser import iter_json_array, iter_ndjson
+from src.config import config
+from src.types import IngestDataRequest, ProcessJobRequest, RecordFilter
 from src.data_service import data_service
 from src.exceptions import AppError
+from src.metrics import RESPONSE_CACHE
+from src.response_cache import response_cache
+from src.responses import FastJSONResponse
 
-router = APIRouter()
+METADATA_FILTER_PREFIX = "meta."
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
 
+router = APIRouter(default_response_class=FastJSONResponse)
 
-@router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def ingest_data(request: IngestDataRequest):
+
+def record_filter(
+    request: Request,
+    processed: Optional[bool] = Query(default=None, description="Filter by processed flag"),
+    since: Optional[datetime] = Query(default=None, description="Inclusive lower time bound"),
+    until: Optional[datetime] = Query(default=None, description="Inclusive upper time bound"),
+    time_field: Literal["timestamp", "processingTimestamp"] = Query(
+        default="timestamp", description="Timestamp that since/until apply to"
+    ),
+) -> RecordFilter:
+    """
+    Build record filters from query parameters.
+
+    Metadata filters are passed as ``meta.<key>=<value>`` query parameters
+    and must target indexed metadata keys.
+
+    Args:
+        request: Incoming request, used to read metadata filters
+        processed: Only match records with this processed flag
+        since: Only match records at or after this time
+        until: Only match records at or before this time
+        time_field: Timestamp that since/until apply to
+
+    Returns:
+        Record filters
+    """
+    metadata = {
+        key[len(METADATA_FILTER_PREFIX) :]: value
+        for key, value in request.query_params.items()
+        if key.startswith(METADATA_FILTER_PREFIX)
+    }
+    return RecordFilter(
+        metadata=metadata, processed=processed, since=since, until=until, time_field=time_field
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check a request's If-None-Match header against an ETag.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the header lists the ETag or is "*" (weak comparison)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+async def conditional_response(
+    request: Request,
+    key: Hashable,
+    load: Callable[[Optional[str]], Awaitable[Tuple[str, Optional[bytes]]]],
+) -> Response:
+    """
+    Build a JSON response tagged with an ETag for a version of the data.
+
+    ``load`` is given the version the response cache holds a body at and
+    returns the current version with the rendered body, or with None when
+    the cached body is still current, so one call to the data service
+    answers the request. Returns 304 Not Modified when the client already
+    has the current version; otherwise the body is served from the cache,
+    or cached under the version after being rendered.
+
+    Args:
+        request: Incoming request
+        key: Response cache key
+        load: Loads the current version and, unless it is the given one, the body
+
+    Returns:
+        304 response or JSON response with the body
+    """
+    version, body = await load(response_cache.version(key))
+    headers = {"ETag": f'W/"{version}"', "Cache-Control": "no-cache"}
+    if etag_matches(request, headers["ETag"]):
+        RESPONSE_CACHE.inc("not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cached = response_cache.get(key, version)
+    if cached is not None:
+        RESPONSE_CACHE.inc("hit")
+        body = cached
+    else:
+        RESPONSE_CACHE.inc("miss")
+        if body is None:
+            # The cached body was replaced after its version was read
+            version, body = await load(None)
+            headers["ETag"] = f'W/"{version}"'
+        assert body is not None
+        response_cache.put(key, version, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def ingest_error(item: IngestDataRequest) -> Optional[str]:
+    """Return why an ingestion request cannot be stored, or None if it can."""
+    if not item.data or not isinstance(item.data, dict):
+        return "Invalid data: data must be an object"
+    return None
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def ingest_data(
+    request: IngestDataRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+):
     """
     Ingest new data.
 
+    A request repeating the Idempotency-Key of an earlier one gets the
+    record that request created, with status 200 and an
+    ``Idempotent-Replayed: true`` header, instead of creating another.
+
     Args:
         request: Data ingestion request
+        idempotency_key: Optional client-chosen key identifying the request
 
     Returns:
         Success response with created record
     """
-    if not request.data or not isinstance(request.data, dict):
-        raise AppError(400, "Invalid data: data must be an object")
+    error = ingest_error(request)
+    if error is not None:
+        raise AppError(400, error)
+
+    if idempotency_key is None:
+        body = await data_service.ingest_data_json(request.data, request.metadata)
+        return Response(
+            b'{"success":true,"data":' + body + b"}",
+            status.HTTP_201_CREATED,
+            media_type="application/json",
+        )
+
+    if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise AppError(
+            400, f"Invalid Idempotency-Key: must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+        )
+    try:
+        record, replayed = await data_service.ingest_idempotent(
+            idempotency_key, request.data, request.metadata
+        )
+    except ValueError as e:
+        raise AppError(422, str(e))
+
+    if replayed:
+        return FastJSONResponse(
+            {"success": True, "data": record}, headers={"Idempotent-Replayed": "true"}
+        )
+    return FastJSONResponse({"success": True, "data": record}, status.HTTP_201_CREATED)
+
+
+@router.post("/batch", status_code=status.HTTP_201_CREATED)
+async def ingest_batch(request: Request):
+    """
+    Ingest many records from a JSON array or an NDJSON body.
+
+    The body is parsed as it streams in and valid records are stored in
+    chunks, so the whole payload is never held in memory. Each item must
+    be a valid POST /data request body; invalid items are reported per line.
+
+    Args:
+        request: Incoming request with a JSON array or NDJSON body
+
+    Returns:
+        Success response with created ids and per-item errors
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parse = iter_ndjson if content_type in NDJSON_MEDIA_TYPES else iter_json_array
+
+    ids: List[str] = []
+    errors: List[Dict[str, Any]] = []
+    pending: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = []
+
+    async for line, value, error in parse(request.stream(), config.batch_max_item_bytes):
+        if error is None:
+            try:
+                item = IngestDataRequest.model_validate(value)
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}"
+                    for err in e.errors()
+                )
+            else:
+                error = ingest_error(item)
+        if error is not None:
+            errors.append({"line": line, "message": error})
+            continue
+
+        pending.append((item.data, item.metadata))
+        if len(pending) >= config.batch_chunk_size:
+            ids.extend(record.id for record in await data_service.ingest_batch(pending))
+            pending = []
+
+    if pending:
+        ids.extend(record.id for record in await data_service.ingest_batch(pending))
+
+    if not ids and not errors:
+        raise AppError(400, "Invalid batch: body contains no records")
+
+    return FastJSONResponse(
+        {
+            "success": True,
+            "data": {"ids": ids, "accepted": len(ids), "rejected": len(errors), "errors": errors},
+        },
+        status.HTTP_201_CREATED,
+    )
+
+
+@router.post("/process", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_processing(request: ProcessJobRequest):
+    """
+    Enqueue records for background processing.
+
+    Args:
+        request: IDs to process, or a flag to process all unprocessed records
+
+    Returns:
+        Success response with the created job
+    """
+    if not request.ids and not request.all_unprocessed:
+        raise AppError(400, "Invalid request: provide ids or set all_unprocessed")
+
+    job = await data_service.enqueue_processing(
+        request.ids, request.all_unprocessed, request.vectorized
+    )
 
-    record = await data_service.ingest_data(request.data, request.metadata)
+    return FastJSONResponse({"success": True, "data": job}, status.HTTP_202_ACCEPTED)
 
-    return {"success": True, "data": record.model_dump(mode="json")}
 
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Get the status of a background processing job.
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        Success response with job progress and queue statistics
+    """
+    job = await data_service.get_job(job_id)
+
+    if not job:
+        raise AppError(404, f"Job with id {job_id} not found")
+
+    return FastJSONResponse(
+        {"success": True, "data": job, "queue": await data_service.get_queue_stats()}
+    )
+
+
+@router.get("/export")
+async def export_data(
+    gzip: bool = Query(default=False, description="Compress the export with gzip"),
+    filters: RecordFilter = Depends(record_filter),
+):
+    """
+    Export records as newline-delimited JSON.
 
-@router.post("/{record_id}/process", response_model=dict)
+    Records are read from the store one page at a time and written to the
+    response as they are serialized, so memory use does not grow with the
+    size of the export.
+
+    Args:
+        gzip: Compress the response body with gzip
+        filters: Metadata, processed flag and time range filters
+
+    Returns:
+        Streaming NDJSON response, one record per line
+    """
+    try:
+        await data_service.validate_filter(filters)
+    except ValueError as e:
+        raise AppError(400, str(e))
+
+    headers = {"Content-Disposition": 'attachment; filename="export.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        _export_lines(filters, gzip), media_type="application/x-ndjson", headers=headers
+    )
+
+
+async def _export_lines(filters: RecordFilter, compress: bool) -> AsyncIterator[bytes]:
+    """Serialize matching records to NDJSON chunks, one chunk per page."""
+    # wbits=31 selects the gzip container format
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    async for records in data_service.iter_records(filters, config.export_batch_size):
+        chunk = b"".join(record.model_dump_json().encode() + b"\n" for record in records)
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+            if not chunk:
+                continue
+        yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+@router.post("/{record_id}/process")
 async def process_data(record_id: str):
     """
     Process a data record.
@@ -42,59 +351,119 @@ async def process_data(record_id: str):
     """
     try:
         processed_record = await data_service.process_data(record_id)
+        response_cache.invalidate(("record", record_id))
 
-        return {"success": True, "data": processed_record.model_dump(mode="json")}
+        return FastJSONResponse({"success": True, "data": processed_record})
     except ValueError as e:
         if "not found" in str(e):
             raise AppError(404, str(e))
         raise
 
 
-@router.get("/{record_id}", response_model=dict)
-async def get_data(record_id: str):
+@router.get("/stats")
+async def get_stats():
+    """
+    Get statistics about stored data.
+
+    Returns:
+        Success response with counts, byte totals and metadata key breakdown
+    """
+    stats = await data_service.get_detailed_stats()
+    stats["response_cache"] = response_cache.get_stats()
+    return FastJSONResponse({"success": True, "data": stats})
+
+
+@router.get("/{record_id}")
+async def get_data(record_id: str, request: Request):
     """
     Get a specific data record.
 
+    The response carries an ETag of the record's version; a request whose
+    If-None-Match header matches it gets 304 Not Modified.
+
     Args:
         record_id: ID of the record to retrieve
+        request: Incoming request, used for conditional headers
 
     Returns:
         Success response with the record
     """
-    record = await data_service.get_data(record_id)
+    key = ("record", record_id)
 
-    if not record:
-        raise AppError(404, f"Record with id {record_id} not found")
+    async def load(known_version: Optional[str]) -> Tuple[str, Optional[bytes]]:
+        found = await data_service.get_record_json(record_id, known_version)
+        if found is None:
+            # The record may have expired or been evicted since it was cached
+            response_cache.invalidate(key)
+            raise AppError(404, f"Record with id {record_id} not found")
+        version, record = found
+        if record is None:
+            return version, None
+        return version, b'{"success":true,"data":' + record + b"}"
 
-    return {"success": True, "data": record.model_dump(mode="json")}
+    return await conditional_response(request, key, load)
 
 
-@router.get("", response_model=dict)
+@router.get("")
 async def get_all_data(
-    limit: int = Query(default=100, ge=1, le=1000), offset: int = Query(default=0, ge=0)
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="Cursor from a previous page"),
+    filters: RecordFilter = Depends(record_filter),
 ):
     """
     Get all data records with pagination.
 
+    The response carries an ETag of the store's version, so any change to
+    the store changes it; a matching If-None-Match header gets 304.
+
     Args:
+        request: Incoming request, used for conditional headers
         limit: Maximum number of records to return
         offset: Number of records to skip
+        cursor: Opaque cursor returned as next_cursor by a previous page
+        filters: Metadata, processed flag and time range filters
 
     Returns:
         Success response with records and pagination info
     """
-    records = await data_service.get_all_data(limit, offset)
-    stats = data_service.get_stats()
 
-    return {
-        "success": True,
-        "data": [record.model_dump(mode="json") for record in records],
-        "pagination": {"limit": limit, "offset": offset, "total": stats["total"]},
-        "stats": stats,
-    }
+    async def load(known_version: Optional[str]) -> Tuple[str, Optional[bytes]]:
+        # The query is validated before the version is compared, so that a
+        # bad query cannot be answered with 304
+        try:
+            version, page = await data_service.get_page_json(
+                limit, offset, cursor, filters, known_version
+            )
+        except ValueError as e:
+            raise AppError(400, str(e))
+        if page is None:
+            return version, None
+        records, next_cursor, stats = page
+        pagination = {
+            "limit": limit,
+            "offset": offset,
+            "total": stats["total"],
+            "next_cursor": next_cursor,
+        }
+        body = b"".join(
+            (
+                b'{"success":true,"data":',
+                records,
+                b',"pagination":',
+                to_json(pagination),
+                b',"stats":',
+                to_json(stats),
+                b"}",
+            )
+        )
+        return version, body
+
+    return await conditional_response(request, ("list", request.url.query), load)
 
 
-@router.delete("/{record_id}", response_model=dict)
+@router.delete("/{record_id}")
 async def delete_data(record_id: str):
     """
     Delete a data record.
@@ -106,8 +475,11 @@ async def delete_data(record_id: str):
         Success response
     """
     deleted = await data_service.delete_data(record_id)
+    response_cache.invalidate(("record", record_id))
 
     if not deleted:
         raise AppError(404, f"Record with id {record_id} not found")
 
-    return {"success": True, "message": f"Record with id {record_id} deleted successfully"}
+    return FastJSONResponse(
+        {"success": True, "message": f"Record with id {record_id} deleted successfully"}
+    )
@@ -2,19 +2,168 @@
 Data service for managing data records.
 """
 
+import asyncio
+import base64
+import binascii
+import gc
+import json
+import os
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
-from src.types import DataRecord, ProcessedData, ProcessingResult
-from src.logger import logger
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Any,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    MutableMapping,
+    Optional,
+    List,
+    Tuple,
+    Union,
+)
+from pydantic_core import to_json
+from src.config import config
+from src.dedup import IdempotencyKeys, PayloadInterner, payload_digest
+from src.indexes import OrderedIndex, TimeIndex, TimeKey
+from src.types import DataRecord, ProcessedData, ProcessingJob, ProcessingResult, RecordFilter
+from src.logger import logger, sampled_logger
+from src.metrics import RECORD_COUNTERS, RECORDS_DELETED, RECORDS_INGESTED, RECORDS_PROCESSED
+from src.processors import ProcessorPipeline, load_processors
+from src.vectorized import PROCESSOR_NAME, summarize_numeric
+from src.storage import CompactRecord, MemoryRecordStore, RecordStore, SQLiteRecordStore
+from src.wal import OP_DELETE, OP_INGEST, OP_PROCESS, OP_STORED, WriteAheadLog
+
+if TYPE_CHECKING:
+    from src.store_client import RemoteDataService
 
 
 class DataService:
     """Service for managing data records."""
 
-    def __init__(self):
-        """Initialize the data service."""
-        self.data_store: Dict[str, Union[DataRecord, ProcessedData]] = {}
+    def __init__(
+        self,
+        wal: Optional[WriteAheadLog] = None,
+        store: Optional[RecordStore] = None,
+        indexed_metadata_keys: Iterable[str] = (),
+        pipeline: Optional[ProcessorPipeline] = None,
+        dedup_payloads: bool = False,
+    ):
+        """
+        Initialize the data service.
+
+        Args:
+            wal: Optional write-ahead log; when given, the store is rebuilt
+                from it and every mutation, including records dropped by
+                eviction, is logged to it
+            store: Record storage backend, an in-memory dict by default
+            indexed_metadata_keys: Metadata keys to maintain hash indexes on
+            pipeline: Processor pipeline run on records when they are
+                processed, the registered processors by default
+            dedup_payloads: Share one copy of identical data and metadata
+                payloads between records; only used with the in-memory store
+
+        Raises:
+            ValueError: If a write-ahead log is combined with a store other
+                than the in-memory one, or with one that spills to disk
+        """
+        self.store = store if store is not None else MemoryRecordStore()
+        self.pipeline = pipeline if pipeline is not None else ProcessorPipeline()
+        if wal is not None and not isinstance(self.store, MemoryRecordStore):
+            raise ValueError("A write-ahead log can only be used with the in-memory store")
+        if isinstance(self.store, MemoryRecordStore):
+            if wal is not None and self.store.spill is not None:
+                raise ValueError("A write-ahead log cannot be combined with spilling to disk")
+            self.store.on_drop = self._drop_evicted
+
+        # Shared payloads are never copied again, so they must not be
+        # mutated in place; nothing in the service does.
+        self._interner: Optional[PayloadInterner] = None
+        if dedup_payloads and isinstance(self.store, MemoryRecordStore):
+            self._interner = PayloadInterner()
+
+        # Idempotency keys of completed ingests, and of those still running:
+        # key -> (request digest, future resolved with the record)
+        self._idempotency_keys = IdempotencyKeys(
+            config.idempotency_key_ttl_seconds, config.idempotency_max_keys
+        )
+        self._inflight_keys: Dict[str, Tuple[bytes, "asyncio.Future[DataRecord]"]] = {}
+
+        # Insertion-ordered index of every record id, keyed by a sequence
+        # number assigned on ingestion
+        self._order = OrderedIndex()
+        self._next_seq = 0
+        # The unprocessed subset of it. Records leave it when processed and
+        # are never re-added, so it is only appended to; a processed index
+        # would need an insertion in the middle for every record processed.
+        self._unprocessed = OrderedIndex()
+
+        # Running counters kept up to date on every mutation so that stats
+        # never require a scan of the store.
+        self._processed_count = 0
+        self._data_bytes = 0
+        self._metadata_bytes = 0
+        # record id -> (data bytes, metadata bytes, processed, version)
+        self._record_info: Dict[str, Tuple[int, int, bool, int]] = {}
+
+        # Store version, bumped by every change to a record. A record's
+        # version is the store version of its last change. The random epoch
+        # keeps version tags from repeating across restarts.
+        self._version = 0
+        self._epoch = uuid.uuid4().hex[:8]
+        self._metadata_key_counts: Dict[str, int] = {}
+
+        # Hash indexes on metadata keys: key -> value -> ids. Each bucket is
+        # an ordered index, so ids stay in insertion order and a cursor can
+        # seek into it.
+        self._metadata_indexes: Dict[str, Dict[str, OrderedIndex]] = {
+            key: {} for key in indexed_metadata_keys
+        }
+
+        # Sorted indexes on ingestion and processing time for range queries
+        self._time_indexes: Dict[str, TimeIndex] = {
+            "timestamp": TimeIndex(),
+            "processingTimestamp": TimeIndex(),
+        }
+
+        # Background processing: a queue of (job id, chunk of record ids)
+        # drained by a pool of worker tasks started on first use.
+        self.jobs: Dict[str, ProcessingJob] = {}
+        self._job_queue: Optional["asyncio.Queue[Tuple[str, List[str]]]"] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self._worker_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._busy_workers = 0
+        self._queued_records = 0
+
+        self.wal = wal
+        if wal is not None:
+            self._replay(wal)
+
+    async def start(self) -> None:
+        """
+        Rebuild indexes and counters from records already in the store.
+
+        Indexes and counters only live in memory, so with the SQLite
+        backend every row is read and decoded here. Startup time and the
+        memory they take grow with the number of stored records.
+        """
+        if isinstance(self.store, MemoryRecordStore):
+            # Records recovered from the write-ahead log bypass the limits
+            await self.store.evict()
+
+        if len(self._order) or not await self.store.count():
+            return
+
+        started = time.perf_counter()
+        async for record in self.store.scan():
+            self._track_add(record)
+        logger.info(
+            f"Indexed {len(self._order)} existing records",
+            extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+        )
 
     async def ingest_data(
         self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
@@ -36,12 +185,130 @@ class DataService:
             processed=False,
             metadata=metadata,
         )
+        self._share_payloads(record)
 
-        self.data_store[record.id] = record
-        logger.info(f"Data ingested with id: {record.id}")
+        await self.store.put(record)
+        self._track_add(record)
+        self._log_record(record)
+        RECORDS_INGESTED.inc()
+        await self._commit()
+        sampled_logger.info(f"Data ingested with id: {record.id}")
 
         return record
 
+    async def ingest_data_json(
+        self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """
+        Ingest new data and return the created record rendered as JSON.
+
+        Args:
+            data: Data to ingest
+            metadata: Optional metadata
+
+        Returns:
+            JSON of the created data record
+        """
+        return to_json(await self.ingest_data(data, metadata))
+
+    async def ingest_batch(
+        self, items: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]
+    ) -> List[DataRecord]:
+        """
+        Ingest a chunk of already validated data in one call.
+
+        Records are built without re-running validation and a single log
+        line is written for the whole chunk.
+
+        Args:
+            items: (data, metadata) pairs to ingest
+
+        Returns:
+            Created data records, in input order
+        """
+        timestamp = datetime.utcnow()
+        records = [
+            DataRecord.model_construct(
+                id=str(uuid.uuid4()),
+                timestamp=timestamp,
+                data=data,
+                processed=False,
+                metadata=metadata,
+            )
+            for data, metadata in items
+        ]
+        for record in records:
+            self._share_payloads(record)
+
+        await self.store.put_many(records)
+        for record in records:
+            self._track_add(record)
+            self._log_record(record)
+        RECORDS_INGESTED.inc(amount=len(records))
+        await self._commit()
+        sampled_logger.info(f"Batch ingested {len(records)} records")
+
+        return records
+
+    async def ingest_idempotent(
+        self, key: str, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[DataRecord, bool]:
+        """
+        Ingest new data at most once per idempotency key.
+
+        A repeated key returns the record the first request created, as it
+        is now; a repeat that arrives while the first is still being
+        ingested waits for it. Keys are kept in memory only.
+
+        Args:
+            key: Idempotency key sent by the client
+            data: Data to ingest
+            metadata: Optional metadata
+
+        Returns:
+            (record, True) for a repeated key, or (new record, False)
+
+        Raises:
+            ValueError: If the key was used with different data or metadata
+        """
+        digest = payload_digest([data, metadata])
+        known = self._idempotency_keys.get(key)
+        if known is not None:
+            self._check_idempotency_key(key, known[0], digest)
+            record = await self.store.get(known[1])
+            if record is not None:
+                self._idempotency_keys.replays += 1
+                return record, True
+
+        inflight = self._inflight_keys.get(key)
+        if inflight is not None:
+            self._check_idempotency_key(key, inflight[0], digest)
+            record = await asyncio.shield(inflight[1])
+            self._idempotency_keys.replays += 1
+            return record, True
+
+        future: "asyncio.Future[DataRecord]" = asyncio.get_running_loop().create_future()
+        self._inflight_keys[key] = (digest, future)
+        try:
+            record = await self.ingest_data(data, metadata)
+        except BaseException as err:
+            future.set_exception(err)
+            # Only requests waiting on the key see the error
+            future.exception()
+            raise
+        else:
+            self._idempotency_keys.put(key, digest, record.id)
+            future.set_result(record)
+        finally:
+            del self._inflight_keys[key]
+        return record, False
+
+    def _check_idempotency_key(self, key: str, known: bytes, digest: bytes) -> None:
+        """Reject reuse of an idempotency key for a different payload."""
+        if known != digest:
+            self._idempotency_keys.conflicts += 1
+            raise ValueError(f"Idempotency key {key} was already used with a different payload")
+
     async def process_data(self, record_id: str) -> ProcessedData:
         """
         Process a data record.
@@ -55,7 +322,7 @@ class DataService:
         Raises:
             ValueError: If record not found
         """
-        record = self.data_store.get(record_id)
+        record = await self.store.get(record_id)
 
         if not record:
             raise ValueError(f"Record with id {record_id} not found")
@@ -63,22 +330,119 @@ class DataService:
         if record.processed:
             return record  # type: ignore
 
-        processed_record = ProcessedData(
-            id=record.id,
-            timestamp=record.timestamp,
-            data=record.data,
-            processed=True,
-            metadata=record.metadata,
-            processingTimestamp=datetime.utcnow(),
-            processingResult=ProcessingResult(
-                status="success", message="Data processed successfully"
-            ),
+        await self._process_records([record_id])
+        processed_record = await self.store.get(record_id)
+        if processed_record is None:
+            raise ValueError(f"Record with id {record_id} not found")
+        sampled_logger.info(f"Data processed with id: {record_id}")
+
+        return processed_record  # type: ignore
+
+    async def enqueue_processing(
+        self,
+        record_ids: Optional[List[str]] = None,
+        all_unprocessed: bool = False,
+        vectorized: bool = False,
+    ) -> ProcessingJob:
+        """
+        Enqueue records for processing by the background workers.
+
+        Args:
+            record_ids: IDs of the records to process
+            all_unprocessed: Process every record that is not processed yet
+            vectorized: Summarize numeric payloads of records without a
+                processor in vectorized batches, one per chunk
+
+        Returns:
+            The created processing job
+
+        Raises:
+            ValueError: If neither record ids nor all_unprocessed are given
+        """
+        if all_unprocessed:
+            ids = [record_id for _, record_id in self._unprocessed.iter_after()]
+        elif record_ids:
+            ids = list(dict.fromkeys(record_ids))
+        else:
+            raise ValueError("Either ids or all_unprocessed must be provided")
+
+        job = ProcessingJob(
+            id=str(uuid.uuid4()),
+            total=len(ids),
+            vectorized=vectorized,
+            createdAt=datetime.utcnow(),
         )
+        self._add_job(job)
 
-        self.data_store[record_id] = processed_record
-        logger.info(f"Data processed with id: {record_id}")
+        if not ids:
+            job.status = "completed"
+            job.completedAt = job.createdAt
+            return job
 
-        return processed_record
+        queue = self._ensure_workers()
+        chunk_size = config.process_chunk_size
+        for start in range(0, len(ids), chunk_size):
+            queue.put_nowait((job.id, ids[start : start + chunk_size]))
+        self._queued_records += len(ids)
+
+        logger.info(f"Processing job {job.id} queued with {len(ids)} records")
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[ProcessingJob]:
+        """
+        Get a background processing job by ID.
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Processing job or None if not found
+        """
+        return self.jobs.get(job_id)
+
+    async def get_queue_stats(self) -> Dict[str, Any]:
+        """
+        Get background processing queue statistics.
+
+        Returns:
+            Dictionary with worker count, busy workers, utilization and
+            the number of records waiting in the queue
+        """
+        workers = config.process_workers
+        return {
+            "workers": workers,
+            "busy_workers": self._busy_workers,
+            "utilization": round(self._busy_workers / workers, 4) if workers else 0.0,
+            "queue_depth": self._queued_records,
+        }
+
+    async def get_counters(self) -> Dict[str, float]:
+        """
+        Get the record counters of the process running the data service.
+
+        Returns:
+            Dictionary of metric name to total
+        """
+        return {counter.name: counter.get() for counter in RECORD_COUNTERS}
+
+    async def shutdown(self) -> None:
+        """Stop background workers, flush durable storage and close the store."""
+        await self.stop_workers()
+        self.pipeline.close()
+        if self.wal is not None:
+            self.wal.close()
+        await self.store.close()
+
+    async def stop_workers(self) -> None:
+        """Cancel the background processing workers."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._job_queue = None
+        self._worker_loop = None
+        self._busy_workers = 0
+        self._queued_records = 0
 
     async def get_data(self, record_id: str) -> Optional[Union[DataRecord, ProcessedData]]:
         """
@@ -90,7 +454,87 @@ class DataService:
         Returns:
             Data record or None if not found
         """
-        return self.data_store.get(record_id)
+        return await self.store.get(record_id)
+
+    async def get_version(self, record_id: Optional[str] = None) -> Optional[str]:
+        """
+        Get a version tag that changes whenever a record, or any record,
+        changes.
+
+        Args:
+            record_id: ID of a record, or None for the whole store
+
+        Returns:
+            Version tag of the record or the store, or None if the record
+            does not exist
+        """
+        # Records past their time-to-live must not be reported as current
+        await self._expire()
+        if record_id is None:
+            return f"{self._epoch}-{self._version}"
+        info = self._record_info.get(record_id)
+        return f"{self._epoch}-{info[3]}" if info is not None else None
+
+    async def get_record_json(
+        self, record_id: str, known_version: Optional[str] = None
+    ) -> Optional[Tuple[str, Optional[bytes]]]:
+        """
+        Get a record rendered as JSON, with its version tag, in one call.
+
+        Args:
+            record_id: ID of the record
+            known_version: Version the caller already holds the JSON of, if any
+
+        Returns:
+            Tuple of the version and the record's JSON, which is None when
+            the version is known_version; None if the record does not exist
+        """
+        version = await self.get_version(record_id)
+        if version is None:
+            return None
+        if version == known_version:
+            return version, None
+        record = await self.get_data(record_id)
+        return (version, to_json(record)) if record is not None else None
+
+    async def get_page_json(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[RecordFilter] = None,
+        known_version: Optional[str] = None,
+    ) -> Tuple[str, Optional[Tuple[bytes, Optional[str], Dict[str, int]]]]:
+        """
+        Get a page of records rendered as JSON, with the store's version tag
+        and stats, in one call.
+
+        The filter and cursor are validated before the version is compared,
+        so an invalid query fails even when the caller's copy is current.
+
+        Args:
+            limit: Maximum number of records to return
+            offset: Number of records to skip
+            cursor: Opaque cursor returned by a previous page
+            filters: Optional metadata, processed flag and time filters
+            known_version: Store version the caller already holds the page at
+
+        Returns:
+            Tuple of the version and, unless it is known_version, the JSON
+            array of records, the cursor for the next page and the stats
+
+        Raises:
+            ValueError: If the cursor is invalid or a metadata key is not
+                indexed
+        """
+        filters = filters or RecordFilter()
+        await self.validate_filter(filters, cursor)
+        version = await self.get_version()
+        assert version is not None  # the store as a whole always has a version
+        if version == known_version:
+            return version, None
+        records, next_cursor = await self.get_page(limit, offset, cursor, filters)
+        return version, (to_json(records), next_cursor, await self.get_stats())
 
     async def get_all_data(
         self, limit: int = 100, offset: int = 0
@@ -105,8 +549,97 @@ class DataService:
         Returns:
             List of data records
         """
-        all_data = list(self.data_store.values())
-        return all_data[offset : offset + limit]
+        records, _ = await self.get_page(limit, offset)
+        return records
+
+    async def get_page(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[RecordFilter] = None,
+    ) -> Tuple[List[Union[DataRecord, ProcessedData]], Optional[str]]:
+        """
+        Get a page of data records.
+
+        Records come in insertion order, or in time order when a since or
+        until bound is given. When a cursor is given the page starts right
+        after the record it points to and costs O(log N + limit);
+        ``offset`` is then applied relative to the cursor. Metadata filters
+        are answered from the hash indexes and time bounds from the sorted
+        time indexes, so neither scans records outside the result.
+
+        Args:
+            limit: Maximum number of records to return
+            offset: Number of records to skip
+            cursor: Opaque cursor returned by a previous page
+            filters: Optional metadata, processed flag and time filters
+
+        Returns:
+            Tuple of the records and the cursor for the next page, or None
+            if there are no more records
+
+        Raises:
+            ValueError: If the cursor is invalid or a metadata key is not
+                indexed
+        """
+        entries, offset = self._iter_matches(filters or RecordFilter(), cursor, offset)
+
+        page = list(islice(entries, offset, offset + limit + 1))
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        fetched = await self.store.get_many([record_id for _, record_id in page])
+        records = [record for record in fetched if record is not None]
+        next_cursor = self._encode_cursor(*page[-1][0]) if has_more else None
+
+        return records, next_cursor
+
+    async def iter_records(
+        self, filters: Optional[RecordFilter] = None, batch_size: int = 500
+    ) -> AsyncIterator[List[Union[DataRecord, ProcessedData]]]:
+        """
+        Iterate over every record matching a filter, one page at a time.
+
+        Pages are fetched with cursors, so each costs O(log N + batch_size)
+        and only one page is held in memory. Records written or deleted
+        during iteration may or may not be included.
+
+        Args:
+            filters: Optional metadata, processed flag and time filters
+            batch_size: Number of records per page
+
+        Yields:
+            Non-empty lists of records in listing order
+
+        Raises:
+            ValueError: If a metadata key is not indexed
+        """
+        cursor: Optional[str] = None
+        while True:
+            records, cursor = await self.get_page(batch_size, 0, cursor, filters)
+            if records:
+                yield records
+            if cursor is None:
+                return
+
+    async def validate_filter(self, filters: RecordFilter, cursor: Optional[str] = None) -> None:
+        """
+        Check that a filter, and a cursor paging through it, can be answered
+        from the indexes.
+
+        Args:
+            filters: Record filters to check
+            cursor: Cursor from a previous page of the same filter, if any
+
+        Raises:
+            ValueError: If a metadata key is not indexed or the cursor is invalid
+        """
+        self._metadata_buckets(filters.metadata)
+        if cursor is not None:
+            _, after_time = self._decode_cursor(cursor)
+            if (filters.since is not None or filters.until is not None) and after_time is None:
+                raise ValueError("Invalid cursor")
 
     async def delete_data(self, record_id: str) -> bool:
         """
@@ -118,25 +651,572 @@ class DataService:
         Returns:
             True if deleted, False if not found
         """
-        if record_id in self.data_store:
-            del self.data_store[record_id]
-            logger.info(f"Data deleted with id: {record_id}")
+        record = await self.store.get(record_id)
+        if record is not None and await self.store.delete(record_id):
+            self._track_remove(record)
+            if self.wal is not None:
+                self.wal.append(OP_DELETE, record_id.encode())
+            RECORDS_DELETED.inc()
+            await self._commit()
+            sampled_logger.info(f"Data deleted with id: {record_id}")
             return True
         return False
 
-    def get_stats(self) -> Dict[str, int]:
+    async def get_stats(self) -> Dict[str, int]:
         """
         Get statistics about stored data.
 
         Returns:
             Dictionary with total, processed, and unprocessed counts
         """
-        all_data = list(self.data_store.values())
-        processed = sum(1 for record in all_data if record.processed)
-        unprocessed = len(all_data) - processed
+        await self._expire()
+        total = len(self._order)
+        processed = self._processed_count
+
+        return {"total": total, "processed": processed, "unprocessed": total - processed}
+
+    async def add_metadata_index(self, key: str) -> None:
+        """
+        Declare a metadata key as indexed and index the existing records.
+
+        Args:
+            key: Metadata key to index
+        """
+        if key in self._metadata_indexes:
+            return
+
+        # Register first so that writes during the scan are indexed too.
+        # Buckets are ordered by sequence number, so interleaved writes
+        # cannot break insertion order.
+        buckets: Dict[str, OrderedIndex] = {}
+        self._metadata_indexes[key] = buckets
+        async for record in self.store.scan():
+            seq = self._order.get(record.id)
+            if seq is not None and record.metadata and key in record.metadata:
+                _bucket(buckets, _index_value(record.metadata[key])).add(record.id, seq)
+
+        # Drop buckets emptied by deletes during the scan
+        for value in [value for value, bucket in buckets.items() if not bucket]:
+            del buckets[value]
+        logger.info(f"Metadata index created for key: {key}")
+
+    async def get_detailed_stats(self) -> Dict[str, Any]:
+        """
+        Get detailed statistics about stored data.
+
+        Every value comes from running counters, so this is O(number of
+        distinct metadata keys) rather than O(number of records).
+
+        Returns:
+            Dictionary with record counts, payload byte totals, the
+            number of records carrying each metadata key, timings per
+            processor, and payload deduplication and idempotency counters
+        """
+        return {
+            **await self.get_stats(),
+            "processing_queue": await self.get_queue_stats(),
+            "processors": self.pipeline.get_stats(),
+            "store": self.store.get_stats(),
+            "bytes": {
+                "data": self._data_bytes,
+                "metadata": self._metadata_bytes,
+                "total": self._data_bytes + self._metadata_bytes,
+            },
+            "metadata_keys": dict(self._metadata_key_counts),
+            "metadata_indexes": {
+                key: len(buckets) for key, buckets in self._metadata_indexes.items()
+            },
+            "dedup": {
+                "enabled": self._interner is not None,
+                **(self._interner.get_stats() if self._interner is not None else {}),
+                "idempotency": self._idempotency_keys.get_stats(),
+            },
+        }
+
+    def _share_payloads(self, record: Union[DataRecord, CompactRecord]) -> None:
+        """Point a new record at the shared copies of its data and metadata."""
+        if self._interner is None:
+            return
+        record.data = self._interner.intern(record.data)
+        if record.metadata:
+            record.metadata = self._interner.intern(record.metadata)
+
+    def _track_add(self, record: Union[DataRecord, ProcessedData, CompactRecord]) -> None:
+        """Add a newly stored record to the ordered index and counters."""
+        if record.id in self._record_info:
+            return
+
+        seq = self._next_seq
+        self._next_seq += 1
+        self._order.add(record.id, seq)
+        self._time_indexes["timestamp"].add(record.id, record.timestamp, seq)
+        processing_timestamp: Optional[datetime] = getattr(record, "processingTimestamp", None)
+        if processing_timestamp is not None:
+            self._time_indexes["processingTimestamp"].add(record.id, processing_timestamp, seq)
+
+        data_bytes = _json_size(record.data)
+        metadata_bytes = _json_size(record.metadata) if record.metadata else 0
+
+        self._version += 1
+        self._record_info[record.id] = (
+            data_bytes,
+            metadata_bytes,
+            record.processed,
+            self._version,
+        )
+        self._data_bytes += data_bytes
+        self._metadata_bytes += metadata_bytes
+        if record.processed:
+            self._processed_count += 1
+        else:
+            self._unprocessed.add(record.id, seq)
+
+        key_counts = self._metadata_key_counts
+        for key in record.metadata or ():
+            key_counts[key] = key_counts.get(key, 0) + 1
+
+        if record.metadata:
+            for key, buckets in self._metadata_indexes.items():
+                if key in record.metadata:
+                    _bucket(buckets, _index_value(record.metadata[key])).add(record.id, seq)
+
+    def _track_remove(self, record: Union[DataRecord, ProcessedData, CompactRecord]) -> None:
+        """Remove a deleted record from the ordered index and counters."""
+        info = self._record_info.pop(record.id, None)
+        if info is None:
+            return
+
+        self._version += 1
+        self._order.remove(record.id)
+        self._unprocessed.remove(record.id)
+        for time_index in self._time_indexes.values():
+            time_index.remove(record.id)
+
+        if self._interner is not None:
+            self._interner.release(record.data)
+            if record.metadata:
+                self._interner.release(record.metadata)
+
+        data_bytes, metadata_bytes, processed, _ = info
+        self._data_bytes -= data_bytes
+        self._metadata_bytes -= metadata_bytes
+        if processed:
+            self._processed_count -= 1
+
+        key_counts = self._metadata_key_counts
+        for key in record.metadata or ():
+            remaining = key_counts.get(key, 0) - 1
+            if remaining > 0:
+                key_counts[key] = remaining
+            else:
+                key_counts.pop(key, None)
+
+        if record.metadata:
+            for key, buckets in self._metadata_indexes.items():
+                if key in record.metadata:
+                    value = _index_value(record.metadata[key])
+                    bucket = buckets.get(value)
+                    if bucket is not None:
+                        bucket.remove(record.id)
+                        if not bucket:
+                            del buckets[value]
+
+    def _iter_matches(
+        self, filters: RecordFilter, cursor: Optional[str], offset: int
+    ) -> Tuple[Iterator[Tuple[Tuple[int, Optional[TimeKey]], str]], int]:
+        """
+        Build the iterator over records matching a filter.
+
+        The iterator yields ((sequence, time key or None), record id) pairs,
+        where the time key is set when results are in time order. It is
+        returned with the offset still to skip, which is 0 when the offset
+        could be applied by seeking directly.
+
+        Unprocessed records have their own index, used like a metadata
+        bucket. There is no processed index, so ``processed=true`` filters
+        the other candidates and passes over the unprocessed ones among them.
+        """
+        after_seq, after_time = self._decode_cursor(cursor) if cursor is not None else (None, None)
+        buckets = self._metadata_buckets(filters.metadata)
+        if filters.processed is False:
+            buckets.append(self._unprocessed)
+        entries: Iterator[Tuple[Tuple[int, Optional[TimeKey]], str]]
+
+        if filters.since is not None or filters.until is not None:
+            if cursor is not None and after_time is None:
+                raise ValueError("Invalid cursor")
+            time_index = self._time_indexes[filters.time_field]
+            entries = (
+                ((key[1], key), record_id)
+                for key, record_id in time_index.between(filters.since, filters.until, after_time)
+                if all(record_id in bucket for bucket in buckets)
+            )
+        elif buckets:
+            # Walk the smallest bucket and probe the others
+            buckets.sort(key=len)
+            smallest, others = buckets[0], buckets[1:]
+            skip = 0
+            if not others and filters.processed is not True:
+                skip, offset = offset, 0
+            entries = (
+                ((seq, None), record_id)
+                for seq, record_id in smallest.iter_after(after_seq, skip)
+                if all(record_id in other for other in others)
+            )
+        else:
+            skip = 0
+            if filters.processed is None:
+                skip, offset = offset, 0
+            entries = (
+                ((seq, None), record_id)
+                for seq, record_id in self._order.iter_after(after_seq, skip)
+            )
+
+        if filters.processed is True:
+            unprocessed = self._unprocessed
+            entries = (entry for entry in entries if entry[1] not in unprocessed)
+
+        return entries, offset
+
+    def _metadata_buckets(self, metadata: Dict[str, str]) -> List[OrderedIndex]:
+        """Look up the index buckets for metadata filters."""
+        buckets = []
+        for key, value in metadata.items():
+            index = self._metadata_indexes.get(key)
+            if index is None:
+                raise ValueError(f"Metadata key '{key}' is not indexed")
+            buckets.append(index.get(value) or OrderedIndex())
+        return buckets
+
+    def _ensure_workers(self) -> "asyncio.Queue[Tuple[str, List[str]]]":
+        """Start the worker pool on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._job_queue is None or self._worker_loop is not loop:
+            # Workers bound to a previous (closed) loop cannot be reused
+            self._job_queue = asyncio.Queue()
+            self._worker_loop = loop
+            self._busy_workers = 0
+            self._queued_records = 0
+            self._workers = [
+                loop.create_task(self._worker(self._job_queue))
+                for _ in range(max(1, config.process_workers))
+            ]
+        return self._job_queue
+
+    async def _worker(self, queue: "asyncio.Queue[Tuple[str, List[str]]]") -> None:
+        """Drain chunks of record ids from the job queue and process them."""
+        while True:
+            job_id, chunk = await queue.get()
+            self._busy_workers += 1
+            job = self.jobs.get(job_id)
+            try:
+                if job is not None and job.status == "queued":
+                    job.status = "running"
+
+                failed = sum(1 for record_id in chunk if record_id not in self._record_info)
+                await self._process_records(chunk, job is not None and job.vectorized)
+
+                if job is not None:
+                    job.processed += len(chunk) - failed
+                    job.failed += failed
+                    if job.status == "running" and job.processed + job.failed >= job.total:
+                        job.status = "completed"
+                        job.completedAt = datetime.utcnow()
+                        logger.info(
+                            f"Processing job {job.id} completed",
+                            extra={"processed": job.processed, "failed": job.failed},
+                        )
+            except Exception as error:
+                # Fail the job but keep the worker alive for the next one
+                logger.error(
+                    f"Processing job {job_id} failed: {error}",
+                    extra={"job_id": job_id},
+                    exc_info=error,
+                )
+                if job is not None:
+                    job.failed += len(chunk)
+                    if job.status != "failed":
+                        job.status = "failed"
+                        job.error = str(error)
+                        job.completedAt = datetime.utcnow()
+            finally:
+                self._queued_records -= len(chunk)
+                self._busy_workers -= 1
+                queue.task_done()
+
+            # Let request handlers run between chunks
+            await asyncio.sleep(0)
+
+    def _add_job(self, job: ProcessingJob) -> None:
+        """Track a job, forgetting the oldest completed jobs beyond retention."""
+        self.jobs[job.id] = job
+        excess = len(self.jobs) - config.process_job_retention
+        if excess > 0:
+            finished = [
+                job_id
+                for job_id, tracked in self.jobs.items()
+                if tracked.status in ("completed", "failed")
+            ]
+            for job_id in finished[:excess]:
+                del self.jobs[job_id]
+
+    async def _process_records(self, record_ids: List[str], vectorized: bool = False) -> List[str]:
+        """Run the processor pipeline on records, then mark, track and log them."""
+        records = [
+            record
+            for record in await self.store.get_many(record_ids)
+            if record is not None and not record.processed
+        ]
+        results: Dict[str, ProcessingResult] = {}
+        if vectorized:
+            untyped = [record for record in records if self.pipeline.select(record) is None]
+            results = await self._summarize_numeric(untyped)
+            records = [record for record in records if record.id not in results]
+        results.update(await self.pipeline.run(records))
+
+        processing_timestamp = datetime.utcnow()
+        marked = await self.store.mark_processed(record_ids, processing_timestamp, results)
+        for record_id in marked:
+            self._track_processed(record_id, processing_timestamp)
+            self._log_process(record_id, processing_timestamp, results.get(record_id))
+        RECORDS_PROCESSED.inc(amount=len(marked))
+        await self._commit()
+        return marked
+
+    async def _summarize_numeric(
+        self, records: List[Union[DataRecord, ProcessedData]]
+    ) -> Dict[str, ProcessingResult]:
+        """Summarize numeric payloads in one vectorized pass off the event loop."""
+        if not records:
+            return {}
+        started = time.perf_counter()
+        outputs = await asyncio.to_thread(summarize_numeric, records)
+        if not outputs:
+            return {}
+        # Records share one pass, so each is credited an equal share of it
+        duration_ms = (time.perf_counter() - started) * 1000 / len(outputs)
+        return {
+            record_id: self.pipeline.build_result(PROCESSOR_NAME, True, output, duration_ms)
+            for record_id, output in outputs.items()
+        }
+
+    async def _expire(self) -> None:
+        """Evict records whose time-to-live has passed from an in-memory store."""
+        if isinstance(self.store, MemoryRecordStore):
+            await self.store.expire()
+
+    def _drop_evicted(self, record: CompactRecord) -> None:
+        """Forget a record the in-memory store dropped to stay within its limits."""
+        self._track_remove(record)
+        if self.wal is not None:
+            self.wal.append(OP_DELETE, record.id.encode())
+
+    def _track_processed(self, record_id: str, processing_timestamp: datetime) -> None:
+        """Count a record as processed in the running counters and time index."""
+        info = self._record_info.get(record_id)
+        seq = self._order.get(record_id)
+        if info is not None and seq is not None and not info[2]:
+            self._version += 1
+            self._record_info[record_id] = (info[0], info[1], True, self._version)
+            self._processed_count += 1
+            self._unprocessed.remove(record_id)
+            self._time_indexes["processingTimestamp"].add(record_id, processing_timestamp, seq)
+
+    def _log_record(self, record: Union[DataRecord, ProcessedData]) -> None:
+        """Append a newly ingested record to the write-ahead log."""
+        if self.wal is not None:
+            self.wal.append(OP_INGEST, record.model_dump_json().encode())
+
+    def _log_process(
+        self, record_id: str, processing_timestamp: datetime, result: Optional[ProcessingResult]
+    ) -> None:
+        """Append a processing update to the write-ahead log."""
+        if self.wal is not None:
+            entry = {
+                "id": record_id,
+                "processingTimestamp": processing_timestamp.isoformat(),
+                "processingResult": result.model_dump(mode="json") if result else None,
+            }
+            self.wal.append(OP_PROCESS, json.dumps(entry).encode())
+
+    async def _commit(self) -> None:
+        """Make logged mutations durable, snapshotting the store when due."""
+        if self.wal is None:
+            return
+        if self.wal.snapshot_due():
+            # In ingestion order, which a sharded store does not keep
+            stored = self._memory_records()
+            records = [stored[record_id] for _, record_id in self._order.iter_after()]
+            self.wal.snapshot(_snapshot_entry(record) for record in records)
+        await self.wal.commit()
+
+    def _replay(self, wal: WriteAheadLog) -> None:
+        """Rebuild the store from the write-ahead log."""
+        started = time.perf_counter()
+
+        # Replay allocates millions of long-lived objects; pausing the cyclic
+        # garbage collector avoids repeated full-heap collections.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            entries = self._apply_entries(wal)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        logger.info(
+            "Data store recovered from write-ahead log",
+            extra={
+                "records": len(self._order),
+                "entries": entries,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            },
+        )
+
+    def _apply_entries(self, wal: WriteAheadLog) -> int:
+        """Apply logged operations in order and return how many were read."""
+        records = self._memory_records()
+        entries = 0
+        for op, payload in wal.replay():
+            entries += 1
+            if op == OP_INGEST or op == OP_STORED:
+                model = ProcessedData if op == OP_STORED else DataRecord
+                record = CompactRecord.from_model(model.model_validate_json(payload))
+                existing = records.get(record.id)
+                if existing is not None:
+                    del records[record.id]
+                    self._track_remove(existing)
+                self._share_payloads(record)
+                records[record.id] = record
+                self._track_add(record)
+            elif op == OP_PROCESS:
+                entry = json.loads(payload)
+                found = records.get(entry["id"])
+                if found is not None and not found.processed:
+                    result = entry.get("processingResult")
+                    processing_timestamp = datetime.fromisoformat(entry["processingTimestamp"])
+                    found.mark_processed(
+                        processing_timestamp,
+                        ProcessingResult.model_validate(result) if result else None,
+                    )
+                    self._track_processed(found.id, processing_timestamp)
+            elif op == OP_DELETE:
+                found = records.get(payload.decode())
+                if found is not None:
+                    del records[found.id]
+                    self._track_remove(found)
+        return entries
+
+    def _memory_records(self) -> MutableMapping[str, CompactRecord]:
+        """Return the mapping behind the in-memory store used with the write-ahead log."""
+        assert isinstance(self.store, MemoryRecordStore)
+        return self.store.records
+
+    @staticmethod
+    def _encode_cursor(seq: int, time_key: Optional[TimeKey] = None) -> str:
+        """Encode a sequence number, and time key in time order, as an opaque cursor."""
+        value = str(seq) if time_key is None else f"{seq}:{time_key[0]!r}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[int, Optional[TimeKey]]:
+        """Decode an opaque cursor back into a sequence number and optional time key."""
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            seq_part, _, time_part = value.partition(":")
+            seq = int(seq_part)
+            return seq, ((float(time_part), seq) if time_part else None)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValueError("Invalid cursor") from None
+
+
+def _index_value(value: Any) -> str:
+    """Normalize a metadata value to the string form used as an index key."""
+    return value if isinstance(value, str) else to_json(value, fallback=str).decode()
+
+
+def _bucket(buckets: Dict[str, OrderedIndex], value: str) -> OrderedIndex:
+    """Return the index bucket for a metadata value, creating it if needed."""
+    bucket = buckets.get(value)
+    if bucket is None:
+        bucket = buckets[value] = OrderedIndex()
+    return bucket
+
+
+def _snapshot_entry(record: CompactRecord) -> Tuple[bytes, bytes]:
+    """Encode a stored record as a snapshot entry."""
+    model = record.to_model()
+    return OP_STORED if model.processed else OP_INGEST, model.model_dump_json().encode()
+
+
+def _json_size(value: Any) -> int:
+    """Return the size in bytes of a value's compact JSON encoding."""
+    return len(to_json(value, fallback=str))
+
+
+def _create_wal() -> Optional[WriteAheadLog]:
+    """Create the write-ahead log configured in settings, if any."""
+    if not config.storage_dir:
+        return None
+    return WriteAheadLog(
+        config.storage_dir,
+        fsync_interval_ms=config.wal_fsync_interval_ms,
+        sync_commits=config.wal_sync_commits,
+        snapshot_every=config.snapshot_every_ops,
+    )
+
+
+def _create_store() -> RecordStore:
+    """Create the record store configured in settings."""
+    if config.storage_backend == "sqlite":
+        return SQLiteRecordStore(config.sqlite_path, pool_size=config.sqlite_pool_size)
+    if not (config.memory_max_records or config.memory_max_bytes or config.record_ttl_seconds):
+        return MemoryRecordStore(shards=config.memory_shards)
+    if config.memory_shards > 1:
+        logger.warning(
+            "MEMORY_SHARDS is ignored when memory limits are set; "
+            "the bounded store keeps a single dict confined to the event loop"
+        )
+
+    spill = None
+    if config.spill_path:
+        # Spilled records only back the current process, so start empty
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(config.spill_path + suffix):
+                os.remove(config.spill_path + suffix)
+        spill = SQLiteRecordStore(config.spill_path, pool_size=config.sqlite_pool_size)
+    return MemoryRecordStore(
+        max_records=config.memory_max_records,
+        max_bytes=config.memory_max_bytes,
+        ttl_seconds=config.record_ttl_seconds,
+        spill=spill,
+    )
+
+
+def create_data_service() -> Union[DataService, "RemoteDataService"]:
+    """
+    Create the data service configured in settings.
+
+    Returns:
+        A client for the store server when store_socket is set, otherwise
+        a DataService owning the records in this process
+    """
+    if config.store_socket:
+        from src.store_client import RemoteDataService
 
-        return {"total": len(all_data), "processed": processed, "unprocessed": unprocessed}
+        return RemoteDataService(config.store_socket)
+    return DataService(
+        _create_wal(),
+        _create_store(),
+        [key.strip() for key in config.indexed_metadata_keys.split(",") if key.strip()],
+        ProcessorPipeline(
+            load_processors(config.processors),
+            config.processor_metadata_key,
+            config.processor_pool_size,
+        ),
+        config.dedup_payloads,
+    )
 
 
 # Global instance
-data_service = DataService()
+data_service = create_data_service()
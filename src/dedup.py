@@ -0,0 +1,196 @@
+"""
+Deduplication of ingested payloads and idempotency keys.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def payload_digest(value: Any) -> bytes:
+    """
+    Hash the canonical JSON encoding of a value.
+
+    Keys are sorted, so objects that differ only in key order hash equally.
+
+    Args:
+        value: JSON-compatible value
+
+    Returns:
+        16-byte BLAKE2b digest
+    """
+    return hashlib.blake2b(_canonical(value), digest_size=16).digest()
+
+
+def _canonical(value: Any) -> bytes:
+    """Encode a value as compact JSON with sorted keys."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+class PayloadInterner:
+    """
+    Table of distinct payloads shared between records.
+
+    Interning a payload that is byte-for-byte identical (after
+    canonicalization) to one already held returns the held object, so the
+    records share it instead of each keeping a copy. Entries are reference
+    counted and removed when the last record using them is released.
+    """
+
+    def __init__(self):
+        """Initialize an empty table."""
+        # digest -> [payload, references, canonical size in bytes]
+        self._payloads: Dict[bytes, List[Any]] = {}
+        # id() of each held payload -> digest, so releasing skips rehashing
+        self._digests: Dict[int, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def __len__(self) -> int:
+        """Return the number of distinct payloads held."""
+        return len(self._payloads)
+
+    def intern(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return the shared copy of a payload, holding it if it is new.
+
+        Args:
+            payload: Payload of a record being stored
+
+        Returns:
+            The held payload equal to it, or the payload itself
+        """
+        canonical = _canonical(payload)
+        digest = hashlib.blake2b(canonical, digest_size=16).digest()
+        entry = self._payloads.get(digest)
+        if entry is not None:
+            entry[1] += 1
+            self.hits += 1
+            self.bytes_saved += entry[2]
+            held: Dict[str, Any] = entry[0]
+            return held
+
+        self._payloads[digest] = [payload, 1, len(canonical)]
+        self._digests[id(payload)] = digest
+        self.misses += 1
+        return payload
+
+    def release(self, payload: Dict[str, Any]) -> None:
+        """
+        Drop one reference to a payload, forgetting it after the last one.
+
+        Args:
+            payload: Payload of a record being removed
+        """
+        digest = self._digests.get(id(payload))
+        if digest is None or self._payloads[digest][0] is not payload:
+            # A copy, e.g. a record loaded back from disk
+            digest = payload_digest(payload)
+        entry = self._payloads.get(digest)
+        if entry is None:
+            return
+
+        entry[1] -= 1
+        if entry[1] > 0:
+            self.bytes_saved -= entry[2]
+            return
+        del self._payloads[digest]
+        self._digests.pop(id(entry[0]), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return deduplication statistics.
+
+        Returns:
+            Dictionary with distinct payloads held, hits (payloads shared
+            with an earlier record), misses, hit rate, and the estimated
+            bytes saved by records currently sharing a payload
+        """
+        lookups = self.hits + self.misses
+        return {
+            "payloads": len(self._payloads),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class IdempotencyKeys:
+    """
+    Bounded map of idempotency keys to the records they created.
+
+    Keys expire ``ttl_seconds`` after they are stored, and the oldest keys
+    are forgotten beyond ``max_keys``.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400.0, max_keys: int = 100_000):
+        """
+        Initialize an empty map.
+
+        Args:
+            ttl_seconds: How long a key is remembered (0 = no expiry)
+            max_keys: Maximum number of keys remembered
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        # key -> (request digest, record id, expiry on the monotonic clock)
+        self._keys: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self.replays = 0
+        self.conflicts = 0
+
+    def __len__(self) -> int:
+        """Return the number of remembered keys."""
+        return len(self._keys)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Look up a key.
+
+        Args:
+            key: Idempotency key
+
+        Returns:
+            (request digest, record id) stored for the key, or None if it is
+            unknown or expired
+        """
+        entry = self._keys.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds and entry[2] <= time.monotonic():
+            del self._keys[key]
+            return None
+        return entry[0], entry[1]
+
+    def put(self, key: str, digest: bytes, record_id: str) -> None:
+        """
+        Remember the record created for a key.
+
+        Args:
+            key: Idempotency key
+            digest: Digest of the request that used the key
+            record_id: ID of the record it created
+        """
+        self._keys.pop(key, None)
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        self._keys[key] = (digest, record_id, expires)
+        # Keys are stored in expiry order, so expired ones are at the front
+        now = time.monotonic()
+        while self._keys and (
+            len(self._keys) > self.max_keys
+            or (self.ttl_seconds and next(iter(self._keys.values()))[2] <= now)
+        ):
+            self._keys.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return idempotency statistics.
+
+        Returns:
+            Dictionary with remembered keys, replayed requests and
+            requests rejected for reusing a key with a different payload
+        """
+        return {"keys": len(self._keys), "replays": self.replays, "conflicts": self.conflicts}
@@ -0,0 +1,224 @@
+"""
+In-memory indexes for the data service.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Index key: (epoch seconds, insertion sequence number)
+TimeKey = Tuple[float, int]
+
+
+def to_epoch(value: datetime) -> float:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class OrderedIndex:
+    """
+    Set of record ids kept in insertion (sequence number) order.
+
+    Entries live in parallel sorted lists of sequence numbers and ids, so
+    iteration can resume after any sequence number in O(log N). Removed
+    ids stay in the lists as tombstones until they make up more than half
+    of them, which keeps removal O(1).
+    """
+
+    COMPACT_THRESHOLD = 1024
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._seqs: List[int] = []
+        self._ids: List[str] = []
+        self._live: Dict[str, int] = {}
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        """Return the number of indexed ids."""
+        return len(self._live)
+
+    def __contains__(self, record_id: object) -> bool:
+        """Return True if the id is indexed."""
+        return record_id in self._live
+
+    def get(self, record_id: str) -> Optional[int]:
+        """Return the sequence number of an id, or None if it is not indexed."""
+        return self._live.get(record_id)
+
+    def add(self, record_id: str, seq: int) -> None:
+        """
+        Index a record id.
+
+        Args:
+            record_id: ID of the record
+            seq: Insertion sequence number
+        """
+        if record_id in self._live:
+            self.remove(record_id)
+
+        if not self._seqs or seq > self._seqs[-1]:
+            self._seqs.append(seq)
+            self._ids.append(record_id)
+        else:
+            pos = bisect_right(self._seqs, seq)
+            self._seqs.insert(pos, seq)
+            self._ids.insert(pos, record_id)
+        self._live[record_id] = seq
+
+    def remove(self, record_id: str) -> None:
+        """
+        Remove a record id from the index.
+
+        Args:
+            record_id: ID of the record
+        """
+        if self._live.pop(record_id, None) is None:
+            return
+
+        self._tombstones += 1
+        if self._tombstones >= self.COMPACT_THRESHOLD and self._tombstones * 2 > len(self._ids):
+            live = [
+                (seq, record_id)
+                for seq, record_id in zip(self._seqs, self._ids)
+                if self._live.get(record_id) == seq
+            ]
+            self._seqs = [seq for seq, _ in live]
+            self._ids = [record_id for _, record_id in live]
+            self._tombstones = 0
+
+    def iter_after(
+        self, after_seq: Optional[int] = None, skip: int = 0
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Iterate over ids in sequence order.
+
+        Args:
+            after_seq: Only yield ids with a larger sequence number
+            skip: Number of matching ids to skip; applied by seeking
+                directly when there are no tombstones
+
+        Returns:
+            Iterator of (sequence number, record id) pairs
+        """
+        if after_seq is not None:
+            start = bisect_right(self._seqs, after_seq)
+        elif self._tombstones == 0:
+            start, skip = skip, 0
+        else:
+            start = 0
+        entries = self._iter_from(start)
+        return islice(entries, skip, None) if skip else entries
+
+    def _iter_from(self, start: int) -> Iterator[Tuple[int, str]]:
+        """Yield live entries from a list position onwards."""
+        live = self._live
+        for pos in range(start, len(self._ids)):
+            record_id = self._ids[pos]
+            seq = self._seqs[pos]
+            if live.get(record_id) == seq:
+                yield seq, record_id
+
+
+class TimeIndex:
+    """
+    Sorted index of record ids by timestamp.
+
+    Keys are kept in a sorted list searched with bisect, so a range query
+    costs O(log N + k). Timestamps mostly arrive in order, which makes
+    inserts an append. Removed ids stay in the list as tombstones until
+    they make up more than half of it.
+    """
+
+    COMPACT_THRESHOLD = 1024
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._keys: List[TimeKey] = []
+        self._ids: List[str] = []
+        self._live: Dict[str, TimeKey] = {}
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        """Return the number of indexed ids."""
+        return len(self._live)
+
+    def add(self, record_id: str, timestamp: datetime, seq: int) -> None:
+        """
+        Index a record id.
+
+        Args:
+            record_id: ID of the record
+            timestamp: Timestamp to index the record under
+            seq: Insertion sequence number, used to break ties
+        """
+        if record_id in self._live:
+            self.remove(record_id)
+
+        key = (to_epoch(timestamp), seq)
+        if not self._keys or key >= self._keys[-1]:
+            self._keys.append(key)
+            self._ids.append(record_id)
+        else:
+            pos = bisect_right(self._keys, key)
+            self._keys.insert(pos, key)
+            self._ids.insert(pos, record_id)
+        self._live[record_id] = key
+
+    def remove(self, record_id: str) -> None:
+        """
+        Remove a record id from the index.
+
+        Args:
+            record_id: ID of the record
+        """
+        if self._live.pop(record_id, None) is None:
+            return
+
+        self._tombstones += 1
+        if self._tombstones >= self.COMPACT_THRESHOLD and self._tombstones * 2 > len(self._ids):
+            live = [
+                (key, record_id)
+                for key, record_id in zip(self._keys, self._ids)
+                if self._live.get(record_id) == key
+            ]
+            self._keys = [key for key, _ in live]
+            self._ids = [record_id for _, record_id in live]
+            self._tombstones = 0
+
+    def between(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[TimeKey] = None,
+    ) -> Iterator[Tuple[TimeKey, str]]:
+        """
+        Iterate over ids with a timestamp in [since, until], oldest first.
+
+        Args:
+            since: Inclusive lower bound
+            until: Inclusive upper bound
+            after: Only yield entries strictly after this key (for cursors)
+
+        Yields:
+            (key, record id) pairs in key order
+        """
+        keys = self._keys
+        start = 0
+        if since is not None:
+            start = bisect_left(keys, (to_epoch(since), -1))
+        if after is not None:
+            start = max(start, bisect_right(keys, after))
+        end_ts = to_epoch(until) if until is not None else None
+
+        live = self._live
+        for pos in range(start, len(keys)):
+            key = keys[pos]
+            if end_ts is not None and key[0] > end_ts:
+                return
+            record_id = self._ids[pos]
+            if live.get(record_id) == key:
+                yield key, record_id
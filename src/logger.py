@@ -2,13 +2,29 @@
 Logger utility for structured logging.
 """
 
+import atexit
 import logging
+import queue
+import random
 import sys
 import json
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
 from src.config import config
 
+# Attributes every LogRecord has; anything else was added via ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__.keys() | {"message", "asctime"}
+)
+
+
+def extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """Return the fields added to a log record via the extra parameter."""
+    return {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRIBUTES}
+
 
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging."""
@@ -16,20 +32,21 @@ class JSONFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON."""
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            "timestamp": datetime.utcfromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S"),
             "level": record.levelname,
             "msg": record.getMessage(),
         }
 
         # Add extra fields if present
-        if hasattr(record, "extra_data"):
-            log_data.update(record.extra_data)
+        log_data.update(extra_fields(record))
 
         # Add exception info if present
         if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_data["exception"] = record.exc_text
 
-        return json.dumps(log_data)
+        return json.dumps(log_data, default=str)
 
 
 class ColoredConsoleFormatter(logging.Formatter):
@@ -47,55 +64,156 @@ class ColoredConsoleFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         """Format log record with colors."""
         color = self.COLORS.get(record.levelname, self.RESET)
-        timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = datetime.utcfromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S")
 
         msg = f"{timestamp} [{color}{record.levelname}{self.RESET}]: {record.getMessage()}"
 
         # Collect extra fields (anything added via extra parameter)
-        extra_data = {
-            k: v
-            for k, v in record.__dict__.items()
-            if k
-            not in [
-                "name",
-                "msg",
-                "args",
-                "created",
-                "filename",
-                "funcName",
-                "levelname",
-                "levelno",
-                "lineno",
-                "module",
-                "msecs",
-                "message",
-                "pathname",
-                "process",
-                "processName",
-                "relativeCreated",
-                "thread",
-                "threadName",
-                "exc_info",
-                "exc_text",
-                "stack_info",
-            ]
-        }
+        extra_data = extra_fields(record)
 
         if extra_data:
-            meta_str = json.dumps(extra_data, indent=2)
+            meta_str = json.dumps(extra_data, indent=2, default=str)
             msg += f" {meta_str}"
 
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            msg += f"\n{record.exc_text}"
+
         return msg
 
 
+class SamplingFilter(logging.Filter):
+    """
+    Filter that keeps a fraction of records per level and caps their rate.
+
+    Meant for high-volume per-request lines, where a sample is enough to
+    see what traffic looks like.
+    """
+
+    def __init__(self, rates: Optional[Dict[int, float]] = None, max_per_second: float = 0.0):
+        """
+        Initialize the filter.
+
+        Args:
+            rates: Fraction of records to keep per level number; levels not
+                listed keep every record
+            max_per_second: Maximum records passed per second (0 = no limit)
+        """
+        super().__init__()
+        self.rates = rates or {}
+        self.max_per_second = max_per_second
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._tokens = max_per_second
+        self._refilled = time.monotonic()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Return True if the record should be logged."""
+        rate = self.rates.get(record.levelno, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            self.dropped += 1
+            return False
+
+        if self.max_per_second:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.max_per_second,
+                    self._tokens + (now - self._refilled) * self.max_per_second,
+                )
+                self._refilled = now
+                if self._tokens < 1:
+                    self.dropped += 1
+                    return False
+                self._tokens -= 1
+        return True
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Queue handler whose records are formatted and written by a background thread.
+
+    The logging thread only renders the message text and exception; records
+    are dropped and counted when the queue is full instead of blocking.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        """Initialize the handler."""
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Make the record safe to hand to another thread."""
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping it when the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(value: str) -> Dict[int, float]:
+    """
+    Parse per-level sample rates such as ``"INFO=0.1,DEBUG=0"``.
+
+    Args:
+        value: Comma-separated LEVEL=rate pairs
+
+    Returns:
+        Mapping of level numbers to the fraction of records to keep
+
+    Raises:
+        ValueError: If a level name or rate is invalid
+    """
+    rates = {}
+    for pair in filter(None, (part.strip() for part in value.split(","))):
+        name, _, rate = pair.partition("=")
+        level = logging.getLevelName(name.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level in sample rates: {name}")
+        rates[level] = float(rate)
+    return rates
+
+
 # Create logger
 logger = logging.getLogger("do_practice")
 logger.setLevel(getattr(logging, config.log_level.upper()))
 
-# Console handler with colored output
+# Console handler: compact JSON in production, colored output otherwise
+use_json = config.log_format == "json" or (
+    config.log_format == "auto" and config.node_env == "production"
+)
 console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(ColoredConsoleFormatter())
-logger.addHandler(console_handler)
+console_handler.setFormatter(JSONFormatter() if use_json else ColoredConsoleFormatter())
+
+# In async mode records go through a bounded queue to a writer thread, so
+# formatting and stdout writes never run on the event loop
+listener: Optional[QueueListener] = None
+if config.log_async:
+    queue_handler = BackgroundQueueHandler(queue.Queue(config.log_queue_size))
+    listener = QueueListener(queue_handler.queue, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(queue_handler)
+else:
+    logger.addHandler(console_handler)
 
 # Remove default handlers
 logger.propagate = False
+
+# Logger for per-request lines (access log, single-record operations),
+# sampled and rate limited according to settings
+sampled_logger = logger.getChild("requests")
+sampling_filter = SamplingFilter(
+    parse_sample_rates(config.log_sample_rates), config.log_rate_limit_per_second
+)
+sampled_logger.addFilter(sampling_filter)
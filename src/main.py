@@ -2,14 +2,34 @@
 Main entry point for the application.
 """
 
+import os
 import signal
+import subprocess
 import sys
-import uvicorn
-from src.app import create_app
+import tempfile
+import time
 from src.config import config
 from src.logger import logger
 
-app = create_app()
+STORE_STARTUP_TIMEOUT = 30.0
+
+
+def __getattr__(name: str):
+    """
+    Create the application on first access.
+
+    The multi-worker supervisor imports this module without building an
+    app, so it never opens a data service of its own. Nothing else heavy is
+    imported at module level either: uvicorn is only loaded when this
+    module is run as the server, since workers started by uvicorn already
+    have it.
+    """
+    if name == "app":
+        from src.app import create_app
+
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def handle_shutdown(signum, frame):
@@ -18,17 +38,87 @@ def handle_shutdown(signum, frame):
     sys.exit(0)
 
 
-if __name__ == "__main__":
-    # Register signal handlers for graceful shutdown
-    signal.signal(signal.SIGTERM, handle_shutdown)
-    signal.signal(signal.SIGINT, handle_shutdown)
+def start_store_server(socket_path: str) -> subprocess.Popen:
+    """
+    Start a store server process and wait until it accepts connections.
+
+    Args:
+        socket_path: Unix socket path for the server to listen on
+
+    Returns:
+        The store server process
+
+    Raises:
+        RuntimeError: If the server exits or does not come up in time
+    """
+    env = {key: value for key, value in os.environ.items() if key.upper() != "STORE_SOCKET"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.store_server", "--socket", socket_path], env=env
+    )
+    deadline = time.monotonic() + STORE_STARTUP_TIMEOUT
+    while not os.path.exists(socket_path):
+        if process.poll() is not None:
+            raise RuntimeError(f"Store server exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError("Store server did not start in time")
+        time.sleep(0.05)
+    return process
+
 
+def run_workers(workers: int) -> None:
+    """
+    Serve the application from several worker processes.
+
+    A store server process owns the records; workers reach it over a Unix
+    socket passed to them through STORE_SOCKET.
+
+    Args:
+        workers: Number of worker processes
+    """
+    import uvicorn
+
+    socket_path = config.store_socket or os.path.join(
+        tempfile.mkdtemp(prefix="do-practice-"), "store.sock"
+    )
+    store = start_store_server(socket_path)
+    os.environ["STORE_SOCKET"] = socket_path
+    try:
+        uvicorn.run(
+            "src.main:app",
+            host="0.0.0.0",
+            port=config.port,
+            log_level=config.log_level.lower(),
+            workers=workers,
+        )
+    finally:
+        store.terminate()
+        store.wait()
+
+
+if __name__ == "__main__":
     logger.info(
         "Server starting",
-        extra={"port": config.port, "env": config.node_env, "api_version": config.api_version},
+        extra={
+            "port": config.port,
+            "env": config.node_env,
+            "api_version": config.api_version,
+            "workers": config.web_workers,
+        },
     )
 
+    if config.web_workers > 1:
+        # uvicorn's supervisor handles signals for the worker processes
+        run_workers(config.web_workers)
+        sys.exit(0)
+
+    # Register signal handlers for graceful shutdown
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    signal.signal(signal.SIGINT, handle_shutdown)
+
     # Run the application
+    import uvicorn
+
     uvicorn.run(
         "src.main:app",
         host="0.0.0.0",
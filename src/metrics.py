@@ -0,0 +1,203 @@
+"""
+Prometheus-compatible metrics.
+
+A small implementation of counters, gauges and histograms rendered in the
+Prometheus text exposition format. Updates are plain dict and list
+operations without locks: they are only made from the event loop thread,
+so they cost about as much as a dict lookup on the hot path.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric(ABC):
+    """Base class for a named metric with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[List["Metric"]] = None,
+    ):
+        """
+        Initialize the metric and register it.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            registry: Registry to add the metric to, the global one by default
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        (REGISTRY if registry is None else registry).append(self)
+
+    def render(self) -> List[str]:
+        """Return the exposition lines for this metric."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Return the sample lines for this metric."""
+
+    def _labels(self, values: LabelValues, extra: str = "") -> str:
+        """Format label values as a ``{name="value",...}`` suffix."""
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[List[Metric]] = None,
+    ):
+        """Initialize the counter."""
+        super().__init__(name, documentation, labelnames, registry)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Increase the value for a set of label values."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        """Return the value for a set of label values."""
+        return self.values.get(labels, 0)
+
+    def sync(self, value: float, *labels: str) -> None:
+        """Take over the value of the same counter kept by another process."""
+        self.values[labels] = value
+
+    def samples(self) -> List[str]:
+        """Return the sample lines for this metric."""
+        return [
+            f"{self.name}{self._labels(labels)} {_format(value)}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the value for a set of label values."""
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        """Decrease the value for a set of label values."""
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[List[Metric]] = None,
+    ):
+        """Initialize the histogram."""
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> per-bucket counts (last one is +Inf), then the sum
+        self.series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record an observation for a set of label values."""
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> List[str]:
+        """Return the sample lines for this metric."""
+        lines = []
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + ("+Inf" if bound == float("inf") else _format(bound)) + '"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_format(total[0])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+
+def render(registry: Optional[List[Metric]] = None) -> str:
+    """Render every registered metric in the text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _format(value: float) -> str:
+    """Format a sample value, dropping the fraction of whole numbers."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# HTTP metrics, updated by MetricsMiddleware
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+RESPONSE_CACHE = Counter(
+    "http_response_cache_total",
+    "Cacheable responses by outcome (hit, miss, not_modified)",
+    ("result",),
+)
+
+# Data service metrics, refreshed from DataService when scraped
+RECORDS = Gauge("data_records", "Records in the store by processed state", ("processed",))
+RECORDS_INGESTED = Counter("data_records_ingested_total", "Records ingested")
+RECORDS_PROCESSED = Counter("data_records_processed_total", "Records processed")
+RECORDS_DELETED = Counter("data_records_deleted_total", "Records deleted")
+# Counters updated by DataService, which may run in a store server process
+RECORD_COUNTERS = (RECORDS_INGESTED, RECORDS_PROCESSED, RECORDS_DELETED)
+QUEUE_DEPTH = Gauge("processing_queue_depth", "Records waiting for background processing")
+BUSY_WORKERS = Gauge("processing_workers_busy", "Background workers processing a chunk")
+PROCESSOR_DURATION = Histogram(
+    "record_processor_duration_seconds",
+    "Time spent running record processors by processor and outcome",
+    ("processor", "status"),
+)
@@ -0,0 +1,35 @@
+"""
+Metrics endpoint.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src import metrics
+from src.data_service import data_service
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Expose metrics in the Prometheus text exposition format.
+
+    Returns:
+        Request latency histograms, in-flight requests, store size and
+        ingest/process/delete counters
+    """
+    # With several web workers the record counters live in the store server
+    counters = await data_service.get_counters()
+    for counter in metrics.RECORD_COUNTERS:
+        counter.sync(counters[counter.name])
+    stats = await data_service.get_stats()
+    metrics.RECORDS.set(stats["processed"], "true")
+    metrics.RECORDS.set(stats["unprocessed"], "false")
+    queue = await data_service.get_queue_stats()
+    metrics.QUEUE_DEPTH.set(queue["queue_depth"])
+    metrics.BUSY_WORKERS.set(queue["busy_workers"])
+
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
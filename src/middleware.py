@@ -1,83 +1,132 @@
 """
-Middleware for error handling and logging.
+Middleware for error handling, logging, metrics, compression and profiling.
+
+All middlewares are plain ASGI classes rather than ``@app.middleware("http")``
+functions, which avoids the extra task and body stream that Starlette's
+BaseHTTPMiddleware adds to every request.
 """
 
+import asyncio
+import io
+import os
+import random
+import re
 import time
-from typing import Callable
-from fastapi import Request, status
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import status
 from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.compression import (
+    Compressor,
+    available_encodings,
+    compressor,
+    decompressor,
+    is_available,
+    negotiate,
+)
 from src.exceptions import AppError
-from src.logger import logger
+from src.logger import logger, sampled_logger
+from src.metrics import REQUEST_DURATION, REQUESTS_IN_FLIGHT
 
+if TYPE_CHECKING:
+    import cProfile
 
-async def error_handler(request: Request, call_next: Callable):
-    """
-    Global error handling middleware.
 
-    Args:
-        request: FastAPI request
-        call_next: Next middleware/route handler
+class ErrorHandlerMiddleware:
+    """Global error handling middleware."""
 
-    Returns:
-        Response
-    """
-    try:
-        response = await call_next(request)
-        return response
-    except AppError as err:
-        logger.error(
-            f"AppError occurred: {err.message}",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": err.status_code,
-            },
-        )
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
 
-        error_response = {
-            "error": {
-                "message": err.message,
-                "statusCode": err.status_code,
-            }
-        }
+        Args:
+            app: Next ASGI application
+        """
+        self.app = app
 
-        if err.details:
-            error_response["error"]["details"] = err.details
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request, turning exceptions into JSON error responses."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return JSONResponse(status_code=err.status_code, content=error_response)
-    except ValueError as err:
-        # Handle ValueError from services
-        if "not found" in str(err):
-            status_code = status.HTTP_404_NOT_FOUND
-        else:
-            status_code = status.HTTP_400_BAD_REQUEST
+        response_started = False
 
-        logger.error(
-            f"ValueError occurred: {str(err)}",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": status_code,
-            },
-        )
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-        return JSONResponse(
-            status_code=status_code,
-            content={
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as err:
+            # Too late to replace a response that is already being sent
+            if response_started:
+                raise
+            response = self.error_response(scope, err)
+            await response(scope, receive, send)
+
+    @staticmethod
+    def error_response(scope: Scope, err: Exception) -> JSONResponse:
+        """
+        Log an exception and build the error response for it.
+
+        Args:
+            scope: ASGI scope of the failed request
+            err: Exception raised while handling the request
+
+        Returns:
+            JSON error response
+        """
+        method, path = scope["method"], scope["path"]
+
+        if isinstance(err, AppError):
+            logger.error(
+                f"AppError occurred: {err.message}",
+                extra={"method": method, "path": path, "status_code": err.status_code},
+            )
+
+            error_response: Dict[str, Any] = {
                 "error": {
-                    "message": str(err),
-                    "statusCode": status_code,
+                    "message": err.message,
+                    "statusCode": err.status_code,
                 }
-            },
-        )
-    except Exception as err:
+            }
+
+            if err.details:
+                error_response["error"]["details"] = err.details
+
+            return JSONResponse(status_code=err.status_code, content=error_response)
+
+        if isinstance(err, ValueError):
+            # Handle ValueError from services
+            if "not found" in str(err):
+                status_code = status.HTTP_404_NOT_FOUND
+            else:
+                status_code = status.HTTP_400_BAD_REQUEST
+
+            logger.error(
+                f"ValueError occurred: {str(err)}",
+                extra={"method": method, "path": path, "status_code": status_code},
+            )
+
+            return JSONResponse(
+                status_code=status_code,
+                content={
+                    "error": {
+                        "message": str(err),
+                        "statusCode": status_code,
+                    }
+                },
+            )
+
         logger.error(
             f"Unexpected error occurred: {str(err)}",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-            },
-            exc_info=True,
+            extra={"method": method, "path": path},
+            exc_info=err,
         )
 
         return JSONResponse(
@@ -91,31 +140,434 @@ async def error_handler(request: Request, call_next: Callable):
         )
 
 
-async def request_logger(request: Request, call_next: Callable):
+class RequestLoggerMiddleware:
+    """Middleware for logging requests."""
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Next ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request and log its method, path, status and duration."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Logged when the response starts, before any body is sent
+                duration = time.perf_counter() - start_time
+                sampled_logger.info(
+                    f"{scope['method']} {scope['path']}",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status_code": message["status"],
+                        "duration_ms": round(duration * 1000, 2),
+                    },
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class MetricsMiddleware:
+    """Middleware recording request latency and in-flight requests."""
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Next ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request and observe its duration by route and status."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; label by its
+            # path template to keep the number of series bounded
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start_time,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            )
+
+
+class CompressionMiddleware:
+    """
+    Middleware compressing responses and decoding compressed request bodies.
+
+    JSON, NDJSON and text responses are encoded with the first of
+    ``encodings`` that the client accepts, when the body is at least
+    ``min_bytes`` long. Streamed bodies are encoded chunk by chunk, so
+    exports are compressed as they are sent. Responses that already carry
+    a Content-Encoding, such as a gzip export, are passed through.
+
+    Request bodies with a Content-Encoding are decoded as the app reads
+    them, up to ``max_request_bytes`` once decoded. Each chunk is decoded
+    in steps of at most ``DECODED_CHUNK_BYTES`` that stop near the limit,
+    so a small compressed chunk cannot inflate in memory all at once. A
+    body that cannot be decoded, or is too large, gets its error response
+    from this middleware in place of whatever the app answered to the
+    failed read. Chunks of at least ``thread_min_bytes``, and further steps
+    of a chunk that decodes to more than one step, are encoded and decoded
+    in a worker thread, so large bodies do not stall the event loop.
+    """
+
+    COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+    # Most decoded bytes handed to the app per received message
+    DECODED_CHUNK_BYTES = 1024 * 1024
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Sequence[str] = ("gzip",),
+        min_bytes: int = 1024,
+        thread_min_bytes: int = 64 * 1024,
+        max_request_bytes: int = 0,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Next ASGI application
+            encodings: Response codings in order of preference; those whose
+                package is not installed are skipped
+            min_bytes: Smallest response body to compress
+            thread_min_bytes: Smallest chunk to encode or decode in a thread
+            max_request_bytes: Largest decoded request body (0 = unlimited)
+        """
+        self.app = app
+        self.encodings = available_encodings(encodings)
+        self.min_bytes = min_bytes
+        self.thread_min_bytes = thread_min_bytes
+        self.max_request_bytes = max_request_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request with its body decoded and its response encoded."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = content_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif name == b"content-encoding":
+                content_encoding = value.decode("latin-1").strip().lower()
+
+        encoding = None
+        if accept_encoding and scope["method"] != "HEAD":
+            encoding = negotiate(accept_encoding, self.encodings)
+        app_send = send if encoding is None else self._encode_response(send, encoding)
+
+        if not content_encoding or content_encoding == "identity":
+            await self.app(scope, receive, app_send)
+            return
+        if not is_available(content_encoding):
+            error = AppError(415, f"Unsupported Content-Encoding: {content_encoding}")
+            await ErrorHandlerMiddleware.error_response(scope, error)(scope, receive, send)
+            return
+
+        # Frameworks turn errors raised while reading the body into their
+        # own generic 400, so decoding errors are answered here instead
+        errors: List[AppError] = []
+        started = False
+
+        async def send_unless_failed(message: Message) -> None:
+            nonlocal started
+            if errors and not started:
+                return
+            started = started or message["type"] == "http.response.start"
+            await app_send(message)
+
+        decoded_scope, decoded_receive = self._decode_request(
+            scope, receive, content_encoding, errors
+        )
+        try:
+            await self.app(decoded_scope, decoded_receive, send_unless_failed)
+        except AppError as err:
+            if started or err not in errors:
+                raise
+        if errors and not started:
+            await ErrorHandlerMiddleware.error_response(scope, errors[0])(scope, receive, send)
+
+    def _decode_request(
+        self, scope: Scope, receive: Receive, encoding: str, errors: List[AppError]
+    ) -> Tuple[Scope, Receive]:
+        """Wrap a request so that the app receives its body decoded, recording errors."""
+        # The app sees a plain body of unknown length
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        decoder = decompressor(encoding)
+        decoded_bytes = 0
+        more_input = True
+
+        async def receive_decoded() -> Message:
+            nonlocal decoded_bytes, more_input
+            # Output left over from the previous chunk is returned before
+            # more of the body is read
+            pending = not decoder.needs_input
+            data = b""
+            if not pending:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return message
+                data = message.get("body", b"")
+                more_input = message.get("more_body", False)
+
+            # One byte over the remaining budget shows that the body is too large
+            limit = self.DECODED_CHUNK_BYTES
+            if self.max_request_bytes:
+                limit = min(limit, self.max_request_bytes - decoded_bytes + 1)
+            body = b""
+            error = None
+            try:
+                if pending or len(data) >= self.thread_min_bytes:
+                    body = await asyncio.to_thread(decoder.decompress, data, limit)
+                elif data:
+                    body = decoder.decompress(data, limit)
+            except Exception:
+                error = AppError(400, f"Invalid request body: not valid {encoding} data")
+            else:
+                decoded_bytes += len(body)
+                if self.max_request_bytes and decoded_bytes > self.max_request_bytes:
+                    error = AppError(
+                        413, f"Request body exceeds {self.max_request_bytes} bytes once decoded"
+                    )
+                elif not more_input and decoder.needs_input and not decoder.eof:
+                    error = AppError(400, f"Invalid request body: truncated {encoding} data")
+            if error is not None:
+                errors.append(error)
+                raise error
+            return {
+                "type": "http.request",
+                "body": body,
+                "more_body": more_input or not decoder.needs_input,
+            }
+
+        return {**scope, "headers": headers}, receive_decoded
+
+    def _encode_response(self, send: Send, encoding: str) -> Send:
+        """Wrap a sender so that compressible responses are encoded."""
+        start: Optional[Message] = None
+        encoder: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_encoded(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if (
+                    message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(self.COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to encode
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(scope=start)
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.min_bytes:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                encoder = compressor(encoding, None if more_body else len(body))
+                headers["Content-Encoding"] = encoding
+                if not more_body:
+                    body = await self._run(encoder.compress, body) + encoder.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                await send(start)
+
+            chunk = await self._run(encoder.compress, body) if body else b""
+            if not more_body:
+                chunk += encoder.flush()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        return send_encoded
+
+    async def _run(self, codec: Callable[[bytes], bytes], data: bytes) -> bytes:
+        """Run a codec on a chunk, in a worker thread if the chunk is large."""
+        if len(data) >= self.thread_min_bytes:
+            return await asyncio.to_thread(codec, data)
+        return codec(data)
+
+
+class ProfilerMiddleware:
     """
-    Middleware for logging requests.
+    Middleware running selected requests under cProfile.
 
-    Args:
-        request: FastAPI request
-        call_next: Next middleware/route handler
+    Requests with an ``X-Profile`` header are profiled, plus a random
+    ``sample_rate`` fraction of all requests. By default the profile is
+    written to ``directory`` as a ``.prof`` file (open it with pstats or
+    snakeviz) named in the ``X-Profile-File`` response header. With
+    ``X-Profile: inline`` the response body is replaced by a text report
+    of the top functions by cumulative time, and the original status is
+    sent in ``X-Profile-Status``.
 
-    Returns:
-        Response
+    cProfile traces the whole event loop thread, so the profile also
+    contains work done for concurrent requests while this one awaits.
+    Only one request is profiled at a time; others run unprofiled.
     """
-    start_time = time.time()
 
-    response = await call_next(request)
+    HEADER = b"x-profile"
+    REPORT_LINES = 40
+
+    def __init__(self, app: ASGIApp, directory: str = "profiles", sample_rate: float = 0.0):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Next ASGI application
+            directory: Directory to write profiles to
+            sample_rate: Fraction of requests to profile without the header
+        """
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request, under the profiler if it is selected."""
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        mode = None
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                mode = value.decode("latin-1").strip().lower()
+                break
+        if mode is None and not (self.sample_rate and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
 
-    duration = time.time() - start_time
+        import cProfile
 
-    logger.info(
-        f"{request.method} {request.url.path}",
-        extra={
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": response.status_code,
-            "duration_ms": round(duration * 1000, 2),
-        },
-    )
+        self._active = True
+        profiler = cProfile.Profile()
+        try:
+            if mode == "inline":
+                await self._profile_inline(profiler, scope, receive, send)
+            else:
+                await self._profile_to_file(profiler, scope, receive, send)
+        finally:
+            self._active = False
+
+    async def _profile_to_file(
+        self, profiler: "cProfile.Profile", scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Profile a request and write the profile to the profile directory."""
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        filename = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}-{slug}.prof"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", filename.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            path = os.path.join(self.directory, filename)
+            await asyncio.to_thread(self._dump, profiler, path)
+            logger.info(
+                "Request profile written",
+                extra={"method": scope["method"], "path": scope["path"], "profile": path},
+            )
+
+    async def _profile_inline(
+        self, profiler: "cProfile.Profile", scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Profile a request and send a text report in place of its response."""
+        status_code = 500
+
+        async def capture(message: Message) -> None:
+            # The original response is discarded; only its status is kept
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler.enable()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profiler.disable()
+
+        import pstats
+
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.REPORT_LINES)
+        body = report.getvalue().encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profile-status", str(status_code).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
 
-    return response
+    def _dump(self, profiler: "cProfile.Profile", path: str) -> None:
+        """Write a profile to disk, creating the directory if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(path)
@@ -0,0 +1,309 @@
+"""
+Record processors and the process pool pipeline that runs them.
+
+A processor is a plain function taking a record's ``data`` and returning a
+JSON-compatible output. Records select one through a metadata field
+(``type`` by default) naming a registered processor. Processors run in a
+pool of worker processes, so CPU-heavy transforms never block the event
+loop; they must therefore be importable module-level functions.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from pydantic_core import to_json, to_jsonable_python
+from src.metrics import PROCESSOR_DURATION
+from src.types import DataRecord, ProcessedData, ProcessingResult
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+Processor = Callable[[Dict[str, Any]], Any]
+Record = Union[DataRecord, ProcessedData]
+# (succeeded, output or error message, duration in milliseconds)
+Outcome = Tuple[bool, Any, float]
+
+PROCESSORS: Dict[str, Processor] = {}
+
+DEFAULT_RESULT = ProcessingResult(status="success", message="Data processed successfully")
+
+
+def register_processor(name: str) -> Callable[[Processor], Processor]:
+    """
+    Register a function as the processor for a record type.
+
+    Args:
+        name: Value of the record's type metadata field that selects it
+
+    Returns:
+        Decorator registering the function unchanged
+    """
+
+    def decorator(func: Processor) -> Processor:
+        PROCESSORS[name] = func
+        return func
+
+    return decorator
+
+
+def load_processors(spec: str) -> Dict[str, Processor]:
+    """
+    Register processors from a comma-separated list of
+    ``name=package.module:function`` entries.
+
+    Args:
+        spec: Processor entries, as in the PROCESSORS setting
+
+    Returns:
+        The registry including the loaded processors
+
+    Raises:
+        ValueError: If an entry is malformed or cannot be imported
+    """
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, target = entry.partition("=")
+        module_name, _, attr = target.strip().partition(":")
+        if not name.strip() or not module_name or not attr:
+            raise ValueError(f"Invalid processor entry: {entry!r}")
+        try:
+            func = getattr(importlib.import_module(module_name), attr)
+        except (ImportError, AttributeError) as err:
+            raise ValueError(f"Cannot load processor {entry!r}: {err}") from err
+        PROCESSORS[name.strip()] = func
+    return PROCESSORS
+
+
+def run_batch(tasks: Sequence[Tuple[Processor, Dict[str, Any]]]) -> List[Outcome]:
+    """
+    Run processors on record payloads; executed inside a pool worker.
+
+    Args:
+        tasks: (processor, record data) pairs
+
+    Returns:
+        One outcome per task. A processor error, or an output that is not
+        JSON-compatible, becomes a failed outcome with the error message.
+    """
+    outcomes: List[Outcome] = []
+    for func, data in tasks:
+        started = time.perf_counter()
+        try:
+            outcome: Any = to_jsonable_python(func(data))
+            ok = True
+        except Exception as err:
+            outcome = f"{type(err).__name__}: {err}"
+            ok = False
+        outcomes.append((ok, outcome, (time.perf_counter() - started) * 1000))
+    return outcomes
+
+
+class ProcessorPipeline:
+    """
+    Runs the processor selected by each record's type on a process pool
+    and keeps per-processor timing statistics.
+    """
+
+    def __init__(
+        self,
+        processors: Optional[Dict[str, Processor]] = None,
+        metadata_key: str = "type",
+        pool_size: int = 0,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            processors: Processor name -> function, the global registry by default
+            metadata_key: Metadata field naming the processor for a record
+            pool_size: Number of worker processes, one per CPU core when 0
+        """
+        self.processors = PROCESSORS if processors is None else processors
+        self.metadata_key = metadata_key
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        # processor name -> [runs, errors, total ms, max ms]
+        self._stats: Dict[str, List[float]] = {}
+
+    def select(self, record: Record) -> Optional[str]:
+        """Return the name of the processor for a record, if it has one."""
+        name = (record.metadata or {}).get(self.metadata_key)
+        return name if isinstance(name, str) and name in self.processors else None
+
+    async def run(self, records: Sequence[Record]) -> Dict[str, ProcessingResult]:
+        """
+        Process records and build their results.
+
+        Records without a processor get the default success result without
+        a round trip to the pool. The rest are split into one batch per
+        worker process.
+
+        Args:
+            records: Records to process
+
+        Returns:
+            Record id -> processing result
+        """
+        results: Dict[str, ProcessingResult] = {}
+        selected: List[Tuple[str, str, Dict[str, Any]]] = []
+        for record in records:
+            name = self.select(record)
+            if name is None:
+                results[record.id] = DEFAULT_RESULT
+            else:
+                selected.append((record.id, name, record.data))
+        if not selected:
+            return results
+
+        workers = min(self.pool_size, len(selected))
+        batches = [selected[i::workers] for i in range(workers)]
+        outcomes = await asyncio.gather(*(self._run_batch(batch) for batch in batches))
+        for batch, batch_outcomes in zip(batches, outcomes):
+            for (record_id, name, _), (ok, value, duration_ms) in zip(batch, batch_outcomes):
+                results[record_id] = self.build_result(name, ok, value, duration_ms)
+        return results
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return timing statistics per processor.
+
+        Returns:
+            Processor name -> runs, errors, average and maximum duration in ms
+        """
+        return {
+            name: {
+                "runs": int(runs),
+                "errors": int(errors),
+                "avg_ms": round(total / runs, 3) if runs else 0.0,
+                "max_ms": round(slowest, 3),
+            }
+            for name, (runs, errors, total, slowest) in self._stats.items()
+        }
+
+    def close(self) -> None:
+        """Shut the worker processes down."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def _run_batch(self, batch: Sequence[Tuple[str, str, Dict[str, Any]]]) -> List[Outcome]:
+        """Run one batch on the pool; a pool failure fails every task in it."""
+        from concurrent.futures.process import BrokenProcessPool
+
+        tasks = [(self.processors[name], data) for _, name, data in batch]
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), run_batch, tasks
+            )
+        except BrokenProcessPool as err:
+            # A worker died (e.g. killed by the OOM killer); start a new pool next time
+            self._pool = None
+            message = f"BrokenProcessPool: {err}"
+        except Exception as err:
+            # Payload or processor could not be sent to the worker
+            message = f"{type(err).__name__}: {err}"
+        return [(False, message, 0.0)] * len(batch)
+
+    def _get_pool(self) -> "ProcessPoolExecutor":
+        """Start the worker processes on first use."""
+        if self._pool is None:
+            # Imported here so the multiprocessing machinery is only loaded
+            # when records are processed, not at startup
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Spawn rather than fork: the server process runs threads (log
+            # writer, WAL flusher) that a forked child could deadlock on
+            self._pool = ProcessPoolExecutor(
+                self.pool_size, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def build_result(self, name: str, ok: bool, value: Any, duration_ms: float) -> ProcessingResult:
+        """
+        Record the timing of one run and build its processing result.
+
+        Args:
+            name: Processor name
+            ok: Whether the run succeeded
+            value: Output of the run, or its error message
+            duration_ms: Run time in milliseconds
+
+        Returns:
+            Processing result for the record
+        """
+        stats = self._stats.setdefault(name, [0, 0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += 0 if ok else 1
+        stats[2] += duration_ms
+        stats[3] = max(stats[3], duration_ms)
+        PROCESSOR_DURATION.observe(duration_ms / 1000, name, "success" if ok else "error")
+
+        return ProcessingResult(
+            status="success" if ok else "error",
+            message=f"Processed by {name}" if ok else value,
+            processor=name,
+            output=value if ok else None,
+            durationMs=round(duration_ms, 3),
+        )
+
+
+@register_processor("numeric_summary")
+def numeric_summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize every number in a payload, however deeply nested."""
+    values: List[float] = []
+    stack: List[Any] = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values.append(value)
+    if not values:
+        return {"count": 0}
+    total = sum(values)
+    return {
+        "count": len(values),
+        "sum": total,
+        "mean": total / len(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+@register_processor("text_stats")
+def text_stats(data: Dict[str, Any]) -> Dict[str, int]:
+    """Count characters, words and lines across the strings in a payload."""
+    counts = {"strings": 0, "characters": 0, "words": 0, "lines": 0}
+    stack: List[Any] = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, str):
+            counts["strings"] += 1
+            counts["characters"] += len(value)
+            counts["words"] += len(value.split())
+            counts["lines"] += value.count("\n") + 1
+    return counts
+
+
+@register_processor("checksum")
+def checksum(data: Dict[str, Any]) -> Dict[str, str]:
+    """Compute the SHA-256 of a payload's canonical JSON encoding."""
+    return {"sha256": hashlib.sha256(to_json(_sort_keys(data))).hexdigest()}
+
+
+def _sort_keys(value: Any) -> Any:
+    """Return a copy of a JSON value with every object's keys sorted."""
+    if isinstance(value, dict):
+        return {key: _sort_keys(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sort_keys(item) for item in value]
+    return value
@@ -0,0 +1,117 @@
+"""
+Cache of serialized response bodies for conditional reads.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from src.config import config
+
+
+class ResponseCache:
+    """
+    LRU cache of response bodies, each stored with the version tag it was
+    rendered at.
+
+    A lookup only hits when the caller's current version matches, so an
+    entry is invalidated as soon as the record or store it was rendered
+    from changes. Writes can also invalidate an entry directly.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached bodies (0 disables the cache)
+            max_bytes: Maximum total size of the cached bodies
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: str) -> Optional[bytes]:
+        """
+        Return the body cached for a key at a version.
+
+        Args:
+            key: Cache key
+            version: Current version of the data behind the key
+
+        Returns:
+            The cached body, or None on a miss; a stale entry is dropped
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            if entry is not None:
+                self.invalidate(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def version(self, key: Hashable) -> Optional[str]:
+        """
+        Return the version a key's body is cached at, without counting a lookup.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached version, or None if the key is not cached
+        """
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Hashable, version: str, body: bytes) -> None:
+        """
+        Cache a body rendered at a version, evicting the least recently
+        used bodies beyond the limits.
+
+        Args:
+            key: Cache key
+            version: Version of the data the body was rendered from
+            body: Serialized response body
+        """
+        if not self.max_entries or len(body) > self.max_bytes:
+            return
+        self.invalidate(key)
+        self._entries[key] = (version, body)
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the body cached for a key, if any."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def clear(self) -> None:
+        """Drop every cached body."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return cache statistics.
+
+        Returns:
+            Dictionary with entry count, cached bytes, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global instance
+response_cache = ResponseCache(config.response_cache_entries, config.response_cache_max_bytes)
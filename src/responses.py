@@ -0,0 +1,24 @@
+"""
+Response classes.
+"""
+
+from typing import Any
+from fastapi.responses import Response
+from pydantic_core import to_json
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with pydantic-core's serializer.
+
+    Pydantic models anywhere in the content are encoded straight to bytes
+    in a single pass, without first being dumped to dicts. Handlers return
+    an instance of this class directly, which also skips FastAPI's response
+    validation and ``jsonable_encoder`` pass.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """Encode the content to JSON bytes."""
+        return to_json(content)
@@ -0,0 +1,179 @@
+"""
+Thread-safe dict split into independently locked shards.
+"""
+
+import threading
+from typing import (
+    ContextManager,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class ShardedDict(MutableMapping[K, V], Generic[K, V]):
+    """
+    Mapping whose keys are spread over ``shards`` dicts by hash, each
+    guarded by its own lock.
+
+    Threads working on different keys rarely wait for each other, and each
+    single-key operation is atomic. Bulk reads and writes take each shard's
+    lock once for all of their keys in it. Whole-map views (``keys``,
+    ``values``, ``items`` and iteration) are copies taken one shard at a
+    time: every shard is seen consistently, but not all of them at the
+    same instant. Insertion order is only kept within a shard.
+
+    Check-then-act sequences on one key can hold its shard's lock with
+    ``lock(key)``; the locks are re-entrant, so the mapping can still be
+    used inside.
+    """
+
+    def __init__(self, shards: int = 16):
+        """
+        Initialize an empty mapping.
+
+        Args:
+            shards: Number of shards
+
+        Raises:
+            ValueError: If shards is less than 1
+        """
+        if shards < 1:
+            raise ValueError("A sharded dict needs at least one shard")
+        self._shards: List[Dict[K, V]] = [{} for _ in range(shards)]
+        self._locks = [threading.RLock() for _ in range(shards)]
+
+    @property
+    def shard_count(self) -> int:
+        """Number of shards."""
+        return len(self._shards)
+
+    def lock(self, key: K) -> ContextManager[bool]:
+        """Return the lock of the shard holding a key."""
+        return self._locks[hash(key) % len(self._shards)]
+
+    def __getitem__(self, key: K) -> V:
+        """Return the value for a key."""
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            return self._shards[index][key]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        """Set the value for a key."""
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            self._shards[index][key] = value
+
+    def __delitem__(self, key: K) -> None:
+        """Remove a key."""
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            del self._shards[index][key]
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key is present."""
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            return key in self._shards[index]
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        total = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total += len(shard)
+        return total
+
+    def __iter__(self) -> Iterator[K]:
+        """Iterate over a copy of the keys."""
+        return iter(self.keys())
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:  # type: ignore[override]
+        """Return the value for a key, or a default if it is missing."""
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            return self._shards[index].get(key, default)
+
+    def pop(self, key, default=_MISSING):
+        """Remove a key and return its value, or a default if it is missing."""
+        index = hash(key) % len(self._shards)
+        with self._locks[index]:
+            if default is _MISSING:
+                return self._shards[index].pop(key)
+            return self._shards[index].pop(key, default)
+
+    def get_many(self, keys: Sequence[K]) -> List[Optional[V]]:
+        """
+        Return the values for several keys, in the same order.
+
+        Args:
+            keys: Keys to look up
+
+        Returns:
+            The value for each key, or None where it is missing
+        """
+        found: List[Optional[V]] = [None] * len(keys)
+        for index, positions in self._group(enumerate(keys), lambda item: item[1]).items():
+            shard = self._shards[index]
+            with self._locks[index]:
+                for position, key in positions:
+                    found[position] = shard.get(key)
+        return found
+
+    def update(self, *args, **kwargs) -> None:  # type: ignore[override]
+        """Insert or replace several keys, locking each shard once."""
+        items = dict(*args, **kwargs).items()
+        for index, group in self._group(items, lambda item: item[0]).items():
+            with self._locks[index]:
+                self._shards[index].update(group)
+
+    def keys(self) -> List[K]:  # type: ignore[override]
+        """Return a copy of the keys."""
+        return [key for key, _ in self.items()]
+
+    def values(self) -> List[V]:  # type: ignore[override]
+        """Return a copy of the values."""
+        return [value for _, value in self.items()]
+
+    def items(self) -> List[Tuple[K, V]]:  # type: ignore[override]
+        """Return a copy of the key-value pairs."""
+        pairs: List[Tuple[K, V]] = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                pairs.extend(shard.items())
+        return pairs
+
+    def clear(self) -> None:
+        """Remove every key."""
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+    def shard_sizes(self) -> List[int]:
+        """Return the number of keys in each shard."""
+        sizes = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                sizes.append(len(shard))
+        return sizes
+
+    def _group(self, items: Iterable, key_of) -> Dict[int, list]:
+        """Group items by the shard of their key."""
+        count = len(self._shards)
+        groups: Dict[int, list] = {}
+        for item in items:
+            groups.setdefault(hash(key_of(item)) % count, []).append(item)
+        return groups
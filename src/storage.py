@@ -0,0 +1,712 @@
+"""
+Record storage backends for the data service.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from pydantic_core import to_json
+from src.sharded_dict import ShardedDict
+from src.types import DataRecord, ProcessedData, ProcessingResult
+
+Record = Union[DataRecord, ProcessedData]
+T = TypeVar("T")
+
+
+class RecordStore(ABC):
+    """Interface every record storage backend implements."""
+
+    @abstractmethod
+    async def get(self, record_id: str) -> Optional[Record]:
+        """Return a record by ID, or None if it does not exist."""
+
+    async def get_many(self, record_ids: Sequence[str]) -> List[Optional[Record]]:
+        """Return the records for several IDs, in the same order."""
+        return [await self.get(record_id) for record_id in record_ids]
+
+    @abstractmethod
+    async def put(self, record: Record) -> None:
+        """Insert a record, or replace the stored record with the same ID."""
+
+    async def put_many(self, records: Sequence[Record]) -> None:
+        """Insert or replace several records."""
+        for record in records:
+            await self.put(record)
+
+    async def mark_processed(
+        self,
+        record_ids: Sequence[str],
+        processing_timestamp: datetime,
+        results: Mapping[str, ProcessingResult],
+    ) -> List[str]:
+        """
+        Mark records as processed.
+
+        Args:
+            record_ids: IDs of the records to mark
+            processing_timestamp: Time of processing
+            results: Record id -> processing result to store with it
+
+        Returns:
+            IDs of the records that existed and were not processed before
+        """
+        records = await self.get_many(record_ids)
+        updates = [
+            build_processed(record, processing_timestamp, results.get(record.id))
+            for record in records
+            if record is not None and not record.processed
+        ]
+        await self.put_many(updates)
+        return [record.id for record in updates]
+
+    @abstractmethod
+    async def delete(self, record_id: str) -> bool:
+        """Delete a record, returning False if it did not exist."""
+
+    @abstractmethod
+    def scan(self) -> AsyncIterator[Record]:
+        """Iterate over all records, oldest first."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Return the number of stored records."""
+
+    async def close(self) -> None:
+        """Release any resources held by the store."""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return backend-specific statistics."""
+        return {}
+
+
+class CompactRecord:
+    """
+    Slotted in-memory form of a record.
+
+    Holds the same fields as the Pydantic models without a per-instance
+    ``__dict__`` or validation state, and is only turned into a model when
+    it leaves the store. Processing updates it in place.
+    """
+
+    __slots__ = (
+        "id",
+        "timestamp",
+        "data",
+        "metadata",
+        "processingTimestamp",
+        "status",
+        "message",
+        # (processor, output, duration in ms) for records run by a processor
+        "details",
+        # Bookkeeping for bounded stores: estimated size and when the record
+        # was written to memory
+        "size",
+        "stored",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        timestamp: datetime,
+        data: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        processingTimestamp: Optional[datetime] = None,
+        status: Optional[str] = None,
+        message: Optional[str] = None,
+        details: Optional[Tuple[str, Any, Optional[float]]] = None,
+    ):
+        """Initialize the record."""
+        self.id = id
+        self.timestamp = timestamp
+        self.data = data
+        self.metadata = metadata
+        self.processingTimestamp = processingTimestamp
+        self.status = status
+        self.message = message
+        self.details = details
+        self.size = 0
+        self.stored = 0.0
+
+    @property
+    def processed(self) -> bool:
+        """Return True if the record has been processed."""
+        return self.processingTimestamp is not None
+
+    @classmethod
+    def from_model(cls, record: Record) -> "CompactRecord":
+        """Build the compact form of a record model."""
+        if not isinstance(record, ProcessedData):
+            return cls(record.id, record.timestamp, record.data, record.metadata)
+        result = record.processingResult
+        return cls(
+            record.id,
+            record.timestamp,
+            record.data,
+            record.metadata,
+            record.processingTimestamp,
+            result.status if result else None,
+            result.message if result else None,
+            _result_details(result),
+        )
+
+    def to_model(self) -> Record:
+        """Build the Pydantic model for this record without re-validating it."""
+        if self.processingTimestamp is None:
+            return DataRecord.model_construct(
+                id=self.id,
+                timestamp=self.timestamp,
+                data=self.data,
+                processed=False,
+                metadata=self.metadata,
+            )
+        result = None
+        if self.status is not None:
+            result = ProcessingResult.model_construct(status=self.status, message=self.message)
+            if self.details is not None:
+                result.processor, result.output, result.durationMs = self.details
+        return ProcessedData.model_construct(
+            id=self.id,
+            timestamp=self.timestamp,
+            data=self.data,
+            processed=True,
+            metadata=self.metadata,
+            processingTimestamp=self.processingTimestamp,
+            processingResult=result,
+        )
+
+    def mark_processed(
+        self, processing_timestamp: datetime, result: Optional[ProcessingResult]
+    ) -> None:
+        """Mark the record as processed in place."""
+        self.status = result.status if result else None
+        self.message = result.message if result else None
+        self.details = _result_details(result)
+        # Set last: a snapshot thread reading concurrently must never see a
+        # processed record without its result
+        self.processingTimestamp = processing_timestamp
+
+
+class MemoryRecordStore(RecordStore):
+    """
+    Record store backed by a dict of compact records (the default).
+
+    The store can be bounded by a record count, an estimated size in bytes
+    and a time-to-live since last access. Records over the limits are
+    evicted least recently used first. With a ``spill`` store they move to
+    disk and are loaded back when read; otherwise they are dropped and
+    passed to ``on_drop`` so the owner can forget them.
+
+    An unbounded store can split its records over ``shards`` independently
+    locked dicts, which makes the store itself safe to use from several
+    threads at once. A bounded store keeps one dict in least recently used
+    order, ignores ``shards`` and must stay on the event loop thread.
+    """
+
+    # Estimated memory used by a record besides its JSON-encoded payload
+    RECORD_OVERHEAD_BYTES = 512
+
+    def __init__(
+        self,
+        max_records: int = 0,
+        max_bytes: int = 0,
+        ttl_seconds: float = 0.0,
+        spill: Optional[RecordStore] = None,
+        shards: int = 1,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            max_records: Maximum number of records kept in memory (0 = no limit)
+            max_bytes: Maximum estimated size of the records kept in memory
+                (0 = no limit)
+            ttl_seconds: Evict records this long after they were written to
+                memory, however often they are read (0 = never)
+            spill: Store that evicted records are moved to, if any
+            shards: Number of locked shards for an unbounded store; 1 keeps
+                a plain dict without locking
+        """
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spill = spill
+        self.on_drop: Optional[Callable[[CompactRecord], None]] = None
+        self._bounded = bool(max_records or max_bytes or ttl_seconds)
+
+        # Ordered from least to most recently used when the store is bounded
+        self.records: MutableMapping[str, CompactRecord] = {}
+        self._lock: Callable[[str], ContextManager[Any]] = _no_lock
+        if shards > 1 and not self._bounded:
+            sharded: ShardedDict[str, CompactRecord] = ShardedDict(shards)
+            self.records, self._lock = sharded, sharded.lock
+
+        # Ids whose current version lives in the spill store, and records
+        # whose spill write is still in flight
+        self._spilled: Set[str] = set()
+        self._spilling: Dict[str, CompactRecord] = {}
+        self._bytes = 0
+        # Records in the order they were written, when they can expire
+        self._expiry: Dict[str, CompactRecord] = {}
+
+        # Counters exposed through get_stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+
+    async def get(self, record_id: str) -> Optional[Record]:
+        """Return a record by ID, or None if it does not exist."""
+        return (await self.get_many([record_id]))[0]
+
+    async def get_many(self, record_ids: Sequence[str]) -> List[Optional[Record]]:
+        """Return the records for several IDs, in the same order."""
+        records = self.records
+        if not self._bounded:
+            found = (
+                records.get_many(record_ids)
+                if isinstance(records, ShardedDict)
+                else map(records.get, record_ids)
+            )
+            return [compact.to_model() if compact is not None else None for compact in found]
+
+        # Expired records are gone before the lookup, so they count as misses
+        await self.expire()
+        missing = [record_id for record_id in record_ids if record_id not in records]
+        self.hits += len(record_ids) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            await self._load(missing)
+
+        found = []
+        for record_id in record_ids:
+            compact = records.get(record_id)
+            if compact is None:
+                found.append(None)
+                continue
+            self._touch(compact)
+            found.append(compact.to_model())
+        if missing:
+            await self._evict()
+        return found
+
+    async def put(self, record: Record) -> None:
+        """Insert a record, or replace the stored record with the same ID."""
+        await self.put_many([record])
+
+    async def put_many(self, records: Sequence[Record]) -> None:
+        """Insert or replace several records."""
+        if not self._bounded:
+            self.records.update((record.id, CompactRecord.from_model(record)) for record in records)
+            return
+
+        for record in records:
+            self._forget(record.id)
+            self._insert(CompactRecord.from_model(record))
+        await self._evict()
+
+    async def mark_processed(
+        self,
+        record_ids: Sequence[str],
+        processing_timestamp: datetime,
+        results: Mapping[str, ProcessingResult],
+    ) -> List[str]:
+        """Mark records as processed in place, without copying their payloads."""
+        await self.expire()
+        spilled = [record_id for record_id in record_ids if record_id in self._spilled]
+        if spilled:
+            await self._load(spilled)
+
+        marked = []
+        for record_id in record_ids:
+            # Held so that concurrent calls mark a record only once
+            with self._lock(record_id):
+                compact = self.records.get(record_id)
+                if compact is not None and not compact.processed:
+                    compact.mark_processed(processing_timestamp, results.get(record_id))
+                    marked.append(record_id)
+        if spilled:
+            await self._evict()
+        return marked
+
+    async def delete(self, record_id: str) -> bool:
+        """Delete a record, returning False if it did not exist."""
+        spilled = record_id in self._spilled
+        existed = self._forget(record_id)
+        if spilled and self.spill is not None:
+            await self.spill.delete(record_id)
+        return existed
+
+    async def scan(self) -> AsyncIterator[Record]:
+        """
+        Iterate over all records, those in memory first.
+
+        Records in memory come in insertion order. Shards do not keep a
+        common order, so a sharded store yields them by ingestion timestamp.
+        """
+        await self.expire()
+        # Copy so that writes during iteration cannot invalidate it
+        compacts = list(self.records.values())
+        if isinstance(self.records, ShardedDict):
+            compacts.sort(key=lambda compact: compact.timestamp)
+        for compact in compacts:
+            yield compact.to_model()
+        if self.spill is not None and self._spilled:
+            async for record in self.spill.scan():
+                if record.id in self._spilled:
+                    yield record
+
+    async def count(self) -> int:
+        """Return the number of stored records."""
+        await self.expire()
+        return len(self.records) + len(self._spilled)
+
+    async def close(self) -> None:
+        """Close the spill store, if any."""
+        if self.spill is not None:
+            await self.spill.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return memory usage and eviction statistics.
+
+        Returns:
+            Dictionary with in-memory and spilled record counts, the
+            estimated size of records in memory, cache hits and misses,
+            and eviction, expiration and load counts
+        """
+        lookups = self.hits + self.misses
+        return {
+            "in_memory": len(self.records),
+            "shards": self.records.shard_count if isinstance(self.records, ShardedDict) else 1,
+            "spilled": len(self._spilled),
+            "estimated_bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "loads": self.loads,
+        }
+
+    async def evict(self) -> None:
+        """Evict records over the configured limits."""
+        if self._bounded:
+            await self._evict()
+
+    async def expire(self) -> None:
+        """Evict records whose time-to-live has passed, if there are any."""
+        if self._expiry:
+            oldest = next(iter(self._expiry.values()))
+            if oldest.stored < time.monotonic() - self.ttl_seconds:
+                await self._evict()
+
+    def _insert(self, compact: CompactRecord) -> None:
+        """Add a record as the most recently used and most recently written one."""
+        if self.ttl_seconds:
+            compact.stored = time.monotonic()
+            self._expiry[compact.id] = compact
+        if self.max_bytes:
+            compact.size = self.RECORD_OVERHEAD_BYTES + len(to_json(compact.data, fallback=str))
+            if compact.metadata:
+                compact.size += len(to_json(compact.metadata, fallback=str))
+            self._bytes += compact.size
+        self.records[compact.id] = compact
+
+    def _touch(self, compact: CompactRecord) -> None:
+        """Mark a record in memory as the most recently used one."""
+        self.records[compact.id] = self.records.pop(compact.id)
+
+    def _forget(self, record_id: str) -> bool:
+        """Remove a record from memory and the spill bookkeeping."""
+        compact = self.records.pop(record_id, None)
+        if compact is not None:
+            self._bytes -= compact.size
+            self._expiry.pop(record_id, None)
+        spilled = record_id in self._spilled
+        self._spilled.discard(record_id)
+        self._spilling.pop(record_id, None)
+        return compact is not None or spilled
+
+    async def _load(self, record_ids: List[str]) -> None:
+        """Move spilled records back into memory."""
+        wanted = [record_id for record_id in record_ids if record_id in self._spilled]
+        if not wanted or self.spill is None:
+            return
+
+        # Records whose spill write has not finished are still at hand
+        pending = [self._spilling[i] for i in wanted if i in self._spilling]
+        fetch = [i for i in wanted if i not in self._spilling]
+        fetched = [
+            CompactRecord.from_model(record)
+            for record in await self.spill.get_many(fetch)
+            if record is not None
+        ]
+
+        for compact in pending + fetched:
+            # Skip records deleted or reloaded while the read was running
+            if compact.id in self._spilled:
+                self._spilled.discard(compact.id)
+                self._spilling.pop(compact.id, None)
+                self._insert(compact)
+                self.loads += 1
+
+    async def _evict(self) -> None:
+        """Evict expired records, then least recently used ones over the limits."""
+        records = self.records
+        victims: List[CompactRecord] = []
+        if self.ttl_seconds:
+            deadline = time.monotonic() - self.ttl_seconds
+            for compact in self._expiry.values():
+                if compact.stored >= deadline:
+                    break
+                victims.append(compact)
+            self.expirations += len(victims)
+
+        excess_records = len(records) - len(victims) - self.max_records if self.max_records else 0
+        excess_bytes = self._bytes - self.max_bytes if self.max_bytes else 0
+        excess_bytes -= sum(compact.size for compact in victims)
+        if excess_records > 0 or excess_bytes > 0:
+            expired = {compact.id for compact in victims}
+            for compact in records.values():
+                if excess_records <= 0 and excess_bytes <= 0:
+                    break
+                if compact.id not in expired:
+                    victims.append(compact)
+                    excess_records -= 1
+                    excess_bytes -= compact.size
+        if not victims:
+            return
+
+        for compact in victims:
+            del records[compact.id]
+            self._expiry.pop(compact.id, None)
+            self._bytes -= compact.size
+        self.evictions += len(victims)
+
+        if self.spill is None:
+            if self.on_drop is not None:
+                for compact in victims:
+                    self.on_drop(compact)
+            return
+
+        for compact in victims:
+            self._spilled.add(compact.id)
+            self._spilling[compact.id] = compact
+        try:
+            await self.spill.put_many([compact.to_model() for compact in victims])
+        finally:
+            for compact in victims:
+                if self._spilling.get(compact.id) is compact:
+                    del self._spilling[compact.id]
+
+
+class SQLiteRecordStore(RecordStore):
+    """
+    Record store backed by an SQLite database file.
+
+    Queries run on a bounded thread pool so the event loop never blocks on
+    disk I/O: reads share ``pool_size`` threads while all writes go through
+    a single writer thread, which avoids lock contention between writers.
+    Each thread keeps its own connection, and because every query uses a
+    fixed SQL string, sqlite3's per-connection statement cache reuses the
+    prepared statements.
+    """
+
+    SCAN_BATCH_SIZE = 1000
+
+    def __init__(self, path: str, pool_size: int = 4):
+        """
+        Initialize the store, creating the schema if needed.
+
+        Args:
+            path: Path of the database file
+            pool_size: Number of threads serving read queries
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="sqlite-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "id TEXT NOT NULL UNIQUE, "
+            "processed INTEGER NOT NULL, "
+            "body TEXT NOT NULL)"
+        )
+        conn.commit()
+
+    async def get(self, record_id: str) -> Optional[Record]:
+        """Return a record by ID, or None if it does not exist."""
+
+        def read(conn: sqlite3.Connection) -> Optional[Record]:
+            row = conn.execute(
+                "SELECT processed, body FROM records WHERE id = ?", (record_id,)
+            ).fetchone()
+            return _decode(row) if row else None
+
+        return await self._read(read)
+
+    async def get_many(self, record_ids: Sequence[str]) -> List[Optional[Record]]:
+        """Return the records for several IDs, in the same order."""
+        if not record_ids:
+            return []
+        ids = list(record_ids)
+        placeholders = ",".join("?" * len(ids))
+
+        def read(conn: sqlite3.Connection) -> List[Optional[Record]]:
+            rows = conn.execute(
+                f"SELECT id, processed, body FROM records WHERE id IN ({placeholders})", ids
+            ).fetchall()
+            by_id = {row[0]: _decode(row[1:]) for row in rows}
+            return [by_id.get(record_id) for record_id in ids]
+
+        return await self._read(read)
+
+    async def put(self, record: Record) -> None:
+        """Insert a record, or replace the stored record with the same ID."""
+        await self.put_many([record])
+
+    async def put_many(self, records: Sequence[Record]) -> None:
+        """Insert or replace several records in a single transaction."""
+
+        def write(conn: sqlite3.Connection) -> None:
+            rows = [
+                (record.id, int(record.processed), record.model_dump_json()) for record in records
+            ]
+            with conn:
+                conn.executemany(
+                    "INSERT INTO records (id, processed, body) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET "
+                    "processed = excluded.processed, body = excluded.body",
+                    rows,
+                )
+
+        await self._write(write)
+
+    async def delete(self, record_id: str) -> bool:
+        """Delete a record, returning False if it did not exist."""
+
+        def write(conn: sqlite3.Connection) -> bool:
+            with conn:
+                cursor = conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+            return cursor.rowcount > 0
+
+        return await self._write(write)
+
+    async def scan(self) -> AsyncIterator[Record]:
+        """Iterate over all records in insertion order, one batch per query."""
+        last_seq = 0
+        while True:
+            rows = await self._read(
+                lambda conn: conn.execute(
+                    "SELECT seq, processed, body FROM records WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (last_seq, self.SCAN_BATCH_SIZE),
+                ).fetchall()
+            )
+            records = await self._read(lambda _: [_decode(row[1:]) for row in rows])
+            for record in records:
+                yield record
+            if len(rows) < self.SCAN_BATCH_SIZE:
+                return
+            last_seq = rows[-1][0]
+
+    async def count(self) -> int:
+        """Return the number of stored records."""
+        row = await self._read(lambda conn: conn.execute("SELECT COUNT(*) FROM records").fetchone())
+        return int(row[0])
+
+    async def close(self) -> None:
+        """Shut down the thread pools and close every connection."""
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+    async def _read(self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """Run a query on the reader pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._run, query)
+
+    async def _write(self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """Run a query on the writer thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._run, query)
+
+    def _run(self, query: Callable[[sqlite3.Connection], T]) -> T:
+        """Run a query with the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return query(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for concurrent access."""
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+
+def build_processed(
+    record: Record, processing_timestamp: datetime, result: Optional[ProcessingResult]
+) -> ProcessedData:
+    """Build the processed version of a record, sharing its payload."""
+    return ProcessedData.model_construct(
+        id=record.id,
+        timestamp=record.timestamp,
+        data=record.data,
+        processed=True,
+        metadata=record.metadata,
+        processingTimestamp=processing_timestamp,
+        processingResult=result,
+    )
+
+
+def _no_lock(record_id: str) -> ContextManager[None]:
+    """Stand-in for a shard lock when the store is confined to one thread."""
+    return nullcontext()
+
+
+def _result_details(
+    result: Optional[ProcessingResult],
+) -> Optional[Tuple[str, Any, Optional[float]]]:
+    """Pack the processor fields of a result, or None when no processor ran."""
+    if result is None or result.processor is None:
+        return None
+    return (result.processor, result.output, result.durationMs)
+
+
+def _decode(row: Any) -> Record:
+    """Build a record model from a (processed, body) row."""
+    processed, body = row
+    model = ProcessedData if processed else DataRecord
+    return model.model_validate_json(body)
@@ -0,0 +1,283 @@
+"""
+Client for a data service running in a store server process.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from src.store_protocol import encode_message, read_message
+from src.types import DataRecord, ProcessedData, ProcessingJob, RecordFilter
+
+Record = Union[DataRecord, ProcessedData]
+
+
+class RemoteDataService:
+    """
+    Drop-in replacement for DataService that forwards every call to a store
+    server over a Unix socket.
+
+    Each process keeps a single connection per event loop and pipelines
+    concurrent calls over it, matching responses to calls by id.
+    """
+
+    def __init__(self, socket_path: str):
+        """
+        Initialize the client.
+
+        Args:
+            socket_path: Path of the store server's Unix socket
+        """
+        self.socket_path = socket_path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional["asyncio.Task[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connecting: Optional["asyncio.Future[None]"] = None
+        self._pending: Dict[int, "asyncio.Future[Tuple[Any, bytes]]"] = {}
+        self._next_id = 0
+
+    async def start(self) -> None:
+        """Connect to the store server."""
+        await self._connect()
+
+    async def shutdown(self) -> None:
+        """Close the connection; the store server keeps running."""
+        await self.stop_workers()
+
+    async def stop_workers(self) -> None:
+        """Close the connection bound to the current event loop."""
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self._writer = None
+        self._reader_task = None
+        self._loop = None
+
+    async def ingest_data(
+        self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+    ) -> DataRecord:
+        """Ingest new data."""
+        return DataRecord.model_validate(await self._call("ingest_data", data, metadata))
+
+    async def ingest_data_json(
+        self, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """Ingest new data and return the created record rendered as JSON."""
+        _, body = await self._call_payload("ingest_data_json", data, metadata)
+        return body
+
+    async def ingest_idempotent(
+        self, key: str, data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[DataRecord, bool]:
+        """Ingest new data at most once per idempotency key."""
+        record, replayed = await self._call("ingest_idempotent", key, data, metadata)
+        return _to_record(record), replayed
+
+    async def ingest_batch(
+        self, items: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]
+    ) -> List[DataRecord]:
+        """Ingest a chunk of already validated data in one call."""
+        records = await self._call("ingest_batch", items)
+        return [DataRecord.model_validate(record) for record in records]
+
+    async def process_data(self, record_id: str) -> ProcessedData:
+        """Process a data record."""
+        return ProcessedData.model_validate(await self._call("process_data", record_id))
+
+    async def enqueue_processing(
+        self,
+        record_ids: Optional[List[str]] = None,
+        all_unprocessed: bool = False,
+        vectorized: bool = False,
+    ) -> ProcessingJob:
+        """Enqueue records for processing by the background workers."""
+        job = await self._call("enqueue_processing", record_ids, all_unprocessed, vectorized)
+        return ProcessingJob.model_validate(job)
+
+    async def get_job(self, job_id: str) -> Optional[ProcessingJob]:
+        """Get a background processing job by ID."""
+        job = await self._call("get_job", job_id)
+        return ProcessingJob.model_validate(job) if job is not None else None
+
+    async def get_queue_stats(self) -> Dict[str, Any]:
+        """Get background processing queue statistics."""
+        stats: Dict[str, Any] = await self._call("get_queue_stats")
+        return stats
+
+    async def get_counters(self) -> Dict[str, float]:
+        """Get the record counters kept by the store server."""
+        counters: Dict[str, float] = await self._call("get_counters")
+        return counters
+
+    async def get_data(self, record_id: str) -> Optional[Record]:
+        """Get a data record by ID."""
+        record = await self._call("get_data", record_id)
+        return _to_record(record) if record is not None else None
+
+    async def get_record_json(
+        self, record_id: str, known_version: Optional[str] = None
+    ) -> Optional[Tuple[str, Optional[bytes]]]:
+        """Get a record rendered as JSON, with its version tag, in one call."""
+        result, body = await self._call_payload("get_record_json", record_id, known_version)
+        if result is None:
+            return None
+        version, has_body = result
+        return version, body if has_body else None
+
+    async def get_version(self, record_id: Optional[str] = None) -> Optional[str]:
+        """Get the version tag of a record or of the whole store."""
+        version: Optional[str] = await self._call("get_version", record_id)
+        return version
+
+    async def get_all_data(self, limit: int = 100, offset: int = 0) -> List[Record]:
+        """Get all data records with pagination."""
+        records, _ = await self.get_page(limit, offset)
+        return records
+
+    async def get_page(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[RecordFilter] = None,
+    ) -> Tuple[List[Record], Optional[str]]:
+        """Get a page of data records and the cursor for the next page."""
+        records, next_cursor = await self._call("get_page", limit, offset, cursor, filters)
+        return [_to_record(record) for record in records], next_cursor
+
+    async def get_page_json(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[RecordFilter] = None,
+        known_version: Optional[str] = None,
+    ) -> Tuple[str, Optional[Tuple[bytes, Optional[str], Dict[str, int]]]]:
+        """Get a page of records rendered as JSON, with the store's version and stats."""
+        (version, page), body = await self._call_payload(
+            "get_page_json", limit, offset, cursor, filters, known_version
+        )
+        if page is None:
+            return version, None
+        next_cursor, stats = page
+        return version, (body, next_cursor, stats)
+
+    async def iter_records(
+        self, filters: Optional[RecordFilter] = None, batch_size: int = 500
+    ) -> AsyncIterator[List[Record]]:
+        """Iterate over every record matching a filter, one page at a time."""
+        cursor: Optional[str] = None
+        while True:
+            records, cursor = await self.get_page(batch_size, 0, cursor, filters)
+            if records:
+                yield records
+            if cursor is None:
+                return
+
+    async def validate_filter(self, filters: RecordFilter, cursor: Optional[str] = None) -> None:
+        """Check that a filter, and a cursor paging through it, can be answered."""
+        await self._call("validate_filter", filters, cursor)
+
+    async def delete_data(self, record_id: str) -> bool:
+        """Delete a data record."""
+        deleted: bool = await self._call("delete_data", record_id)
+        return deleted
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Get statistics about stored data."""
+        stats: Dict[str, int] = await self._call("get_stats")
+        return stats
+
+    async def add_metadata_index(self, key: str) -> None:
+        """Declare a metadata key as indexed and index the existing records."""
+        await self._call("add_metadata_index", key)
+
+    async def get_detailed_stats(self) -> Dict[str, Any]:
+        """Get detailed statistics about stored data."""
+        stats: Dict[str, Any] = await self._call("get_detailed_stats")
+        return stats
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        """
+        Call a data service method on the store server.
+
+        Raises:
+            ValueError: If the method raised a ValueError on the server
+            RuntimeError: If it raised any other exception
+            ConnectionError: If the connection to the server is lost
+        """
+        result, _ = await self._call_payload(method, *args)
+        return result
+
+    async def _call_payload(self, method: str, *args: Any) -> Tuple[Any, bytes]:
+        """
+        Call a data service method on the store server and return its
+        result with the raw payload sent after it.
+
+        Raises:
+            ValueError: If the method raised a ValueError on the server
+            RuntimeError: If it raised any other exception
+            ConnectionError: If the connection to the server is lost
+        """
+        await self._connect()
+        assert self._writer is not None and self._loop is not None
+
+        call_id = self._next_id
+        self._next_id += 1
+        future: "asyncio.Future[Tuple[Any, bytes]]" = self._loop.create_future()
+        self._pending[call_id] = future
+        self._writer.write(encode_message([call_id, method, list(args)]))
+        return await future
+
+    async def _connect(self) -> None:
+        """Open the connection for the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._writer is not None and self._loop is loop:
+            return
+        # Concurrent first calls share one connection attempt
+        if self._connecting is not None and self._loop is loop:
+            await asyncio.shield(self._connecting)
+            return
+
+        self._loop = loop
+        self._connecting = loop.create_future()
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        except BaseException as err:
+            self._connecting.set_exception(err)
+            self._connecting.exception()  # mark retrieved
+            self._connecting = None
+            self._loop = None
+            raise
+        self._writer = writer
+        self._pending = {}
+        self._reader_task = loop.create_task(self._read_responses(reader))
+        self._connecting.set_result(None)
+        self._connecting = None
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        """Resolve pending calls as their responses arrive."""
+        try:
+            while True:
+                (call_id, ok, result), payload = await read_message(reader)
+                future = self._pending.pop(call_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result((result, payload))
+                else:
+                    error_type, message = result
+                    error = ValueError if error_type == "ValueError" else RuntimeError
+                    future.set_exception(error(message))
+        except (asyncio.IncompleteReadError, ConnectionError) as err:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Store server connection lost: {err}"))
+            self._pending = {}
+            self._writer = None
+
+
+def _to_record(record: Dict[str, Any]) -> Record:
+    """Build the record model for a serialized record."""
+    model = ProcessedData if record.get("processed") else DataRecord
+    return model.model_validate(record)
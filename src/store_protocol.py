@@ -0,0 +1,47 @@
+"""
+Wire format shared by the store server and its clients.
+
+Every message is a header of two 4-byte big-endian lengths, a JSON array
+and a payload of raw bytes. The array is ``[call id, method, args]`` for
+requests and ``[call id, ok, result]`` for responses, where a failed
+call's result is ``[exception type, message]``. The payload carries
+already serialized JSON, such as records rendered by the store server,
+so that it is neither escaped into nor parsed out of the array. Calls on
+one connection are pipelined and answered in any order.
+"""
+
+import asyncio
+import struct
+from typing import Any, NamedTuple, Tuple
+from pydantic_core import from_json, to_json
+
+_HEADER = struct.Struct("!II")
+
+
+class Payload(NamedTuple):
+    """A call result sent with raw bytes after its JSON part."""
+
+    result: Any
+    data: bytes
+
+
+def encode_message(message: Any, payload: bytes = b"") -> bytes:
+    """Frame a message and its payload for the socket."""
+    body = to_json(message)
+    return _HEADER.pack(len(body), len(payload)) + body + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[Any, bytes]:
+    """
+    Read one framed message.
+
+    Returns:
+        The decoded message and its payload, empty if it has none
+
+    Raises:
+        asyncio.IncompleteReadError: If the connection closes mid-message
+    """
+    length, payload_length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    message = from_json(await reader.readexactly(length))
+    payload = await reader.readexactly(payload_length) if payload_length else b""
+    return message, payload
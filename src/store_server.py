@@ -0,0 +1,190 @@
+"""
+Store server hosting the data service for multiple web workers.
+
+Run it with ``python -m src.store_server --socket PATH``. Web workers started
+with ``STORE_SOCKET=PATH`` talk to it through RemoteDataService, so every
+worker sees the same records, indexes, jobs and durable storage.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pydantic_core import to_jsonable_python
+from src.data_service import DataService, data_service
+from src.logger import logger
+from src.store_protocol import Payload, encode_message, read_message
+from src.types import RecordFilter
+
+
+def _decode_filter(value: Any) -> Any:
+    """Rebuild a record filter sent over the socket."""
+    return RecordFilter.model_validate(value) if value is not None else None
+
+
+def _method_table(service: DataService) -> Dict[str, Callable[..., Awaitable[Any]]]:
+    """Map wire method names to calls on the data service."""
+
+    async def get_page(limit, offset=0, cursor=None, filters=None):
+        return await service.get_page(limit, offset, cursor, _decode_filter(filters))
+
+    async def validate_filter(filters, cursor=None):
+        return await service.validate_filter(_decode_filter(filters), cursor)
+
+    async def ingest_batch(items):
+        return await service.ingest_batch([(data, metadata) for data, metadata in items])
+
+    async def ingest_data_json(data, metadata=None):
+        return Payload(None, await service.ingest_data_json(data, metadata))
+
+    async def get_record_json(record_id, known_version=None):
+        found = await service.get_record_json(record_id, known_version)
+        if found is None:
+            return None
+        version, body = found
+        return Payload([version, body is not None], body or b"")
+
+    async def get_page_json(limit, offset=0, cursor=None, filters=None, known_version=None):
+        version, page = await service.get_page_json(
+            limit, offset, cursor, _decode_filter(filters), known_version
+        )
+        if page is None:
+            return Payload([version, None], b"")
+        records, next_cursor, stats = page
+        return Payload([version, [next_cursor, stats]], records)
+
+    return {
+        "ingest_data": service.ingest_data,
+        "ingest_data_json": ingest_data_json,
+        "ingest_batch": ingest_batch,
+        "ingest_idempotent": service.ingest_idempotent,
+        "process_data": service.process_data,
+        "enqueue_processing": service.enqueue_processing,
+        "get_job": service.get_job,
+        "get_queue_stats": service.get_queue_stats,
+        "get_counters": service.get_counters,
+        "get_data": service.get_data,
+        "get_version": service.get_version,
+        "get_page": get_page,
+        "get_record_json": get_record_json,
+        "get_page_json": get_page_json,
+        "validate_filter": validate_filter,
+        "delete_data": service.delete_data,
+        "get_stats": service.get_stats,
+        "get_detailed_stats": service.get_detailed_stats,
+        "add_metadata_index": service.add_metadata_index,
+    }
+
+
+class StoreServer:
+    """Serves data service calls over a Unix socket."""
+
+    def __init__(self, service: DataService, socket_path: str):
+        """
+        Initialize the server.
+
+        Args:
+            service: Data service to host
+            socket_path: Path to listen on; a stale socket file is replaced
+        """
+        self.service = service
+        self.socket_path = socket_path
+        self._methods = _method_table(service)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start the data service and begin accepting connections."""
+        await self.service.start()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info("Store server listening", extra={"socket": self.socket_path})
+
+    async def stop(self) -> None:
+        """Stop accepting connections and shut the data service down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.service.shutdown()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection until it closes."""
+        tasks: List["asyncio.Task[None]"] = []
+        try:
+            while True:
+                (call_id, method, args), _ = await read_message(reader)
+                # Calls run concurrently, so a slow one does not block the rest
+                task = asyncio.create_task(self._dispatch(writer, call_id, method, args))
+                tasks.append(task)
+                task.add_done_callback(tasks.remove)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _dispatch(
+        self, writer: asyncio.StreamWriter, call_id: int, method: str, args: List[Any]
+    ) -> None:
+        """Run one call and write its response."""
+        try:
+            handler = self._methods.get(method)
+            if handler is None:
+                raise ValueError(f"Unknown store method: {method}")
+            result = await handler(*args)
+            if isinstance(result, Payload):
+                message = encode_message(
+                    [call_id, True, to_jsonable_python(result.result)], result.data
+                )
+            else:
+                message = encode_message([call_id, True, to_jsonable_python(result)])
+        except Exception as err:
+            if not isinstance(err, ValueError):
+                logger.error("Store call failed", extra={"method": method, "error": str(err)})
+            message = encode_message([call_id, False, [type(err).__name__, str(err)]])
+        if not writer.is_closing():
+            writer.write(message)
+
+
+async def serve(socket_path: str, service: Optional[DataService] = None) -> None:
+    """
+    Run a store server until SIGTERM or SIGINT.
+
+    Args:
+        socket_path: Path of the Unix socket to listen on
+        service: Data service to host, the global one by default
+
+    Raises:
+        RuntimeError: If the global data service is itself a store client
+    """
+    if service is None:
+        if not isinstance(data_service, DataService):
+            raise RuntimeError("The store server cannot run with STORE_SOCKET set")
+        service = data_service
+    server = StoreServer(service, socket_path)
+    await server.start()
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        logger.info("Store server shutting down")
+        await server.stop()
+
+
+def run_store_server(socket_path: str) -> None:
+    """Run a store server in the current process."""
+    asyncio.run(serve(socket_path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    run_store_server(parser.parse_args().socket)
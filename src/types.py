@@ -3,7 +3,7 @@ Type definitions for the API.
 """
 
 from datetime import datetime
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -22,6 +22,9 @@ class ProcessingResult(BaseModel):
 
     status: Literal["success", "error"]
     message: Optional[str] = None
+    processor: Optional[str] = None
+    output: Optional[Any] = None
+    durationMs: Optional[float] = None
 
 
 class ProcessedData(DataRecord):
@@ -39,6 +42,38 @@ class IngestDataRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(None, description="Optional metadata")
 
 
+class RecordFilter(BaseModel):
+    """Model for record listing filters."""
+
+    metadata: Dict[str, str] = Field(default_factory=dict)
+    processed: Optional[bool] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    time_field: Literal["timestamp", "processingTimestamp"] = "timestamp"
+
+
+class ProcessJobRequest(BaseModel):
+    """Request model for enqueuing a background processing job."""
+
+    ids: Optional[List[str]] = Field(None, description="IDs of the records to process")
+    all_unprocessed: bool = Field(False, description="Process every unprocessed record")
+    vectorized: bool = Field(False, description="Summarize numeric payloads in vectorized batches")
+
+
+class ProcessingJob(BaseModel):
+    """Model for a background processing job."""
+
+    id: str
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    total: int
+    processed: int = 0
+    failed: int = 0
+    vectorized: bool = False
+    createdAt: datetime
+    completedAt: Optional[datetime] = None
+    error: Optional[str] = None
+
+
 class ApiError(BaseModel):
     """Model for API error response."""
 
@@ -0,0 +1,165 @@
+"""
+Vectorized batch processing of numeric record payloads.
+
+Records whose ``data`` holds numbers, either as flat fields or as numeric
+arrays, are grouped by shape (field names and array lengths). Each group is
+stacked into one 2-D array and summarized in a single NumPy pass: mean,
+min, max and standard deviation per record, plus the record's values
+min-max normalized to [0, 1]. NumPy is optional; without it the same
+values are computed in pure Python. It is imported on the first vectorized
+pass rather than at startup.
+"""
+
+import importlib.util
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from src.types import DataRecord, ProcessedData
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Exact types only: bool is a subclass of int but not a number here
+_NUMBER_TYPES = {int, float}
+
+# Processor name recorded in the results of vectorized processing
+PROCESSOR_NAME = "numeric_batch"
+
+Record = Union[DataRecord, ProcessedData]
+# (field name, array length or None for a scalar field) for each numeric field
+Shape = Tuple[Tuple[str, Optional[int]], ...]
+
+
+def numeric_shape(data: Dict[str, Any]) -> Optional[Shape]:
+    """
+    Return the shape of a payload's numeric fields.
+
+    Top-level numbers and lists made only of numbers count as numeric
+    fields; other fields are ignored. Booleans are not numbers here.
+    Element types are checked per list with a set of types, which keeps
+    shape detection from dominating the vectorized pass.
+
+    Args:
+        data: Record payload
+
+    Returns:
+        The shape, or None if the payload has no numeric fields
+    """
+    shape: List[Tuple[str, Optional[int]]] = []
+    for key in sorted(data):
+        value = data[key]
+        if type(value) in _NUMBER_TYPES:
+            shape.append((key, None))
+        elif type(value) is list and value and set(map(type, value)) <= _NUMBER_TYPES:
+            shape.append((key, len(value)))
+    return tuple(shape) or None
+
+
+def summarize_numeric(records: Sequence[Record]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute derived values for every record with numeric fields.
+
+    Args:
+        records: Records to summarize
+
+    Returns:
+        Record id -> output with the summarized ``fields``, ``count``,
+        ``mean``, ``min``, ``max``, ``std`` and the ``normalized`` values in
+        the payload's layout. Records without numeric fields, or with
+        non-finite or out-of-range values, are left out.
+    """
+    groups: Dict[Shape, List[Record]] = {}
+    for record in records:
+        shape = numeric_shape(record.data)
+        if shape is not None:
+            groups.setdefault(shape, []).append(record)
+
+    outputs: Dict[str, Dict[str, Any]] = {}
+    summarize = _summarize_numpy if HAS_NUMPY else _summarize_python
+    for shape, group in groups.items():
+        rows = [_flatten(record.data, shape) for record in group]
+        count = len(rows[0])
+        try:
+            summaries = summarize(rows)
+        except OverflowError:
+            # An integer too large for a float; leave the group out
+            continue
+        for record, stats in zip(group, summaries):
+            if stats is None:
+                continue
+            mean, low, high, std, normalized = stats
+            outputs[record.id] = {
+                "fields": [key for key, _ in shape],
+                "count": count,
+                "mean": mean,
+                "min": low,
+                "max": high,
+                "std": std,
+                "normalized": _unflatten(normalized, shape),
+            }
+    return outputs
+
+
+# (mean, min, max, std, normalized values) for one row
+RowStats = Tuple[float, float, float, float, List[float]]
+
+
+def _summarize_numpy(rows: List[List[float]]) -> List[Optional[RowStats]]:
+    """Summarize equally long rows in one vectorized pass."""
+    import numpy as np
+
+    matrix = np.asarray(rows, dtype=np.float64)
+    finite: List[bool] = np.all(np.isfinite(matrix), axis=1).tolist()
+    lows = matrix.min(axis=1)
+    highs = matrix.max(axis=1)
+    spans = (highs - lows)[:, None]
+    normalized = np.divide(
+        matrix - lows[:, None], spans, out=np.zeros_like(matrix), where=spans > 0
+    )
+    summaries: Iterator[RowStats] = zip(
+        matrix.mean(axis=1).tolist(),
+        lows.tolist(),
+        highs.tolist(),
+        matrix.std(axis=1).tolist(),
+        normalized.tolist(),
+    )
+    return [stats if ok else None for stats, ok in zip(summaries, finite)]
+
+
+def _summarize_python(rows: List[List[float]]) -> List[Optional[RowStats]]:
+    """Summarize rows one at a time, matching _summarize_numpy."""
+    stats: List[Optional[RowStats]] = []
+    for row in rows:
+        if not all(map(math.isfinite, row)):
+            stats.append(None)
+            continue
+        mean = math.fsum(row) / len(row)
+        low, high = float(min(row)), float(max(row))
+        std = math.sqrt(math.fsum((value - mean) ** 2 for value in row) / len(row))
+        span = high - low
+        normalized = [(value - low) / span if span > 0 else 0.0 for value in row]
+        stats.append((mean, low, high, std, normalized))
+    return stats
+
+
+def _flatten(data: Dict[str, Any], shape: Shape) -> List[float]:
+    """Concatenate a payload's numeric fields into one row."""
+    row: List[float] = []
+    for key, length in shape:
+        if length is None:
+            row.append(data[key])
+        else:
+            row.extend(data[key])
+    return row
+
+
+def _unflatten(values: List[float], shape: Shape) -> Dict[str, Any]:
+    """Split a row back into the payload's numeric fields."""
+    fields: Dict[str, Any] = {}
+    pos = 0
+    for key, length in shape:
+        if length is None:
+            fields[key] = values[pos]
+            pos += 1
+        else:
+            fields[key] = values[pos : pos + length]
+            pos += length
+    return fields
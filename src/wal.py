@@ -0,0 +1,314 @@
+"""
+Durable storage for the data service: an append-only write-ahead log with
+group-commit fsync batching and periodic compacted snapshots.
+
+On disk the storage directory holds numbered log segments
+(``wal-00000001.log``) and at most one snapshot (``snapshot-00000003.log``).
+A snapshot numbered N contains every record as of the moment segment N was
+opened, so recovery loads the newest snapshot and replays segments >= N.
+
+Every entry is one line: ``<crc32 hex> <op> <payload>\\n``. A torn or
+corrupted tail entry is detected by its checksum and truncated on replay.
+"""
+
+import asyncio
+import mmap
+import os
+import re
+import threading
+import zlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+from src.logger import logger
+
+# Entry opcodes
+OP_INGEST = b"I"  # payload: DataRecord JSON
+OP_STORED = b"S"  # payload: ProcessedData JSON (snapshot of a processed record)
+OP_PROCESS = b"P"  # payload: {"id", "processingTimestamp", "processingResult"} JSON
+OP_DELETE = b"D"  # payload: record id
+
+_SEGMENT_RE = re.compile(r"^(wal|snapshot)-(\d{8})\.log$")
+
+
+def encode_entry(op: bytes, payload: bytes) -> bytes:
+    """Frame a log entry with its checksum."""
+    crc = zlib.crc32(op + payload)
+    return b"%08x %s %s\n" % (crc, op, payload)
+
+
+def iter_entries(path: str) -> Iterator[Tuple[bytes, bytes, int]]:
+    """
+    Read the framed entries of a log file through a memory map.
+
+    Args:
+        path: Path of the segment or snapshot file
+
+    Yields:
+        (op, payload, end offset) for every valid entry, stopping at the
+        first torn or corrupted one
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            size = len(mm)
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    return
+                line = mm[pos:end]
+                if len(line) < 11 or line[8:9] != b" " or line[10:11] != b" ":
+                    return
+                op, payload = line[9:10], line[11:]
+                try:
+                    crc = int(line[:8], 16)
+                except ValueError:
+                    return
+                if zlib.crc32(op + payload) != crc:
+                    return
+                pos = end + 1
+                yield op, payload, pos
+
+
+class WriteAheadLog:
+    """Append-only operation log with group commit and snapshots."""
+
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval_ms: float = 5.0,
+        sync_commits: bool = True,
+        snapshot_every: int = 100_000,
+    ):
+        """
+        Initialize the log.
+
+        Args:
+            directory: Directory holding segments and snapshots
+            fsync_interval_ms: Maximum time between background flushes when
+                no commit is waiting
+            sync_commits: Whether commit() waits for the fsync covering the
+                caller's entries
+            snapshot_every: Number of logged operations after which a
+                snapshot becomes due
+        """
+        self.directory = directory
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.sync_commits = sync_commits
+        self.snapshot_every = snapshot_every
+
+        os.makedirs(directory, exist_ok=True)
+
+        # _lock guards the in-memory queue and counters and is only held
+        # briefly; _io_lock serializes file writes, fsyncs and rotation so
+        # appenders never wait for the disk.
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending: List[bytes] = []
+        self._appended = 0  # entries accepted by append()
+        self._durable = 0  # entries known to be fsynced
+        self._waiters: List[Tuple[int, asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+        self._ops_since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        segments = self._list("wal")
+        self._segment = segments[-1] if segments else 1
+        self._file = open(self._path("wal", self._segment), "ab")
+
+        # Counters exposed for monitoring
+        self.entries_written = 0
+        self.fsyncs = 0
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def replay(self) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        Yield every entry needed to rebuild the store, oldest first.
+
+        Returns:
+            Iterator of (op, payload) pairs from the newest snapshot and the
+            segments written after it
+        """
+        snapshots = self._list("snapshot")
+        start = 0
+        if snapshots:
+            start = snapshots[-1]
+            for op, payload, _ in iter_entries(self._path("snapshot", start)):
+                yield op, payload
+
+        for segment in self._list("wal"):
+            if segment < start:
+                continue
+            path = self._path("wal", segment)
+            valid_end = 0
+            for op, payload, valid_end in iter_entries(path):
+                yield op, payload
+            if valid_end < os.path.getsize(path):
+                logger.warning(
+                    "Truncating torn write-ahead log tail",
+                    extra={"segment": path, "valid_bytes": valid_end},
+                )
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+
+    def append(self, op: bytes, payload: bytes) -> None:
+        """
+        Queue an entry for the next group commit.
+
+        Args:
+            op: Entry opcode
+            payload: Entry payload
+        """
+        entry = encode_entry(op, payload)
+        with self._lock:
+            self._pending.append(entry)
+            self._appended += 1
+            self._ops_since_snapshot += 1
+
+    async def commit(self) -> None:
+        """Wait until every entry appended so far is fsynced to disk."""
+        if not self.sync_commits:
+            return
+
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+        with self._lock:
+            if self._durable >= self._appended:
+                return
+            self._waiters.append((self._appended, loop, future))
+        self._wakeup.set()
+        await future
+
+    def snapshot_due(self) -> bool:
+        """Return True if enough operations were logged to warrant a snapshot."""
+        return self._ops_since_snapshot >= self.snapshot_every and (
+            self._snapshot_thread is None or not self._snapshot_thread.is_alive()
+        )
+
+    def snapshot(self, entries: Iterable[Tuple[bytes, bytes]]) -> threading.Thread:
+        """
+        Start a compacted snapshot in a background thread.
+
+        The current segment is closed first, so the snapshot together with
+        the segments opened afterwards always describes the full state. The
+        caller must capture ``entries`` at that same point (e.g. from a list
+        of records taken on the event loop thread).
+
+        Args:
+            entries: (op, payload) pairs describing every live record
+
+        Returns:
+            The thread writing the snapshot
+        """
+        with self._io_lock:
+            self._sync()
+            self._file.close()
+            self._segment += 1
+            segment = self._segment
+            self._file = open(self._path("wal", segment), "ab")
+            with self._lock:
+                self._ops_since_snapshot = 0
+
+        thread = threading.Thread(
+            target=self._write_snapshot, args=(segment, entries), name="wal-snapshot", daemon=True
+        )
+        self._snapshot_thread = thread
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """Flush outstanding entries and stop the flusher thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        with self._io_lock:
+            self._sync()
+            self._file.close()
+
+    def _flush_loop(self) -> None:
+        """
+        Flush pending entries every interval, or as soon as a commit waits.
+
+        Entries appended while an fsync is in progress are picked up by the
+        next one, so under load many commits share a single fsync.
+        """
+        while not self._closed:
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            with self._io_lock:
+                self._sync()
+
+    def _sync(self) -> None:
+        """Write and fsync pending entries, then wake their waiters (io lock held)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            target = self._appended
+
+        if pending:
+            self._file.write(b"".join(pending))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.entries_written += len(pending)
+            self.fsyncs += 1
+
+        with self._lock:
+            self._durable = max(self._durable, target)
+            ready = [w for w in self._waiters if w[0] <= self._durable]
+            self._waiters = [w for w in self._waiters if w[0] > self._durable]
+
+        for _, loop, future in ready:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, future)
+
+    def _write_snapshot(self, segment: int, entries: Iterable[Tuple[bytes, bytes]]) -> None:
+        """Write a snapshot file atomically and drop what it supersedes."""
+        final_path = self._path("snapshot", segment)
+        tmp_path = final_path + ".tmp"
+        count = 0
+        with open(tmp_path, "wb") as f:
+            buffer: List[bytes] = []
+            for op, payload in entries:
+                buffer.append(encode_entry(op, payload))
+                count += 1
+                if len(buffer) >= 4096:
+                    f.write(b"".join(buffer))
+                    buffer = []
+            f.write(b"".join(buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, final_path)
+
+        for old in self._list("snapshot"):
+            if old < segment:
+                os.remove(self._path("snapshot", old))
+        for old in self._list("wal"):
+            if old < segment:
+                os.remove(self._path("wal", old))
+
+        logger.info("Snapshot written", extra={"segment": segment, "records": count})
+
+    def _list(self, kind: str) -> List[int]:
+        """List segment numbers of a given kind in ascending order."""
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match and match.group(1) == kind:
+                numbers.append(int(match.group(2)))
+        return sorted(numbers)
+
+    def _path(self, kind: str, number: int) -> str:
+        """Return the path of a segment or snapshot file."""
+        return os.path.join(self.directory, f"{kind}-{number:08d}.log")
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    """Mark a commit waiter as done unless it was cancelled."""
+    if not future.done():
+        future.set_result(None)
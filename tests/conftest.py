@@ -1,8 +1,11 @@
 """Test configuration and fixtures."""
 
+import sys
+import threading
 import pytest
 from httpx import AsyncClient, ASGITransport
 from src.app import create_app
+from src.data_service import data_service
 
 
 @pytest.fixture
@@ -17,3 +20,33 @@ async def client(app):
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+    # Background workers are bound to the per-test event loop
+    await data_service.stop_workers()
+
+
+@pytest.fixture
+def run_threads():
+    """Run a target in threads that start together and switch as often as possible."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    def run(target, count: int) -> None:
+        barrier = threading.Barrier(count)
+        errors = []
+
+        def worker(index: int) -> None:
+            barrier.wait()
+            try:
+                target(index)
+            except BaseException as error:  # pragma: no cover - only on failure
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+
+    yield run
+    sys.setswitchinterval(interval)
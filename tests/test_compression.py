@@ -0,0 +1,218 @@
+"""Tests for response and request body compression."""
+
+import gzip
+import json
+import pytest
+from httpx import ASGITransport, AsyncClient
+from src.app import create_app
+from src.compression import compressor, decompressor, is_available, negotiate
+from src.config import config
+from src.middleware import CompressionMiddleware
+
+ALL_ENCODINGS = ["zstd", "br", "gzip"]
+MIB = 1024 * 1024
+
+
+class TestCodecs:
+    """Test suite for content coding negotiation and codecs."""
+
+    def test_negotiate(self):
+        """Test that q-values rank codings and the server order breaks ties."""
+        assert negotiate("gzip, br", ALL_ENCODINGS) == "br"
+        assert negotiate("gzip;q=1.0, br;q=0.5", ALL_ENCODINGS) == "gzip"
+        assert negotiate("*", ["gzip"]) == "gzip"
+        assert negotiate("gzip;q=0, identity", ["gzip"]) is None
+        assert negotiate("deflate", ALL_ENCODINGS) is None
+
+    @pytest.mark.parametrize("encoding", ALL_ENCODINGS)
+    def test_round_trip(self, encoding):
+        """Test that each available codec decodes what it encoded."""
+        if not is_available(encoding):
+            pytest.skip(f"{encoding} support is not installed")
+        body = b'{"value": 1}\n' * 1000
+        encoder = compressor(encoding)
+        encoded = encoder.compress(body[:5000]) + encoder.compress(body[5000:]) + encoder.flush()
+
+        decoder = decompressor(encoding)
+        assert len(encoded) < len(body)
+        assert decoder.decompress(encoded) == body
+        assert decoder.eof
+
+    @pytest.mark.parametrize("encoding", ALL_ENCODINGS)
+    def test_limited_output(self, encoding):
+        """Test that a highly compressed body is decoded in steps near the output limit."""
+        if not is_available(encoding):
+            pytest.skip(f"{encoding} support is not installed")
+        body = bytes(20 * MIB)
+        encoder = compressor(encoding)
+        encoded = encoder.compress(body) + encoder.flush()
+
+        decoder = decompressor(encoding)
+        parts = [decoder.decompress(encoded, MIB)]
+        while not decoder.needs_input:
+            parts.append(decoder.decompress(b"", MIB))
+        assert len(parts) > 10
+        assert max(len(part) for part in parts) <= 2 * MIB
+        assert b"".join(parts) == body
+        assert decoder.eof
+
+
+@pytest.mark.asyncio
+class TestCompressionMiddleware:
+    """Test suite for compressed responses and request bodies."""
+
+    async def test_large_response_compressed(self, client: AsyncClient):
+        """Test that a large list page is gzip-encoded and a small body is not."""
+        body = "\n".join(json.dumps({"data": {"value": i, "unit": "celsius"}}) for i in range(50))
+        await client.post(
+            "/api/v1/data/batch", content=body, headers={"content-type": "application/x-ndjson"}
+        )
+
+        response = await client.get("/api/v1/data?limit=50", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert len(response.json()["data"]) == 50
+
+        small = await client.get("/api/v1/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+        plain = await client.get("/api/v1/data?limit=50", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.content == response.content
+
+    async def test_not_modified_and_export(self, client: AsyncClient):
+        """Test that 304s stay empty and exports are compressed once."""
+        await client.post("/api/v1/data", json={"data": {"value": 1}})
+        headers = {"Accept-Encoding": "gzip"}
+        first = await client.get("/api/v1/data?limit=5", headers=headers)
+        not_modified = await client.get(
+            "/api/v1/data?limit=5", headers={**headers, "If-None-Match": first.headers["etag"]}
+        )
+        assert not_modified.status_code == 304
+        assert "content-encoding" not in not_modified.headers
+
+        streamed = await client.get("/api/v1/data/export", headers=headers)
+        assert streamed.headers["content-encoding"] == "gzip"
+        assert "content-length" not in streamed.headers
+        assert streamed.text.splitlines()
+
+        exported = await client.get("/api/v1/data/export?gzip=true", headers=headers)
+        assert exported.headers["content-encoding"] == "gzip"
+        assert exported.text == streamed.text
+
+    async def test_compressed_request_body(self, client: AsyncClient):
+        """Test gzip-encoded bulk uploads, and bad or unsupported encodings."""
+        lines = "\n".join(json.dumps({"data": {"value": i}}) for i in range(100)).encode()
+        headers = {"content-type": "application/x-ndjson", "content-encoding": "gzip"}
+
+        response = await client.post(
+            "/api/v1/data/batch", content=gzip.compress(lines), headers=headers
+        )
+        assert response.status_code == 201
+        assert response.json()["data"]["accepted"] == 100
+
+        response = await client.post(
+            "/api/v1/data",
+            content=gzip.compress(b'{"data": {"value": 1}}'),
+            headers={**headers, "content-type": "application/json"},
+        )
+        assert response.status_code == 201
+
+        invalid = await client.post("/api/v1/data/batch", content=lines, headers=headers)
+        assert invalid.status_code == 400
+
+        truncated = await client.post(
+            "/api/v1/data/batch", content=gzip.compress(lines)[:-10], headers=headers
+        )
+        assert truncated.status_code == 400
+        assert "truncated" in truncated.json()["error"]["message"]
+
+        unsupported = await client.post(
+            "/api/v1/data/batch", content=lines, headers={**headers, "content-encoding": "lzma"}
+        )
+        assert unsupported.status_code == 415
+
+    async def test_single_record_body_errors(self, monkeypatch: pytest.MonkeyPatch):
+        """Test that POST /data answers bad and oversized bodies with the API error envelope."""
+        monkeypatch.setattr(config, "compression_max_request_bytes", 1000)
+        transport = ASGITransport(app=create_app())
+        headers = {"content-type": "application/json", "content-encoding": "gzip"}
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            oversized = json.dumps({"data": {"text": "x" * 5000}}).encode()
+            response = await client.post(
+                "/api/v1/data", content=gzip.compress(oversized), headers=headers
+            )
+            assert response.status_code == 413
+            assert response.json()["error"]["statusCode"] == 413
+
+            response = await client.post(
+                "/api/v1/data", content=b"not gzip at all", headers=headers
+            )
+            assert response.status_code == 400
+            assert "not valid gzip" in response.json()["error"]["message"]
+
+            body = gzip.compress(b'{"data": {"value": 1}}')
+            response = await client.post("/api/v1/data", content=body[:-10], headers=headers)
+            assert response.status_code == 400
+            assert "truncated" in response.json()["error"]["message"]
+
+            response = await client.post("/api/v1/data", content=body, headers=headers)
+            assert response.status_code == 201
+
+    @pytest.mark.parametrize("encoding", ALL_ENCODINGS)
+    async def test_request_body_decoded_in_bounded_steps(self, encoding):
+        """Test that the app gets a large body in small pieces and a bomb gets a 413."""
+        if not is_available(encoding):
+            pytest.skip(f"{encoding} support is not installed")
+        received = []
+
+        async def app(scope, receive, send):
+            while True:
+                message = await receive()
+                received.append(len(message["body"]))
+                if not message["more_body"]:
+                    break
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = CompressionMiddleware(app, encodings=[encoding], max_request_bytes=8 * MIB)
+        headers = {"content-encoding": encoding}
+        async with AsyncClient(transport=ASGITransport(app=middleware), base_url="http://t") as c:
+            encoder = compressor(encoding)
+            body = encoder.compress(bytes(6 * MIB)) + encoder.flush()
+            response = await c.post("/", content=body, headers=headers)
+            assert response.status_code == 200
+            assert sum(received) == 6 * MIB
+            assert max(received) <= 2 * MIB
+
+            received.clear()
+            encoder = compressor(encoding)
+            bomb = encoder.compress(bytes(64 * MIB)) + encoder.flush()
+            response = await c.post("/", content=bomb, headers=headers)
+            assert response.status_code == 413
+            # The app read pieces up to the limit, then decoding stopped
+            assert 6 * MIB <= sum(received) <= 8 * MIB
+            assert max(received) <= 2 * MIB
+
+    async def test_codecs_in_worker_thread(self, monkeypatch: pytest.MonkeyPatch):
+        """Test each available coding end to end, with every chunk sent to a thread."""
+        monkeypatch.setattr(config, "compression_thread_min_bytes", 1)
+        monkeypatch.setattr(config, "compression_min_bytes", 1)
+        transport = ASGITransport(app=create_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            for encoding in ALL_ENCODINGS:
+                if not is_available(encoding):
+                    continue
+                response = await client.get("/api/v1/health", headers={"Accept-Encoding": encoding})
+                assert response.headers["content-encoding"] == encoding
+                assert response.json()["status"] == "healthy"
+
+                body = compressor(encoding)
+                content = body.compress(b'{"data": {"value": 1}}') + body.flush()
+                created = await client.post(
+                    "/api/v1/data",
+                    content=content,
+                    headers={"content-type": "application/json", "content-encoding": encoding},
+                )
+                assert created.status_code == 201
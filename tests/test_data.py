@@ -1,7 +1,13 @@
 """Tests for data API endpoints."""
 
+import asyncio
+import json
 import pytest
 from httpx import AsyncClient
+from src import data_routes
+from src.config import config
+from src.data_service import DataService, data_service
+from src.storage import MemoryRecordStore
 
 
 @pytest.mark.asyncio
@@ -179,3 +185,496 @@ class TestDataEndpoints:
 
         assert "error" in data
         assert data["error"]["statusCode"] == 404
+
+    async def test_get_all_data_cursor_pagination(self, client: AsyncClient):
+        """Test walking all records with cursors returns each record exactly once."""
+        created = set()
+        for i in range(5):
+            response = await client.post("/api/v1/data", json={"data": {"seq": i}})
+            created.add(response.json()["data"]["id"])
+
+        # Deleting a record must not break cursors that point past it
+        deleted_id = created.pop()
+        await client.delete(f"/api/v1/data/{deleted_id}")
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/v1/data", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            assert len(body["data"]) <= 2
+            seen.extend(record["id"] for record in body["data"])
+            cursor = body["pagination"]["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == len(set(seen))
+        assert created <= set(seen)
+        assert deleted_id not in seen
+
+    async def test_get_all_data_invalid_cursor(self, client: AsyncClient):
+        """Test that a malformed cursor returns 400."""
+        response = await client.get("/api/v1/data?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+        assert response.json()["error"]["statusCode"] == 400
+
+    async def test_get_stats(self, client: AsyncClient):
+        """Test that stats counters track ingest, process and delete."""
+        before = (await client.get("/api/v1/data/stats")).json()["data"]
+
+        test_data = {"data": {"value": 1}, "metadata": {"stats-key": "a"}}
+        create_response = await client.post("/api/v1/data", json=test_data)
+        record_id = create_response.json()["data"]["id"]
+        await client.post(f"/api/v1/data/{record_id}/process")
+
+        response = await client.get("/api/v1/data/stats")
+        assert response.status_code == 200
+        stats = response.json()["data"]
+
+        assert stats["total"] == before["total"] + 1
+        assert stats["processed"] == before["processed"] + 1
+        assert stats["unprocessed"] == stats["total"] - stats["processed"]
+        assert stats["metadata_keys"]["stats-key"] == 1
+        assert stats["bytes"]["data"] == before["bytes"]["data"] + len('{"value":1}')
+        assert stats["bytes"]["total"] == stats["bytes"]["data"] + stats["bytes"]["metadata"]
+
+        await client.delete(f"/api/v1/data/{record_id}")
+        after = (await client.get("/api/v1/data/stats")).json()["data"]
+
+        assert after["total"] == before["total"]
+        assert after["processed"] == before["processed"]
+        assert after["bytes"] == before["bytes"]
+        assert "stats-key" not in after["metadata_keys"]
+
+    async def test_ingest_batch_json_array(self, client: AsyncClient):
+        """Test bulk ingestion from a JSON array body."""
+        items = [{"data": {"value": i}, "metadata": {"source": "batch"}} for i in range(3)]
+
+        response = await client.post("/api/v1/data/batch", json=items)
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert data["accepted"] == 3
+        assert data["rejected"] == 0
+        assert len(data["ids"]) == 3
+
+        record = (await client.get(f"/api/v1/data/{data['ids'][1]}")).json()["data"]
+        assert record["data"] == {"value": 1}
+        assert record["metadata"] == {"source": "batch"}
+
+    async def test_ingest_batch_ndjson_stream_with_errors(self, client: AsyncClient):
+        """Test streamed NDJSON ingestion reports per-line errors."""
+        lines = [
+            b'{"data": {"value": 1}}\n',
+            b"not json\n",
+            b'{"data": "not an object"}\n',
+            b'{"data": {"val',
+            b'ue": 2}}\n',
+            b'{"data": {}}\n',
+        ]
+
+        async def body():
+            for line in lines:
+                yield line
+
+        response = await client.post(
+            "/api/v1/data/batch",
+            content=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert data["accepted"] == 2
+        assert [error["line"] for error in data["errors"]] == [2, 3, 5]
+        assert data["errors"][2]["message"] == "Invalid data: data must be an object"
+
+    async def test_ingest_batch_ndjson_oversized_line(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that lines after an oversized NDJSON line are still parsed."""
+        monkeypatch.setattr(config, "batch_max_item_bytes", 64)
+        padding = b"x" * 50
+        chunks = [
+            b'{"data": {"value": 1}}\n{"data": {"pad": "',
+            padding,
+            padding,
+            b'"}}\n{"data": {"value": 2}}\n',
+            b'{"data": {"pad": "' + padding * 2 + b'"}}\n',
+            b'{"data": {"value": 3}}',
+        ]
+
+        async def body():
+            for chunk in chunks:
+                yield chunk
+
+        response = await client.post(
+            "/api/v1/data/batch",
+            content=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert data["accepted"] == 3
+        assert data["errors"] == [
+            {"line": 2, "message": "Line exceeds 64 bytes"},
+            {"line": 4, "message": "Line exceeds 64 bytes"},
+        ]
+        values = [
+            (await client.get(f"/api/v1/data/{id}")).json()["data"]["data"] for id in data["ids"]
+        ]
+        assert values == [{"value": 1}, {"value": 2}, {"value": 3}]
+
+    async def test_ingest_batch_empty(self, client: AsyncClient):
+        """Test that an empty batch is rejected."""
+        response = await client.post("/api/v1/data/batch", json=[])
+
+        assert response.status_code == 400
+
+    async def test_ingest_batch_malformed_array(self, client: AsyncClient):
+        """Test that a truncated JSON array keeps the records before the error."""
+        response = await client.post(
+            "/api/v1/data/batch",
+            content=b'[{"data": {"value": 1}}, {"data": ',
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert data["accepted"] == 1
+        assert data["errors"][0]["line"] == 2
+
+    async def test_enqueue_processing_job(self, client: AsyncClient):
+        """Test background processing of a list of ids."""
+        ids = []
+        for i in range(3):
+            response = await client.post("/api/v1/data", json={"data": {"value": i}})
+            ids.append(response.json()["data"]["id"])
+        missing_id = "00000000-0000-0000-0000-000000000000"
+
+        response = await client.post("/api/v1/data/process", json={"ids": ids + [missing_id]})
+
+        assert response.status_code == 202
+        job = response.json()["data"]
+        assert job["total"] == 4
+
+        for _ in range(100):
+            status_response = await client.get(f"/api/v1/data/jobs/{job['id']}")
+            job = status_response.json()["data"]
+            if job["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+
+        assert job["status"] == "completed"
+        assert job["processed"] == 3
+        assert job["failed"] == 1
+        assert "queue_depth" in status_response.json()["queue"]
+
+        for record_id in ids:
+            record = (await client.get(f"/api/v1/data/{record_id}")).json()["data"]
+            assert record["processed"] is True
+
+    async def test_enqueue_processing_all_unprocessed(self, client: AsyncClient):
+        """Test that all_unprocessed picks up every unprocessed record."""
+        await client.post("/api/v1/data", json={"data": {"value": 1}})
+
+        response = await client.post("/api/v1/data/process", json={"all_unprocessed": True})
+        assert response.status_code == 202
+        job_id = response.json()["data"]["id"]
+
+        for _ in range(100):
+            job = (await client.get(f"/api/v1/data/jobs/{job_id}")).json()["data"]
+            if job["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+
+        stats = (await client.get("/api/v1/data/stats")).json()["data"]
+        assert stats["unprocessed"] == 0
+
+    async def test_failed_job_keeps_workers_running(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that a job whose store call raises fails alone and later jobs still run."""
+        record_id = (await client.post("/api/v1/data", json={"data": {"value": 1}})).json()["data"][
+            "id"
+        ]
+        mark_processed = data_service.store.mark_processed
+
+        async def broken(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        async def wait_for(job_id: str) -> dict:
+            for _ in range(100):
+                job = (await client.get(f"/api/v1/data/jobs/{job_id}")).json()["data"]
+                if job["status"] in ("completed", "failed"):
+                    return job
+                await asyncio.sleep(0.01)
+            return job
+
+        monkeypatch.setattr(data_service.store, "mark_processed", broken)
+        response = await client.post("/api/v1/data/process", json={"ids": [record_id]})
+        job = await wait_for(response.json()["data"]["id"])
+        assert job["status"] == "failed"
+        assert job["error"] == "disk full"
+        assert job["failed"] == 1
+
+        monkeypatch.setattr(data_service.store, "mark_processed", mark_processed)
+        response = await client.post("/api/v1/data/process", json={"ids": [record_id]})
+        job = await wait_for(response.json()["data"]["id"])
+        assert job["status"] == "completed"
+        assert job["processed"] == 1
+
+        queue = (await client.get("/api/v1/data/stats")).json()["data"]["processing_queue"]
+        assert queue["queue_depth"] == 0
+        assert queue["busy_workers"] == 0
+
+    async def test_enqueue_processing_requires_ids(self, client: AsyncClient):
+        """Test that an empty processing request is rejected."""
+        response = await client.post("/api/v1/data/process", json={})
+
+        assert response.status_code == 400
+
+    async def test_get_non_existent_job(self, client: AsyncClient):
+        """Test retrieving an unknown job returns 404."""
+        response = await client.get("/api/v1/data/jobs/unknown")
+
+        assert response.status_code == 404
+
+    async def test_get_all_data_metadata_filter(self, client: AsyncClient):
+        """Test filtering listings by an indexed metadata key and processed flag."""
+        await data_service.add_metadata_index("tenant")
+        ids = []
+        for tenant in ("acme", "acme", "globex"):
+            response = await client.post(
+                "/api/v1/data", json={"data": {"value": 1}, "metadata": {"tenant": tenant}}
+            )
+            ids.append(response.json()["data"]["id"])
+        await client.post(f"/api/v1/data/{ids[0]}/process")
+
+        response = await client.get("/api/v1/data?meta.tenant=acme")
+        assert response.status_code == 200
+        assert [record["id"] for record in response.json()["data"]] == ids[:2]
+
+        response = await client.get("/api/v1/data?meta.tenant=acme&processed=false")
+        assert [record["id"] for record in response.json()["data"]] == [ids[1]]
+
+        await client.delete(f"/api/v1/data/{ids[2]}")
+        response = await client.get("/api/v1/data?meta.tenant=globex")
+        assert response.json()["data"] == []
+
+    async def test_get_all_data_processed_filter(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that processed filters page correctly and false is answered from an index."""
+        service = DataService()
+        monkeypatch.setattr(data_routes, "data_service", service)
+        ids = []
+        for i in range(6):
+            response = await client.post("/api/v1/data", json={"data": {"value": i}})
+            ids.append(response.json()["data"]["id"])
+        for record_id in ids[::2]:
+            await client.post(f"/api/v1/data/{record_id}/process")
+
+        response = await client.get("/api/v1/data?processed=true&limit=2&offset=1")
+        assert [record["id"] for record in response.json()["data"]] == ids[2::2]
+
+        def full_scan(*args):
+            raise AssertionError("processed=false walked every record")
+
+        monkeypatch.setattr(service._order, "iter_after", full_scan)
+        response = await client.get("/api/v1/data?processed=false&limit=2&offset=1")
+        assert [record["id"] for record in response.json()["data"]] == ids[3::2]
+
+        job = await service.enqueue_processing(all_unprocessed=True)
+        assert job.total == 3
+        await service.stop_workers()
+
+    async def test_get_all_data_unindexed_metadata_filter(self, client: AsyncClient):
+        """Test that filtering on a metadata key without an index returns 400."""
+        response = await client.get("/api/v1/data?meta.not-indexed=x")
+
+        assert response.status_code == 400
+
+    async def test_get_all_data_time_range(self, client: AsyncClient):
+        """Test since/until filters and cursors over the time index."""
+        ids = []
+        for i in range(3):
+            response = await client.post("/api/v1/data", json={"data": {"value": i}})
+            ids.append(response.json()["data"]["id"])
+            await asyncio.sleep(0.002)
+        first = (await client.get(f"/api/v1/data/{ids[0]}")).json()["data"]
+        last = (await client.get(f"/api/v1/data/{ids[2]}")).json()["data"]
+
+        params = {"since": first["timestamp"], "until": last["timestamp"], "limit": 2}
+        response = await client.get("/api/v1/data", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        assert [record["id"] for record in body["data"]] == ids[:2]
+
+        params["cursor"] = body["pagination"]["next_cursor"]
+        response = await client.get("/api/v1/data", params=params)
+        assert [record["id"] for record in response.json()["data"]] == ids[2:]
+        assert response.json()["pagination"]["next_cursor"] is None
+
+        await client.post(f"/api/v1/data/{ids[1]}/process")
+        response = await client.get(
+            "/api/v1/data",
+            params={"since": last["timestamp"], "time_field": "processingTimestamp"},
+        )
+        assert [record["id"] for record in response.json()["data"]] == [ids[1]]
+
+    async def test_export_ndjson(self, client: AsyncClient):
+        """Test streaming a filtered NDJSON export, plain and gzip-compressed."""
+        await data_service.add_metadata_index("batch")
+        ids = []
+        for i in range(3):
+            response = await client.post(
+                "/api/v1/data", json={"data": {"value": i}, "metadata": {"batch": "export"}}
+            )
+            ids.append(response.json()["data"]["id"])
+
+        response = await client.get("/api/v1/data/export?meta.batch=export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert [json.loads(line)["id"] for line in lines] == ids
+
+        response = await client.get("/api/v1/data/export?meta.batch=export&gzip=true")
+        assert response.headers["content-encoding"] == "gzip"
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids
+
+    async def test_export_unindexed_metadata_filter(self, client: AsyncClient):
+        """Test that exporting with an unindexed metadata filter returns 400."""
+        response = await client.get("/api/v1/data/export?meta.not-indexed=x")
+
+        assert response.status_code == 400
+
+    async def test_response_matches_model_dump(self, client: AsyncClient):
+        """Test that serialized records match the model's JSON dump."""
+        response = await client.post(
+            "/api/v1/data", json={"data": {"value": 1.5}, "metadata": {"source": "s"}}
+        )
+        record_id = response.json()["data"]["id"]
+        await client.post(f"/api/v1/data/{record_id}/process")
+
+        response = await client.get(f"/api/v1/data/{record_id}")
+        assert response.headers["content-type"] == "application/json"
+        record = await data_service.get_data(record_id)
+        assert response.json()["data"] == record.model_dump(mode="json")
+
+    async def test_expired_record_not_served(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that records past their time-to-live are gone from GETs and stats."""
+        service = DataService(store=MemoryRecordStore(ttl_seconds=0.05))
+        monkeypatch.setattr(data_routes, "data_service", service)
+
+        created = await client.post("/api/v1/data", json={"data": {"value": 1}})
+        url = f"/api/v1/data/{created.json()['data']['id']}"
+        first = await client.get(url)
+        assert first.status_code == 200
+        stats = await client.get("/api/v1/data/stats")
+        assert stats.json()["data"]["total"] == 1
+
+        await asyncio.sleep(0.1)
+        stats = await client.get("/api/v1/data/stats")
+        assert stats.json()["data"]["total"] == 0
+
+        created = await client.post("/api/v1/data", json={"data": {"value": 2}})
+        url = f"/api/v1/data/{created.json()['data']['id']}"
+        first = await client.get(url)
+        assert (await client.get(url)).content == first.content
+
+        await asyncio.sleep(0.1)
+        conditional = await client.get(url, headers={"If-None-Match": first.headers["etag"]})
+        assert conditional.status_code == 404
+        assert (await client.get(url)).status_code == 404
+
+    async def test_conditional_get_record(self, client: AsyncClient):
+        """Test ETags and 304 responses for a record across processing."""
+        created = await client.post("/api/v1/data", json={"data": {"value": 1}})
+        record_id = created.json()["data"]["id"]
+
+        first = await client.get(f"/api/v1/data/{record_id}")
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+
+        cached = await client.get(f"/api/v1/data/{record_id}")
+        assert cached.content == first.content
+        assert cached.headers["etag"] == etag
+
+        not_modified = await client.get(
+            f"/api/v1/data/{record_id}", headers={"If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        await client.post(f"/api/v1/data/{record_id}/process")
+        changed = await client.get(f"/api/v1/data/{record_id}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["data"]["processed"] is True
+
+        await client.delete(f"/api/v1/data/{record_id}")
+        gone = await client.get(f"/api/v1/data/{record_id}", headers={"If-None-Match": "*"})
+        assert gone.status_code == 404
+
+    async def test_ingest_data_idempotency_key(self, client: AsyncClient):
+        """Test that a repeated Idempotency-Key returns the original record."""
+        payload = {"data": {"value": 1}, "metadata": {"source": "retry"}}
+        headers = {"Idempotency-Key": "ingest-retry-1"}
+
+        created = await client.post("/api/v1/data", json=payload, headers=headers)
+        assert created.status_code == 201
+        assert "idempotent-replayed" not in created.headers
+
+        replayed = await client.post("/api/v1/data", json=payload, headers=headers)
+        assert replayed.status_code == 200
+        assert replayed.headers["idempotent-replayed"] == "true"
+        assert replayed.json()["data"]["id"] == created.json()["data"]["id"]
+
+        conflict = await client.post("/api/v1/data", json={"data": {"value": 2}}, headers=headers)
+        assert conflict.status_code == 422
+        assert "different payload" in conflict.json()["error"]["message"]
+
+        invalid = await client.post(
+            "/api/v1/data", json=payload, headers={"Idempotency-Key": "x" * 256}
+        )
+        assert invalid.status_code == 400
+
+    async def test_conditional_get_list(self, client: AsyncClient):
+        """Test that list ETags change with the store and cached pages are reused."""
+        await client.post("/api/v1/data", json={"data": {"value": 1}})
+        first = await client.get("/api/v1/data?limit=5")
+        etag = first.headers["etag"]
+
+        hits = (await client.get("/api/v1/data/stats")).json()["data"]["response_cache"]["hits"]
+        again = await client.get("/api/v1/data?limit=5")
+        assert again.content == first.content
+        stats = (await client.get("/api/v1/data/stats")).json()["data"]["response_cache"]
+        assert stats["hits"] == hits + 1
+
+        matching = await client.get("/api/v1/data?limit=5", headers={"If-None-Match": etag})
+        assert matching.status_code == 304
+
+        await client.post("/api/v1/data", json={"data": {"value": 2}})
+        changed = await client.get("/api/v1/data?limit=5", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["pagination"]["total"] == first.json()["pagination"]["total"] + 1
+
+        invalid = await client.get(
+            "/api/v1/data?limit=5&cursor=not-a-cursor",
+            headers={"If-None-Match": changed.headers["etag"]},
+        )
+        assert invalid.status_code == 400
+        invalid = await client.get(
+            "/api/v1/data?limit=5&meta.unindexed=x", headers={"If-None-Match": "*"}
+        )
+        assert invalid.status_code == 400
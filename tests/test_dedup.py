@@ -0,0 +1,140 @@
+"""Tests for payload deduplication and idempotency keys."""
+
+import asyncio
+import pytest
+from src.data_service import DataService
+from src.dedup import IdempotencyKeys, PayloadInterner
+from src.wal import WriteAheadLog
+
+
+class TestPayloadInterner:
+    """Test suite for the shared payload table."""
+
+    def test_shares_equal_payloads(self):
+        """Test that payloads equal up to key order share one object."""
+        interner = PayloadInterner()
+        first = interner.intern({"a": 1, "b": [1, 2]})
+        second = interner.intern({"b": [1, 2], "a": 1})
+        other = interner.intern({"a": 2})
+
+        assert second is first
+        assert other is not first
+        stats = interner.get_stats()
+        assert stats["payloads"] == 2
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["bytes_saved"] == len('{"a":1,"b":[1,2]}')
+
+    def test_release_forgets_last_reference(self):
+        """Test reference counting, including release of an equal copy."""
+        interner = PayloadInterner()
+        shared = interner.intern({"a": 1})
+        interner.intern({"a": 1})
+
+        interner.release({"a": 1})
+        assert len(interner) == 1
+        assert interner.get_stats()["bytes_saved"] == 0
+        interner.release(shared)
+        assert len(interner) == 0
+        assert interner.intern({"a": 1}) is not shared
+
+
+class TestIdempotencyKeys:
+    """Test suite for the idempotency key map."""
+
+    def test_bounded_by_max_keys(self):
+        """Test that the oldest keys are forgotten beyond the limit."""
+        keys = IdempotencyKeys(max_keys=2)
+        for i in range(3):
+            keys.put(f"k{i}", b"digest", f"id{i}")
+
+        assert keys.get("k0") is None
+        assert keys.get("k2") == (b"digest", "id2")
+        assert len(keys) == 2
+
+    def test_keys_expire(self, monkeypatch: pytest.MonkeyPatch):
+        """Test that keys are forgotten after the TTL."""
+        now = [1000.0]
+        monkeypatch.setattr("src.dedup.time.monotonic", lambda: now[0])
+        keys = IdempotencyKeys(ttl_seconds=10)
+        keys.put("k", b"digest", "id")
+
+        now[0] += 5
+        assert keys.get("k") == (b"digest", "id")
+        now[0] += 10
+        assert keys.get("k") is None
+
+
+@pytest.mark.asyncio
+class TestDataServiceDedup:
+    """Test suite for deduplication in the data service."""
+
+    async def test_identical_payloads_share_storage(self):
+        """Test that records with equal data and metadata share one copy."""
+        service = DataService(dedup_payloads=True)
+        first = await service.ingest_data({"value": 1}, {"source": "a"})
+        second = await service.ingest_data({"value": 1}, {"source": "a"})
+        [third] = await service.ingest_batch([({"value": 1}, {"source": "b"})])
+
+        assert first.id != second.id
+        assert second.data is first.data
+        assert second.metadata is first.metadata
+        assert third.data is first.data
+
+        dedup = (await service.get_detailed_stats())["dedup"]
+        assert dedup["enabled"] is True
+        assert dedup["payloads"] == 3
+        assert dedup["hits"] == 3
+        assert dedup["bytes_saved"] > 0
+
+        await service.delete_data(second.id)
+        await service.delete_data(third.id)
+        dedup = (await service.get_detailed_stats())["dedup"]
+        assert dedup["payloads"] == 2
+        assert dedup["bytes_saved"] == 0
+        assert (await service.get_data(first.id)).data == {"value": 1}
+
+    async def test_disabled_by_default(self):
+        """Test that records keep their own payloads without dedup."""
+        service = DataService()
+        first = await service.ingest_data({"value": 1})
+        second = await service.ingest_data({"value": 1})
+
+        assert second.data is not first.data
+        assert (await service.get_detailed_stats())["dedup"]["enabled"] is False
+
+    async def test_recovered_records_share_storage(self, tmp_path):
+        """Test that records replayed from the write-ahead log are deduplicated."""
+        service = DataService(WriteAheadLog(str(tmp_path)), dedup_payloads=True)
+        first = await service.ingest_data({"value": 1})
+        second = await service.ingest_data({"value": 1})
+        await service.shutdown()
+
+        recovered = DataService(WriteAheadLog(str(tmp_path)), dedup_payloads=True)
+        try:
+            assert (await recovered.get_data(first.id)).data is (
+                await recovered.get_data(second.id)
+            ).data
+        finally:
+            await recovered.shutdown()
+
+    async def test_idempotent_ingest(self):
+        """Test replays, conflicts and concurrent requests with one key."""
+        service = DataService()
+        results = await asyncio.gather(
+            *(service.ingest_idempotent("key-1", {"value": 1}) for _ in range(3))
+        )
+
+        assert len({record.id for record, _ in results}) == 1
+        assert sorted(replayed for _, replayed in results) == [False, True, True]
+        assert (await service.get_stats())["total"] == 1
+
+        with pytest.raises(ValueError, match="different payload"):
+            await service.ingest_idempotent("key-1", {"value": 2})
+
+        record, replayed = await service.ingest_idempotent("key-2", {"value": 1})
+        assert replayed is False
+        assert record.id != results[0][0].id
+
+        stats = (await service.get_detailed_stats())["dedup"]["idempotency"]
+        assert stats == {"keys": 2, "replays": 2, "conflicts": 1}
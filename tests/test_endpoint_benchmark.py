@@ -0,0 +1,49 @@
+"""Tests for the endpoint benchmark suite."""
+
+import pytest
+from httpx import AsyncClient
+from benchmarks.endpoint_benchmark import compare, percentile, run_scenarios
+
+
+class TestRegressionCheck:
+    """Test suite for comparing results against a baseline."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        samples = [float(value) for value in range(1, 101)]
+        assert percentile(samples, 0.5) == 50.0
+        assert percentile(samples, 0.99) == 99.0
+        assert percentile([3.0], 0.99) == 3.0
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        """Test that only drops and rises beyond the threshold are reported."""
+        baseline = {
+            "get": {"throughput": 1000.0, "p99_ms": 2.0},
+            "list_1000": {"throughput": 500.0, "p99_ms": 10.0},
+        }
+        results = {
+            "get": {"throughput": 850.0, "p99_ms": 2.3},
+            "list_1000": {"throughput": 350.0, "p99_ms": 13.0},
+            "new": {"throughput": 1.0, "p99_ms": 1000.0},
+        }
+
+        regressions = compare(results, baseline, threshold=0.2)
+
+        assert len(regressions) == 2
+        assert all(message.startswith("list_1000:") for message in regressions)
+        assert compare(results, baseline, threshold=0.5) == []
+
+
+@pytest.mark.asyncio
+class TestScenarios:
+    """Test suite for running the scenarios in-process."""
+
+    async def test_runs_every_scenario(self, client: AsyncClient):
+        """Test that a small run measures each scenario."""
+        results = await run_scenarios(client, requests=10, concurrency=4, store_sizes=[30])
+
+        assert list(results) == ["ingest", "get", "process", "delete", "list_30"]
+        for result in results.values():
+            assert result["requests"] == 10
+            assert result["throughput"] > 0
+            assert 0 < result["p50_ms"] <= result["p99_ms"]
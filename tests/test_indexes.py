@@ -0,0 +1,64 @@
+"""Tests for the in-memory indexes."""
+
+from datetime import datetime, timedelta
+from src.indexes import OrderedIndex, TimeIndex
+
+
+class TestTimeIndex:
+    """Test suite for the sorted time index."""
+
+    def test_range_with_out_of_order_inserts_and_removals(self):
+        """Test that range queries stay sorted and skip removed ids."""
+        base = datetime(2024, 1, 1)
+        index = TimeIndex()
+        index.COMPACT_THRESHOLD = 2
+        for seq, minutes in enumerate([0, 10, 5, 20, 15]):
+            index.add(f"r{minutes}", base + timedelta(minutes=minutes), seq)
+
+        index.remove("r10")
+        index.remove("r20")
+        index.remove("missing")
+
+        found = [record_id for _, record_id in index.between(base + timedelta(minutes=1))]
+        assert found == ["r5", "r15"]
+        assert len(index) == 3
+
+        bounded = index.between(base, base + timedelta(minutes=5))
+        assert [record_id for _, record_id in bounded] == ["r0", "r5"]
+
+    def test_range_after_key(self):
+        """Test resuming a range query after a key."""
+        base = datetime(2024, 1, 1)
+        index = TimeIndex()
+        for seq in range(4):
+            index.add(f"r{seq}", base, seq)
+
+        keys = list(index.between(base, base))
+        resumed = index.between(base, base, after=keys[1][0])
+        assert [record_id for _, record_id in resumed] == ["r2", "r3"]
+
+
+class TestOrderedIndex:
+    """Test suite for the insertion-ordered index."""
+
+    def test_seek_and_skip_with_tombstones(self):
+        """Test resuming after a sequence number and skipping past removed ids."""
+        index = OrderedIndex()
+        index.COMPACT_THRESHOLD = 2
+        for seq in (0, 1, 3, 4):
+            index.add(f"r{seq}", seq)
+        index.add("r2", 2)
+
+        ids = [record_id for _, record_id in index.iter_after(skip=1)]
+        assert ids == ["r1", "r2", "r3", "r4"]
+        assert [record_id for _, record_id in index.iter_after(2)] == ["r3", "r4"]
+
+        index.remove("r1")
+        index.remove("r3")
+        index.remove("missing")
+
+        assert len(index) == 3
+        assert "r1" not in index
+        assert index.get("r4") == 4
+        assert [record_id for _, record_id in index.iter_after(skip=1)] == ["r2", "r4"]
+        assert [record_id for _, record_id in index.iter_after(0)] == ["r2", "r4"]
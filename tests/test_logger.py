@@ -0,0 +1,63 @@
+"""Tests for the logging pipeline."""
+
+import io
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+import pytest
+from src.logger import BackgroundQueueHandler, JSONFormatter, SamplingFilter, parse_sample_rates
+
+
+def make_record(level: int = logging.INFO, msg: str = "hello %s", **extra) -> logging.LogRecord:
+    """Build a log record with extra fields."""
+    record = logging.LogRecord("test", level, __file__, 1, msg, ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogging:
+    """Test suite for formatters, sampling and the background handler."""
+
+    def test_json_formatter_includes_extra_fields(self):
+        """Test that extra fields are written as top-level JSON keys."""
+        line = JSONFormatter().format(make_record(path="/api", status_code=200))
+
+        data = json.loads(line)
+        assert data["msg"] == "hello world"
+        assert data["level"] == "INFO"
+        assert data["path"] == "/api"
+        assert data["status_code"] == 200
+
+    def test_sampling_and_rate_limit(self):
+        """Test per-level sampling and the per-second cap."""
+        sampler = SamplingFilter(parse_sample_rates("INFO=0, debug=1"))
+        assert sampler.filter(make_record(logging.INFO)) is False
+        assert sampler.filter(make_record(logging.DEBUG)) is True
+        assert sampler.filter(make_record(logging.ERROR)) is True
+
+        limiter = SamplingFilter(max_per_second=2)
+        passed = [limiter.filter(make_record()) for _ in range(5)]
+        assert passed.count(True) == 2
+        assert limiter.dropped == 3
+
+        with pytest.raises(ValueError):
+            parse_sample_rates("LOUD=1")
+
+    def test_background_handler_writes_from_listener_thread(self):
+        """Test that records reach the stream via the queue, and overflow is dropped."""
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JSONFormatter())
+        handler = BackgroundQueueHandler(queue.Queue(1))
+
+        handler.handle(make_record(request_id="abc"))
+        handler.handle(make_record())
+        assert handler.dropped == 1
+
+        listener = QueueListener(handler.queue, target)
+        listener.start()
+        listener.stop()
+        data = json.loads(stream.getvalue())
+        assert data["msg"] == "hello world"
+        assert data["request_id"] == "abc"
@@ -0,0 +1,75 @@
+"""Tests for metrics."""
+
+import pytest
+from httpx import AsyncClient
+from src.data_service import data_service
+from src.metrics import RECORD_COUNTERS, Gauge, Histogram, render
+
+
+class TestMetricTypes:
+    """Test suite for metric rendering."""
+
+    def test_histogram_and_gauge_exposition(self):
+        """Test cumulative buckets, sum, count and label escaping."""
+        registry = []
+        histogram = Histogram("latency_seconds", "Latency", ("route",), (0.1, 1), registry)
+        gauge = Gauge("in_flight", "In flight", registry=registry)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, '/a"b')
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        lines = render(registry).splitlines()
+        assert "# TYPE latency_seconds histogram" in lines
+        assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{route="/a\\"b",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{route="/a\\"b"} 5.55' in lines
+        assert 'latency_seconds_count{route="/a\\"b"} 3' in lines
+        assert "in_flight 1" in lines
+
+
+@pytest.mark.asyncio
+class TestMetricsEndpoint:
+    """Test suite for the /metrics endpoint."""
+
+    async def test_metrics_endpoint(self, client: AsyncClient):
+        """Test that request latency and data service metrics are exposed."""
+        response = await client.post("/api/v1/data", json={"data": {"value": 1}})
+        record_id = response.json()["data"]["id"]
+        await client.get(f"/api/v1/data/{record_id}")
+        await client.get("/api/v1/data/does-not-exist")
+
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+
+        route = 'method="GET",route="/api/v1/data/{record_id}"'
+        assert f'http_request_duration_seconds_count{{{route},status="200"}}' in text
+        assert f'http_request_duration_seconds_count{{{route},status="404"}}' in text
+        assert "http_requests_in_flight 1" in text
+        assert 'data_records{processed="false"}' in text
+        assert "data_records_ingested_total" in text
+        assert "# TYPE data_records_processed_total counter" in text
+
+    async def test_record_counters_from_store_server(
+        self, client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test that record counters kept by another process are exposed when scraped."""
+        for counter in RECORD_COUNTERS:
+            monkeypatch.setattr(counter, "values", dict(counter.values))
+
+        async def get_counters():
+            return {
+                "data_records_ingested_total": 40,
+                "data_records_processed_total": 30,
+                "data_records_deleted_total": 2,
+            }
+
+        monkeypatch.setattr(data_service, "get_counters", get_counters)
+        lines = (await client.get("/metrics")).text.splitlines()
+        assert "data_records_ingested_total 40" in lines
+        assert "data_records_processed_total 30" in lines
+        assert "data_records_deleted_total 2" in lines
@@ -0,0 +1,142 @@
+"""Tests for the ASGI middleware."""
+
+import logging
+import pstats
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from src.app import create_app
+from src.exceptions import AppError
+from src.logger import sampled_logger
+from src.middleware import ErrorHandlerMiddleware, ProfilerMiddleware, RequestLoggerMiddleware
+
+
+def build_app() -> FastAPI:
+    """Create an app whose routes raise each kind of handled error."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/app-error")
+    async def app_error():
+        raise AppError(409, "Conflict", details={"field": "id"})
+
+    @app.get("/missing")
+    async def missing():
+        raise ValueError("Record with id x not found")
+
+    @app.get("/invalid")
+    async def invalid():
+        raise ValueError("Invalid cursor")
+
+    @app.get("/crash")
+    async def crash():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    """Create the test app with the ASGI middleware classes."""
+    app = build_app()
+    app.add_middleware(RequestLoggerMiddleware)
+    app.add_middleware(ErrorHandlerMiddleware)
+    return app
+
+
+class CollectingHandler(logging.Handler):
+    """Handler that keeps emitted records in a list."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.mark.asyncio
+class TestMiddleware:
+    """Test suite for error handling and request logging middleware."""
+
+    async def test_error_mapping(self):
+        """Test that exceptions map to the same JSON errors as before."""
+        async with AsyncClient(transport=ASGITransport(app=asgi_app()), base_url="http://t") as c:
+            response = await c.get("/app-error")
+            assert response.status_code == 409
+            assert response.json() == {
+                "error": {"message": "Conflict", "statusCode": 409, "details": {"field": "id"}}
+            }
+
+            response = await c.get("/missing")
+            assert response.status_code == 404
+            assert response.json()["error"]["message"] == "Record with id x not found"
+
+            assert (await c.get("/invalid")).status_code == 400
+
+            response = await c.get("/crash")
+            assert response.status_code == 500
+            assert response.json() == {
+                "error": {"message": "Internal Server Error", "statusCode": 500}
+            }
+
+    async def test_request_logging(self):
+        """Test that each request is logged with its status and duration."""
+        handler = CollectingHandler()
+        sampled_logger.addHandler(handler)
+        try:
+            transport = ASGITransport(app=asgi_app())
+            async with AsyncClient(transport=transport, base_url="http://t") as client:
+                await client.get("/ping")
+        finally:
+            sampled_logger.removeHandler(handler)
+
+        [record] = handler.records
+        assert record.getMessage() == "GET /ping"
+        assert record.status_code == 200
+        assert record.method == "GET"
+        assert record.duration_ms >= 0
+
+
+@pytest.mark.asyncio
+class TestProfilerMiddleware:
+    """Test suite for opt-in request profiling."""
+
+    async def test_not_installed_when_disabled(self):
+        """Test that the app only adds the profiler when profiling is enabled."""
+        classes = [middleware.cls for middleware in create_app().user_middleware]
+        assert ProfilerMiddleware not in classes
+        assert ErrorHandlerMiddleware in classes
+
+    async def test_writes_profile_for_requests_with_header(self, tmp_path):
+        """Test that only requests asking for a profile get one written."""
+        app = build_app()
+        app.add_middleware(ProfilerMiddleware, directory=str(tmp_path / "profiles"))
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as client:
+            plain = await client.get("/ping")
+            profiled = await client.get("/ping", headers={"X-Profile": "1"})
+
+        assert "x-profile-file" not in plain.headers
+        assert profiled.json() == {"ok": True}
+        filename = profiled.headers["x-profile-file"]
+        assert filename.endswith("-ping.prof")
+        stats = pstats.Stats(str(tmp_path / "profiles" / filename))
+        assert any(func[2] == "ping" for func in stats.stats)
+
+    async def test_inline_report_and_sampling(self, tmp_path):
+        """Test the inline text report and profiling of sampled requests."""
+        app = asgi_app()
+        app.add_middleware(ProfilerMiddleware, directory=str(tmp_path), sample_rate=1.0)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as client:
+            inline = await client.get("/missing", headers={"X-Profile": "inline"})
+            sampled = await client.get("/ping")
+
+        assert inline.status_code == 200
+        assert inline.headers["x-profile-status"] == "404"
+        assert inline.headers["content-type"].startswith("text/plain")
+        assert "cumulative" in inline.text
+        assert (tmp_path / sampled.headers["x-profile-file"]).exists()
@@ -0,0 +1,93 @@
+"""Tests for the record processor pipeline."""
+
+import pytest
+from src.data_service import DataService
+from src.processors import ProcessorPipeline, checksum, load_processors, numeric_summary
+from src.wal import WriteAheadLog
+
+
+def explode(data):
+    """Processor that always fails."""
+    raise ValueError(f"cannot handle {sorted(data)}")
+
+
+@pytest.fixture
+async def service():
+    """Data service with a one-process pipeline and a failing processor."""
+    pipeline = ProcessorPipeline(
+        {"numeric_summary": numeric_summary, "checksum": checksum, "explode": explode},
+        pool_size=1,
+    )
+    service = DataService(pipeline=pipeline)
+    yield service
+    await service.shutdown()
+
+
+@pytest.mark.asyncio
+class TestProcessorPipeline:
+    """Test suite for processors selected by record type."""
+
+    async def test_runs_processor_selected_by_type(self, service):
+        """Test that the output and timing of the processor land in the result."""
+        record = await service.ingest_data(
+            {"a": 1, "b": [2, 3.5], "c": {"d": 4, "flag": True}}, {"type": "numeric_summary"}
+        )
+
+        result = (await service.process_data(record.id)).processingResult
+
+        assert result.status == "success"
+        assert result.processor == "numeric_summary"
+        assert result.output == {"count": 4, "sum": 10.5, "mean": 2.625, "min": 1, "max": 4}
+        assert result.durationMs >= 0
+        assert (await service.get_data(record.id)).processingResult == result
+
+    async def test_records_errors_and_untyped_records(self, service):
+        """Test that failures become error results and other records keep the default."""
+        failing = await service.ingest_data({"x": 1}, {"type": "explode"})
+        plain = await service.ingest_data({"x": 1}, {"type": "unknown"})
+        hashed = await service.ingest_data({"b": 1, "a": [1, 2]}, {"type": "checksum"})
+
+        job = await service.enqueue_processing(all_unprocessed=True)
+        await service._job_queue.join()
+
+        failed = (await service.get_data(failing.id)).processingResult
+        assert failed.status == "error"
+        assert failed.message == "ValueError: cannot handle ['x']"
+        assert failed.output is None
+        assert (await service.get_data(plain.id)).processingResult.processor is None
+        output = (await service.get_data(hashed.id)).processingResult.output
+        assert output == checksum({"a": [1, 2], "b": 1})
+        assert service.jobs[job.id].status == "completed"
+
+        stats = (await service.get_detailed_stats())["processors"]
+        assert stats["explode"]["runs"] == 1
+        assert stats["explode"]["errors"] == 1
+        assert stats["checksum"]["errors"] == 0
+        assert "unknown" not in stats
+
+    async def test_results_survive_recovery(self, tmp_path):
+        """Test that processor fields are replayed from the write-ahead log."""
+        pipeline = ProcessorPipeline({"checksum": checksum}, pool_size=1)
+        service = DataService(WriteAheadLog(str(tmp_path)), pipeline=pipeline)
+        record = await service.ingest_data({"v": 1}, {"type": "checksum"})
+        expected = (await service.process_data(record.id)).processingResult
+        await service.shutdown()
+
+        recovered = DataService(WriteAheadLog(str(tmp_path)))
+        assert (await recovered.get_data(record.id)).processingResult == expected
+        await recovered.shutdown()
+
+
+class TestLoadProcessors:
+    """Test suite for registering processors from settings."""
+
+    def test_load_processors(self):
+        """Test loading processors from name=module:function entries."""
+        registry = load_processors("sha=src.processors:checksum")
+        assert registry["sha"] is checksum
+        del registry["sha"]
+
+        with pytest.raises(ValueError):
+            load_processors("broken")
+        with pytest.raises(ValueError):
+            load_processors("x=src.processors:missing")
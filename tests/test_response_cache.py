@@ -0,0 +1,45 @@
+"""Tests for the response body cache."""
+
+from src.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test suite for the versioned LRU response cache."""
+
+    def test_version_mismatch_invalidates(self):
+        """Test that a lookup at a newer version misses and drops the entry."""
+        cache = ResponseCache()
+        cache.put("k", "v1", b"body")
+
+        assert cache.version("k") == "v1"
+        assert cache.version("other") is None
+        assert cache.get("k", "v1") == b"body"
+        assert cache.get("k", "v2") is None
+        assert cache.get("k", "v1") is None
+        assert cache.get_stats() == {
+            "entries": 0,
+            "bytes": 0,
+            "hits": 1,
+            "misses": 2,
+            "hit_rate": 0.3333,
+        }
+
+    def test_evicts_least_recently_used(self):
+        """Test eviction by entry count and total bytes."""
+        cache = ResponseCache(max_entries=2, max_bytes=10)
+        cache.put("a", "v", b"1234")
+        cache.put("b", "v", b"1234")
+        cache.get("a", "v")
+        cache.put("c", "v", b"12")
+
+        assert cache.get("b", "v") is None
+        assert cache.get("a", "v") == b"1234"
+
+        cache.put("d", "v", b"12345678")
+        assert cache.get("a", "v") is None
+        assert cache.get("d", "v") == b"12345678"
+        assert cache.get_stats()["bytes"] == 8
+
+        cache.put("huge", "v", b"x" * 11)
+        assert cache.get("huge", "v") is None
+        assert ResponseCache(max_entries=0).get_stats()["entries"] == 0
@@ -0,0 +1,80 @@
+"""Tests for the sharded, lock-protected dict."""
+
+import pytest
+from src.sharded_dict import ShardedDict
+
+THREADS = 8
+
+
+class TestShardedDict:
+    """Test suite for ShardedDict."""
+
+    def test_mapping_interface(self):
+        """Test that it behaves like a dict apart from cross-shard order."""
+        mapping = ShardedDict(4)
+        mapping.update({f"k{i}": i for i in range(100)})
+        mapping["extra"] = -1
+
+        assert len(mapping) == 101
+        assert mapping["k5"] == 5
+        assert "k99" in mapping and "missing" not in mapping
+        assert mapping.get("missing") is None and mapping.get("missing", 0) == 0
+        assert mapping.get_many(["k1", "missing", "k2"]) == [1, None, 2]
+        assert sorted(mapping.values()) == [-1] + list(range(100))
+        assert set(mapping) == set(mapping.keys()) == {f"k{i}" for i in range(100)} | {"extra"}
+        assert sum(mapping.shard_sizes()) == 101 and mapping.shard_count == 4
+
+        assert mapping.pop("extra") == -1
+        assert mapping.pop("extra", None) is None
+        with pytest.raises(KeyError):
+            mapping.pop("extra")
+        del mapping["k0"]
+        with pytest.raises(KeyError):
+            mapping["k0"]
+        mapping.clear()
+        assert len(mapping) == 0
+
+        with pytest.raises(ValueError):
+            ShardedDict(0)
+
+    def test_no_lost_updates(self, run_threads):
+        """Test that read-modify-write under a key's lock never loses an increment."""
+        mapping = ShardedDict(4)
+        keys = [f"counter-{i}" for i in range(16)]
+        mapping.update(dict.fromkeys(keys, 0))
+        rounds = 500
+
+        def increment(index: int) -> None:
+            for i in range(rounds):
+                key = keys[(index + i) % len(keys)]
+                with mapping.lock(key):
+                    mapping[key] = mapping[key] + 1
+
+        run_threads(increment, THREADS)
+        assert sum(mapping.values()) == THREADS * rounds
+
+    def test_concurrent_writes_and_reads(self, run_threads):
+        """Test that concurrent inserts, removals and whole-map reads stay consistent."""
+        mapping = ShardedDict(8)
+        per_thread = 2000
+
+        def churn(index: int) -> None:
+            if index % 2:
+                # Readers only ever see complete values
+                for _ in range(200):
+                    for key, value in mapping.items():
+                        assert value == (key, key)
+                    assert len(mapping) >= 0
+                return
+            owned = [f"{index}-{i}" for i in range(per_thread)]
+            mapping.update({key: (key, key) for key in owned[: per_thread // 2]})
+            for key in owned[per_thread // 2 :]:
+                mapping[key] = (key, key)
+            for key in owned[::2]:
+                assert mapping.pop(key) == (key, key)
+            assert mapping.get_many(owned[1::2]) == [(key, key) for key in owned[1::2]]
+
+        run_threads(churn, THREADS)
+        writers = THREADS // 2
+        assert len(mapping) == len(mapping.items()) == writers * per_thread // 2
+        assert sum(mapping.shard_sizes()) == len(mapping)
@@ -0,0 +1,25 @@
+"""Tests for application startup time and lazily loaded modules."""
+
+from benchmarks.startup_benchmark import STARTUP_BUDGET_MS, measure_startup
+from src.app import create_app
+from src.config import config
+
+
+class TestStartup:
+    """Test suite for the cold start path."""
+
+    def test_cold_start_within_budget(self):
+        """Test that import plus first response fits the budget without deferred modules."""
+        timings = measure_startup()
+
+        assert timings["status"] == 200
+        assert timings["deferred_loaded"] == []
+        assert timings["total_ms"] < STARTUP_BUDGET_MS, timings
+
+    def test_docs_disabled_in_production(self, monkeypatch):
+        """Test that the docs routes follow node_env unless set explicitly."""
+        monkeypatch.setattr(config, "node_env", "production")
+        assert create_app().openapi_url is None
+
+        monkeypatch.setattr(config, "docs_enabled", True)
+        assert create_app().openapi_url == "/api/v1/openapi.json"
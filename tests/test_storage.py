@@ -0,0 +1,316 @@
+"""Tests for the storage backends."""
+
+import asyncio
+import os
+import pytest
+from datetime import datetime
+from src.data_service import DataService
+from src.storage import MemoryRecordStore, SQLiteRecordStore
+from src.types import DataRecord
+from src.wal import WriteAheadLog
+
+
+def open_service(directory, **kwargs) -> DataService:
+    """Create a data service backed by a write-ahead log in a directory."""
+    return DataService(WriteAheadLog(str(directory), **kwargs))
+
+
+@pytest.mark.asyncio
+class TestWriteAheadLog:
+    """Test suite for durable storage."""
+
+    async def test_recovers_ingest_process_delete(self, tmp_path):
+        """Test that a restarted service sees the same records and stats."""
+        service = open_service(tmp_path)
+        kept = await service.ingest_data({"value": 1}, {"source": "a"})
+        processed = await service.ingest_data({"value": 2})
+        deleted = await service.ingest_data({"value": 3})
+        await service.process_data(processed.id)
+        await service.delete_data(deleted.id)
+        await service.shutdown()
+
+        recovered = open_service(tmp_path)
+
+        assert [record.id for record in await recovered.get_all_data()] == [
+            kept.id,
+            processed.id,
+        ]
+        assert (await recovered.get_data(kept.id)).metadata == {"source": "a"}
+        record = await recovered.get_data(processed.id)
+        assert record.processed is True
+        assert record.processingResult.status == "success"
+        assert await recovered.get_data(deleted.id) is None
+        assert await recovered.get_stats() == {"total": 2, "processed": 1, "unprocessed": 1}
+        await recovered.shutdown()
+
+    async def test_snapshot_compacts_segments(self, tmp_path):
+        """Test that snapshots replace old segments and still recover everything."""
+        service = open_service(tmp_path, snapshot_every=3)
+        ids = []
+        for i in range(10):
+            ids.append((await service.ingest_data({"value": i})).id)
+        await service.process_data(ids[0])
+        await service.delete_data(ids[1])
+        await service.shutdown()
+
+        files = sorted(os.listdir(tmp_path))
+        assert len([name for name in files if name.startswith("snapshot-")]) == 1
+        assert len([name for name in files if name.startswith("wal-")]) <= 2
+
+        recovered = open_service(tmp_path)
+        assert await recovered.get_stats() == {"total": 9, "processed": 1, "unprocessed": 8}
+        assert [record.id for record in await recovered.get_all_data()] == [ids[0]] + ids[2:]
+        await recovered.shutdown()
+
+    async def test_torn_tail_is_truncated(self, tmp_path):
+        """Test that a partially written last entry is dropped on replay."""
+        service = open_service(tmp_path)
+        record = await service.ingest_data({"value": 1})
+        await service.shutdown()
+
+        segment = os.path.join(tmp_path, "wal-00000001.log")
+        size = os.path.getsize(segment)
+        with open(segment, "ab") as f:
+            f.write(b'deadbeef I {"id": ')
+
+        recovered = open_service(tmp_path)
+        assert [r.id for r in await recovered.get_all_data()] == [record.id]
+        assert os.path.getsize(segment) == size
+        await recovered.shutdown()
+
+    async def test_group_commit_batches_fsyncs(self, tmp_path):
+        """Test that concurrent commits share fsyncs."""
+        wal = WriteAheadLog(str(tmp_path), fsync_interval_ms=50)
+        service = DataService(wal)
+
+        await asyncio.gather(*(service.ingest_data({"value": i}) for i in range(50)))
+
+        assert wal.entries_written == 50
+        assert wal.fsyncs < 50
+        await service.shutdown()
+
+
+@pytest.mark.asyncio
+class TestMemoryRecordStore:
+    """Test suite for the in-memory record store."""
+
+    async def test_processes_compact_records_in_place(self):
+        """Test that processing updates the stored record without copying its payload."""
+        store = MemoryRecordStore()
+        service = DataService(store=store)
+        record = await service.ingest_data({"value": 1}, {"source": "a"})
+        compact = store.records[record.id]
+
+        processed = await service.process_data(record.id)
+
+        assert store.records[record.id] is compact
+        assert compact.data is processed.data
+        assert processed.processed is True
+        assert processed.processingResult.status == "success"
+        assert processed.id == record.id
+        assert processed.timestamp == record.timestamp
+        assert processed.metadata == {"source": "a"}
+
+        timestamp = processed.processingTimestamp
+        assert await store.mark_processed([record.id, "missing"], timestamp, {}) == []
+
+    async def test_drops_least_recently_used_records(self):
+        """Test that a record-count limit drops the coldest record and untracks it."""
+        store = MemoryRecordStore(max_records=2)
+        service = DataService(store=store)
+        first = await service.ingest_data({"value": 1}, {"source": "a"})
+        second = await service.ingest_data({"value": 2})
+        await service.get_data(first.id)
+        await service.ingest_data({"value": 3})
+
+        assert await service.get_data(second.id) is None
+        assert await service.get_data(first.id) is not None
+        assert (await service.get_stats())["total"] == 2
+        stats = (await service.get_detailed_stats())["store"]
+        assert stats["evictions"] == 1
+        assert stats["in_memory"] == 2
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+
+    async def test_spills_and_reloads_records(self, tmp_path):
+        """Test that evicted records move to disk and come back when read."""
+        spill = SQLiteRecordStore(str(tmp_path / "spill.db"))
+        store = MemoryRecordStore(max_records=2, spill=spill)
+        service = DataService(store=store)
+        records = [await service.ingest_data({"value": i}) for i in range(4)]
+
+        assert store.get_stats()["spilled"] == 2
+        assert await store.count() == 4
+        assert (await service.get_data(records[0].id)).data == {"value": 0}
+        assert (await service.process_data(records[1].id)).processed is True
+        assert store.get_stats()["loads"] == 2
+        assert await service.delete_data(records[2].id) is True
+        assert sorted([r.data["value"] async for r in store.scan()]) == [0, 1, 3]
+        page, _ = await service.get_page(limit=10)
+        assert [record.data["value"] for record in page] == [0, 1, 3]
+        assert await service.get_stats() == {"total": 3, "processed": 1, "unprocessed": 2}
+        await service.shutdown()
+
+    async def test_reads_do_not_extend_time_to_live(self):
+        """Test that a record read repeatedly still expires once its time-to-live passes."""
+        store = MemoryRecordStore(ttl_seconds=0.05)
+        service = DataService(store=store)
+        record = await service.ingest_data({"value": 1})
+
+        for _ in range(3):
+            assert await service.get_data(record.id) is not None
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+        assert await store.get(record.id) is None
+        stats = store.get_stats()
+        assert stats["expirations"] == 1
+        assert stats["in_memory"] == 0
+        assert await service.get_stats() == {"total": 0, "processed": 0, "unprocessed": 0}
+
+    async def test_expires_idle_records_and_byte_budget(self):
+        """Test the time-to-live and estimated size limits."""
+        store = MemoryRecordStore(ttl_seconds=0.01)
+        service = DataService(store=store)
+        idle = await service.ingest_data({"value": 1})
+        await asyncio.sleep(0.02)
+        await service.ingest_data({"value": 2})
+
+        assert await service.get_data(idle.id) is None
+        assert store.get_stats()["expirations"] == 1
+
+        store = MemoryRecordStore(max_bytes=2 * MemoryRecordStore.RECORD_OVERHEAD_BYTES + 100)
+        service = DataService(store=store)
+        for i in range(3):
+            await service.ingest_data({"value": i})
+        assert store.get_stats()["in_memory"] == 2
+        assert store.get_stats()["estimated_bytes"] <= store.max_bytes
+
+    async def test_wal_cannot_spill(self, tmp_path):
+        """Test that the write-ahead log cannot be combined with spilling."""
+        wal = WriteAheadLog(str(tmp_path / "wal"))
+        spill = SQLiteRecordStore(str(tmp_path / "spill.db"))
+
+        with pytest.raises(ValueError):
+            DataService(wal, MemoryRecordStore(max_records=1, spill=spill))
+
+        wal.close()
+        await spill.close()
+
+    async def test_sharded_snapshot_keeps_ingestion_order(self, tmp_path):
+        """Test that a snapshot of a sharded store recovers records in ingestion order."""
+        service = DataService(
+            WriteAheadLog(str(tmp_path), snapshot_every=5), MemoryRecordStore(shards=4)
+        )
+        ids = [(await service.ingest_data({"value": i})).id for i in range(12)]
+        await service.shutdown()
+
+        recovered = DataService(WriteAheadLog(str(tmp_path)), MemoryRecordStore(shards=4))
+        assert [record.id for record in await recovered.get_all_data()] == ids
+        assert recovered.store.get_stats()["shards"] == 4
+        await recovered.shutdown()
+
+
+class TestShardedMemoryRecordStore:
+    """Test suite for the sharded in-memory store shared between threads."""
+
+    def test_consistent_under_concurrency(self, run_threads):
+        """Test concurrent puts, overlapping marks and deletes from worker threads."""
+        store = MemoryRecordStore(shards=8)
+        threads, per_thread = 8, 300
+        timestamp = datetime(2024, 1, 1)
+        marked = [[] for _ in range(threads)]
+
+        def work(index: int) -> None:
+            async def run() -> None:
+                records = [
+                    DataRecord(id=f"{index}-{i}", timestamp=timestamp, data={"value": i})
+                    for i in range(per_thread)
+                ]
+                await store.put_many(records)
+                # Every thread also marks its neighbour's records
+                neighbour = (index + 1) % threads
+                for owner in (index, neighbour):
+                    ids = [f"{owner}-{i}" for i in range(per_thread)]
+                    marked[index].extend(await store.mark_processed(ids, timestamp, {}))
+                for i in range(0, per_thread, 3):
+                    assert await store.delete(f"{index}-{i}") is True
+
+            asyncio.run(run())
+
+        run_threads(work, threads)
+
+        all_marked = [record_id for ids in marked for record_id in ids]
+        assert len(all_marked) == len(set(all_marked)) == threads * per_thread
+        remaining = threads * (per_thread - len(range(0, per_thread, 3)))
+        scanned = asyncio.run(_collect(store))
+        assert asyncio.run(store.count()) == len(scanned) == remaining
+        assert all(record.processed for record in scanned)
+
+    def test_scan_in_ingestion_order(self):
+        """Test that a sharded scan yields records by ingestion timestamp, not by shard."""
+        store = MemoryRecordStore(shards=8)
+        records = [
+            DataRecord(id=f"record-{i}", timestamp=datetime(2024, 1, 1, 0, 0, i), data={"i": i})
+            for i in range(50)
+        ]
+        asyncio.run(store.put_many(records))
+
+        scanned = asyncio.run(_collect(store))
+        assert [record.id for record in scanned] == [record.id for record in records]
+
+
+async def _collect(store: MemoryRecordStore) -> list:
+    """Return every record a store scans."""
+    return [record async for record in store.scan()]
+
+
+@pytest.mark.asyncio
+class TestSQLiteRecordStore:
+    """Test suite for the SQLite record store."""
+
+    async def test_crud_and_scan(self, tmp_path):
+        """Test basic store operations keep insertion order."""
+        store = SQLiteRecordStore(str(tmp_path / "data.db"), pool_size=2)
+        service = DataService(store=store)
+
+        records = [await service.ingest_data({"value": i}) for i in range(3)]
+        await service.ingest_batch([({"value": 3}, {"source": "batch"})])
+
+        assert await store.count() == 4
+        assert (await store.get(records[1].id)).data == {"value": 1}
+        assert await store.get("missing") is None
+        assert [r.data["value"] async for r in store.scan()] == [0, 1, 2, 3]
+        assert await store.delete(records[0].id) is True
+        assert await store.delete(records[0].id) is False
+        await service.shutdown()
+
+    async def test_service_restart_rebuilds_indexes(self, tmp_path):
+        """Test that start() indexes records persisted by a previous run."""
+        path = str(tmp_path / "data.db")
+        service = DataService(store=SQLiteRecordStore(path))
+        first = await service.ingest_data({"value": 1}, {"source": "a"})
+        second = await service.ingest_data({"value": 2})
+        await service.process_data(second.id)
+        await service.shutdown()
+
+        restarted = DataService(store=SQLiteRecordStore(path))
+        await restarted.start()
+
+        assert await restarted.get_stats() == {"total": 2, "processed": 1, "unprocessed": 1}
+        assert (await restarted.get_detailed_stats())["metadata_keys"] == {"source": 1}
+        page, _ = await restarted.get_page(limit=10)
+        assert [record.id for record in page] == [first.id, second.id]
+        assert page[1].processed is True
+        await restarted.shutdown()
+
+    async def test_wal_requires_memory_store(self, tmp_path):
+        """Test that the write-ahead log cannot be combined with SQLite."""
+        store = SQLiteRecordStore(str(tmp_path / "data.db"))
+        wal = WriteAheadLog(str(tmp_path / "wal"))
+
+        with pytest.raises(ValueError):
+            DataService(wal, store)
+
+        wal.close()
+        await store.close()
@@ -0,0 +1,99 @@
+"""Tests for the store server and its client."""
+
+import asyncio
+import pytest
+from pydantic_core import from_json
+from src.data_service import DataService
+from src.store_client import RemoteDataService
+from src.store_server import StoreServer
+from src.types import ProcessedData, RecordFilter
+
+
+@pytest.fixture
+async def remote(tmp_path):
+    """Serve a fresh data service on a temporary socket and connect to it."""
+    server = StoreServer(DataService(indexed_metadata_keys=["source"]), str(tmp_path / "s.sock"))
+    await server.start()
+    client = RemoteDataService(server.socket_path)
+    yield client
+    await client.shutdown()
+    await server.stop()
+
+
+@pytest.mark.asyncio
+class TestStoreServer:
+    """Test suite for serving the data service over a Unix socket."""
+
+    async def test_round_trips_records_and_stats(self, remote):
+        """Test that records, pages and stats come back as the local models."""
+        first = await remote.ingest_data({"value": 1}, {"source": "a"})
+        batch = await remote.ingest_batch([({"value": 2}, None), ({"value": 3}, {"source": "b"})])
+        processed = await remote.process_data(first.id)
+
+        assert isinstance(processed, ProcessedData)
+        assert processed.processingResult.status == "success"
+        assert (await remote.get_data(first.id)).processed is True
+        assert await remote.get_data("missing") is None
+
+        page, cursor = await remote.get_page(limit=2)
+        assert [record.id for record in page] == [first.id, batch[0].id]
+        assert isinstance(page[0], ProcessedData)
+        rest, _ = await remote.get_page(limit=2, cursor=cursor)
+        assert [record.id for record in rest] == [batch[1].id]
+
+        chunks = [
+            chunk async for chunk in remote.iter_records(RecordFilter(metadata={"source": "b"}))
+        ]
+        assert [[record.id for record in chunk] for chunk in chunks] == [[batch[1].id]]
+
+        assert await remote.delete_data(batch[0].id) is True
+        assert await remote.get_stats() == {"total": 2, "processed": 1, "unprocessed": 1}
+        assert (await remote.get_detailed_stats())["total"] == 2
+        counters = await remote.get_counters()
+        assert counters["data_records_ingested_total"] >= 3
+        assert counters["data_records_deleted_total"] >= 1
+
+    async def test_json_calls_fold_version_and_body(self, remote):
+        """Test that the JSON calls return pre-rendered bodies with their versions."""
+        record = from_json(await remote.ingest_data_json({"value": 1}, {"source": "a"}))
+        assert record["data"] == {"value": 1}
+
+        version, body = await remote.get_record_json(record["id"])
+        assert version == await remote.get_version(record["id"])
+        assert from_json(body) == record
+        assert await remote.get_record_json(record["id"], version) == (version, None)
+        assert await remote.get_record_json("missing") is None
+
+        version, (records, next_cursor, stats) = await remote.get_page_json(limit=1)
+        assert version == await remote.get_version()
+        assert from_json(records) == [record]
+        assert next_cursor is None
+        assert stats == {"total": 1, "processed": 0, "unprocessed": 1}
+        assert await remote.get_page_json(limit=1, known_version=version) == (version, None)
+        with pytest.raises(ValueError):
+            await remote.get_page_json(
+                filters=RecordFilter(metadata={"unindexed": "x"}), known_version=version
+            )
+
+    async def test_concurrent_calls_and_errors(self, remote):
+        """Test that pipelined calls resolve independently and ValueErrors cross over."""
+        records = await asyncio.gather(*(remote.ingest_data({"value": i}) for i in range(50)))
+        assert len({record.id for record in records}) == 50
+        assert (await remote.get_stats())["total"] == 50
+
+        with pytest.raises(ValueError):
+            await remote.validate_filter(RecordFilter(metadata={"unindexed": "x"}))
+        with pytest.raises(ValueError):
+            await remote._call("no_such_method")
+
+        record, replayed = await remote.ingest_idempotent("key", {"value": 0})
+        assert replayed is False
+        assert (await remote.ingest_idempotent("key", {"value": 0})) == (record, True)
+        with pytest.raises(ValueError):
+            await remote.ingest_idempotent("key", {"value": 1})
+
+        job = await remote.enqueue_processing(all_unprocessed=True)
+        while (await remote.get_job(job.id)).status != "completed":
+            await asyncio.sleep(0.01)
+        assert (await remote.get_queue_stats())["queue_depth"] == 0
+        assert (await remote.get_stats())["processed"] == 51
@@ -0,0 +1,88 @@
+"""Tests for vectorized numeric batch processing."""
+
+import pytest
+from datetime import datetime
+from src import vectorized
+from src.data_service import DataService
+from src.processors import ProcessorPipeline, checksum
+from src.types import DataRecord
+
+
+def make_record(record_id, data):
+    """Build an unprocessed record."""
+    return DataRecord(id=record_id, timestamp=datetime(2024, 1, 1), data=data)
+
+
+class TestSummarizeNumeric:
+    """Test suite for grouping and summarizing numeric payloads."""
+
+    def test_groups_by_shape_and_normalizes(self):
+        """Test derived values for flat fields and arrays of different shapes."""
+        records = [
+            make_record("a", {"sensor": "t", "value": 2, "readings": [0, 4, 6]}),
+            make_record("b", {"sensor": "t", "value": 5, "readings": [5, 5, 5]}),
+            make_record("c", {"value": 1.5, "ok": True}),
+            make_record("d", {"label": "text", "flags": [True, False]}),
+        ]
+
+        outputs = vectorized.summarize_numeric(records)
+
+        assert set(outputs) == {"a", "b", "c"}
+        assert outputs["a"] == {
+            "fields": ["readings", "value"],
+            "count": 4,
+            "mean": 3.0,
+            "min": 0.0,
+            "max": 6.0,
+            "std": pytest.approx(2.236, abs=1e-3),
+            "normalized": {"readings": [0.0, 2 / 3, 1.0], "value": 1 / 3},
+        }
+        assert outputs["b"]["normalized"] == {"readings": [0.0, 0.0, 0.0], "value": 0.0}
+        assert outputs["c"]["fields"] == ["value"]
+        assert outputs["c"]["std"] == 0.0
+
+    def test_python_fallback_matches_numpy(self, monkeypatch):
+        """Test that the pure-Python path computes the same values."""
+        if not vectorized.HAS_NUMPY:
+            pytest.skip("numpy is not installed")
+        records = [make_record(str(i), {"x": [i, i * 2.5, -i], "y": i % 3}) for i in range(20)]
+
+        expected = vectorized.summarize_numeric(records)
+        monkeypatch.setattr(vectorized, "HAS_NUMPY", False)
+        fallback = vectorized.summarize_numeric(records)
+
+        assert fallback.keys() == expected.keys()
+        for record_id, output in expected.items():
+            assert fallback[record_id]["mean"] == pytest.approx(output["mean"])
+            assert fallback[record_id]["std"] == pytest.approx(output["std"])
+            assert fallback[record_id]["normalized"]["x"] == pytest.approx(
+                output["normalized"]["x"]
+            )
+
+
+@pytest.mark.asyncio
+class TestVectorizedJobs:
+    """Test suite for vectorized background processing jobs."""
+
+    async def test_vectorized_job(self):
+        """Test that numeric records are summarized and typed records keep their processor."""
+        service = DataService(pipeline=ProcessorPipeline({"checksum": checksum}, pool_size=1))
+        numeric = await service.ingest_data({"readings": [1, 2, 3]})
+        typed = await service.ingest_data({"readings": [1, 2, 3]}, {"type": "checksum"})
+        text = await service.ingest_data({"note": "hello"})
+
+        job = await service.enqueue_processing(all_unprocessed=True, vectorized=True)
+        await service._job_queue.join()
+
+        assert service.jobs[job.id].vectorized is True
+        assert service.jobs[job.id].processed == 3
+        result = (await service.get_data(numeric.id)).processingResult
+        assert result.processor == vectorized.PROCESSOR_NAME
+        assert result.output["mean"] == 2.0
+        assert result.output["normalized"] == {"readings": [0.0, 0.5, 1.0]}
+        assert (await service.get_data(typed.id)).processingResult.processor == "checksum"
+        assert (await service.get_data(text.id)).processingResult.processor is None
+
+        stats = (await service.get_detailed_stats())["processors"]
+        assert stats[vectorized.PROCESSOR_NAME]["runs"] == 1
+        await service.shutdown()